@@ -0,0 +1,160 @@
+"""
+七牛云模型目录
+
+模型 YAML 是唯一数据源，插件启动时由 SDK 解析为 AIModelEntity（predefined_models），
+这里不再保存第二份模型数据：query_models 直接从 SDK 解析出的模型实体中，按特性、上下文长度、
+输出上限和价格筛选和排序；SDK 不保留的 extra 字段（提示词缓存方式、图片尺寸上限、吞吐量等）
+在第一次用到某个模型时才读取该模型的 YAML，并按模型缓存。
+"""
+
+import logging
+import threading
+from collections.abc import Iterable
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import yaml
+from dify_plugin.entities.model import AIModelEntity, ModelPropertyKey
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = Path(__file__).parent
+
+# 价格统一换算为每百万 token 价格
+PRICE_PER_TOKENS = 1_000_000
+# query_models 支持的排序字段，值为 True 表示降序
+SORT_FIELDS = {
+    "input_price": False,
+    "output_price": False,
+    "context_size": True,
+    "max_output_tokens": True,
+}
+
+
+class CatalogModel(NamedTuple):
+    """模型目录中单个模型的摘要信息，字段缺失时为 None"""
+
+    model: str
+    features: tuple[str, ...]
+    context_size: Optional[int]
+    max_output_tokens: Optional[int]
+    input_price: Optional[float]
+    output_price: Optional[float]
+    currency: Optional[str]
+
+
+_extras: dict[str, dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def get_model_extra(model: str) -> dict[str, Any]:
+    """
+    读取模型 YAML 中的 extra 字段，每个模型只在第一次调用时读取文件
+
+    Args:
+        model: 模型 ID
+
+    Returns:
+        extra 字段内容，模型没有 YAML 文件或没有 extra 时返回空字典
+    """
+    extra = _extras.get(model)
+    if extra is not None:
+        return extra
+
+    extra = {}
+    path = MODELS_DIR / f"{model}.yaml"
+    # 模型 ID 来自请求参数，只读取模型目录下的文件
+    if path.parent == MODELS_DIR and path.is_file():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                extra = (yaml.safe_load(f) or {}).get("extra") or {}
+        except Exception as ex:
+            logger.warning(f"读取模型配置 {path} 失败: {ex}")
+
+    with _lock:
+        _extras.setdefault(model, extra)
+    return _extras[model]
+
+
+def summarize(entity: AIModelEntity) -> CatalogModel:
+    """从模型实体提取摘要信息，价格换算为每百万 token 价格"""
+    context_size = (entity.model_properties or {}).get(ModelPropertyKey.CONTEXT_SIZE)
+    max_output_tokens = next((rule.max for rule in entity.parameter_rules if rule.name == "max_tokens"), None)
+    pricing = entity.pricing
+
+    def price(field: str) -> Optional[float]:
+        value: Optional[Decimal] = getattr(pricing, field, None)
+        if value is None:
+            return None
+        return float(value * pricing.unit * PRICE_PER_TOKENS)
+
+    return CatalogModel(
+        model=entity.model,
+        features=tuple(feature.value for feature in entity.features or ()),
+        context_size=int(context_size) if context_size else None,
+        max_output_tokens=int(max_output_tokens) if max_output_tokens else None,
+        input_price=price("input"),
+        output_price=price("output"),
+        currency=pricing.currency if pricing else None,
+    )
+
+
+def query_models(
+    models: Iterable[AIModelEntity],
+    features: Optional[list[str]] = None,
+    min_context_size: Optional[int] = None,
+    min_output_tokens: Optional[int] = None,
+    max_input_price: Optional[float] = None,
+    max_output_price: Optional[float] = None,
+    sort_by: Optional[str] = None,
+) -> list[CatalogModel]:
+    """
+    按条件筛选模型
+
+    设置了某个数值条件时，缺少对应数据的模型会被排除
+
+    Args:
+        models: 模型实体，通常为 predefined_models()
+        features: 必须支持的特性（可选），如 ["vision"]
+        min_context_size: 最小上下文长度（可选）
+        min_output_tokens: 最小输出上限（可选）
+        max_input_price: 输入价格上限，每百万 token（可选）
+        max_output_price: 输出价格上限，每百万 token（可选）
+        sort_by: 排序字段（可选），见 SORT_FIELDS；缺少该字段的模型排在最后
+
+    Returns:
+        符合条件的模型摘要列表，未指定排序时保持输入顺序
+    """
+    if sort_by is not None and sort_by not in SORT_FIELDS:
+        raise ValueError(f"不支持的排序字段: {sort_by}")
+
+    def at_least(value: Optional[float], bound: Optional[float]) -> bool:
+        return bound is None or (value is not None and value >= bound)
+
+    def at_most(value: Optional[float], bound: Optional[float]) -> bool:
+        return bound is None or (value is not None and value <= bound)
+
+    results = []
+    for entity in models:
+        summary = summarize(entity)
+        if features and not set(features).issubset(summary.features):
+            continue
+        if not (
+            at_least(summary.context_size, min_context_size)
+            and at_least(summary.max_output_tokens, min_output_tokens)
+            and at_most(summary.input_price, max_input_price)
+            and at_most(summary.output_price, max_output_price)
+        ):
+            continue
+        results.append(summary)
+
+    if sort_by:
+        descending = SORT_FIELDS[sort_by]
+        results.sort(
+            key=lambda summary: (
+                getattr(summary, sort_by) is None,
+                -(getattr(summary, sort_by) or 0) if descending else (getattr(summary, sort_by) or 0),
+            )
+        )
+    return results
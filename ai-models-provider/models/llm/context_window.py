@@ -0,0 +1,154 @@
+"""
+上下文窗口预检
+
+在请求发出之前，用本地 token 计数检查提示词是否超出 context_size - max_tokens，
+并按配置的策略处理超长提示词，避免把注定会被服务端 400 拒绝的请求发到网络上。
+"""
+
+from collections.abc import Callable
+from typing import Optional
+
+from dify_plugin.entities.model.message import (
+    PromptMessage,
+    SystemPromptMessage,
+    ToolPromptMessage,
+    UserPromptMessage,
+)
+from dify_plugin.errors.model import InvokeBadRequestError
+
+# 超长处理策略
+STRATEGY_NONE = "none"
+STRATEGY_REJECT = "reject"
+STRATEGY_DROP_OLDEST = "drop_oldest"
+STRATEGY_TRUNCATE_TOOL_OUTPUTS = "truncate_tool_outputs"
+CONTEXT_OVERFLOW_STRATEGIES = (
+    STRATEGY_NONE,
+    STRATEGY_REJECT,
+    STRATEGY_DROP_OLDEST,
+    STRATEGY_TRUNCATE_TOOL_OUTPUTS,
+)
+
+TRUNCATED_MARKER = "\n...[truncated]"
+# 截断工具结果时额外预留的 token 数，抵消按字符比例估算的误差
+TRUNCATION_MARGIN_TOKENS = 16
+
+TokenCounter = Callable[[list[PromptMessage]], int]
+
+
+def _overflow_error(num_tokens: int, budget: int) -> InvokeBadRequestError:
+    return InvokeBadRequestError(
+        f"提示词长度 {num_tokens} tokens 超出模型可用上下文 {budget} tokens（context_size - max_tokens）"
+    )
+
+
+def _split_turns(prompt_messages: list[PromptMessage]) -> tuple[list[PromptMessage], list[list[PromptMessage]]]:
+    """
+    将消息拆分为开头的系统消息和按用户消息划分的对话轮次
+
+    一轮对话从一条用户消息开始，包含其后的助手消息和工具结果，
+    按轮丢弃可以保证 tool_calls 与对应的工具结果不会被拆开。
+    只有开头的系统消息始终保留；对话中间的系统消息留在原位置，归入紧随其后的用户消息所在的轮次。
+    """
+    index = 0
+    while index < len(prompt_messages) and isinstance(prompt_messages[index], SystemPromptMessage):
+        index += 1
+    leading_system_messages = list(prompt_messages[:index])
+
+    turns: list[list[PromptMessage]] = []
+    for message in prompt_messages[index:]:
+        # 前一条是系统消息时，用户消息与它同属一轮
+        starts_turn = isinstance(message, SystemPromptMessage) or (
+            isinstance(message, UserPromptMessage)
+            and not (turns and all(isinstance(item, SystemPromptMessage) for item in turns[-1]))
+        )
+        if starts_turn or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return leading_system_messages, turns
+
+
+def _drop_oldest_turns(
+    prompt_messages: list[PromptMessage], budget: int, count_tokens: TokenCounter
+) -> list[PromptMessage]:
+    """丢弃最早的对话轮次直到提示词放得下，开头的系统消息和最后一轮始终保留"""
+    system_messages, turns = _split_turns(prompt_messages)
+    while len(turns) > 1:
+        turns.pop(0)
+        fitted = system_messages + [message for turn in turns for message in turn]
+        num_tokens = count_tokens(fitted)
+        if num_tokens <= budget:
+            return fitted
+    raise _overflow_error(count_tokens(prompt_messages), budget)
+
+
+def _tool_output_body(message: PromptMessage) -> Optional[str]:
+    """工具结果中可以截断的文本（已截断的去掉截断标记），不是文本工具结果时返回 None"""
+    if not isinstance(message, ToolPromptMessage) or not isinstance(message.content, str):
+        return None
+    content = message.content
+    return content[: -len(TRUNCATED_MARKER)] if content.endswith(TRUNCATED_MARKER) else content
+
+
+def _truncate_tool_outputs(
+    prompt_messages: list[PromptMessage], budget: int, count_tokens: TokenCounter
+) -> list[PromptMessage]:
+    """
+    反复截断当前最长的工具结果直到提示词放得下；
+    工具结果都已截断为空仍然超长时，改为丢弃最早的对话轮次
+    """
+    fitted = list(prompt_messages)
+    num_tokens = count_tokens(fitted)
+    while num_tokens > budget:
+        bodies = {index: _tool_output_body(message) for index, message in enumerate(fitted)}
+        candidates = [index for index, body in bodies.items() if body]
+        if not candidates:
+            return _drop_oldest_turns(fitted, budget, count_tokens)
+
+        index = max(candidates, key=lambda candidate: len(bodies[candidate]))
+        body = bodies[index]
+        message_tokens = count_tokens([fitted[index]])
+        # 按字符比例估算需要保留的长度，每次至少截掉一个字符
+        keep_ratio = max(0.0, 1 - (num_tokens - budget + TRUNCATION_MARGIN_TOKENS) / max(message_tokens, 1))
+        keep_chars = min(int(len(body) * keep_ratio), len(body) - 1)
+        fitted[index] = fitted[index].model_copy(update={"content": body[:keep_chars] + TRUNCATED_MARKER})
+        num_tokens = count_tokens(fitted)
+    return fitted
+
+
+def fit_prompt_messages(
+    prompt_messages: list[PromptMessage],
+    context_size: Optional[int],
+    max_tokens: Optional[int],
+    strategy: str,
+    count_tokens: TokenCounter,
+) -> list[PromptMessage]:
+    """
+    按上下文窗口处理提示消息
+
+    Args:
+        prompt_messages: 提示消息列表
+        context_size: 模型上下文长度
+        max_tokens: 本次请求的最大生成 token 数
+        strategy: 超长处理策略，见 CONTEXT_OVERFLOW_STRATEGIES
+        count_tokens: 计算消息列表 token 数的函数
+
+    Returns:
+        放得进上下文窗口的提示消息列表（未超长时原样返回）
+
+    Raises:
+        InvokeBadRequestError: 超长且无法按策略处理
+    """
+    if strategy not in CONTEXT_OVERFLOW_STRATEGIES or strategy == STRATEGY_NONE or not context_size:
+        return prompt_messages
+
+    budget = context_size - (max_tokens or 0)
+    num_tokens = count_tokens(prompt_messages)
+    if num_tokens <= budget:
+        return prompt_messages
+
+    if strategy == STRATEGY_DROP_OLDEST:
+        return _drop_oldest_turns(prompt_messages, budget, count_tokens)
+    if strategy == STRATEGY_TRUNCATE_TOOL_OUTPUTS:
+        return _truncate_tool_outputs(prompt_messages, budget, count_tokens)
+    raise _overflow_error(num_tokens, budget)
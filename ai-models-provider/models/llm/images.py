@@ -0,0 +1,216 @@
+"""
+图片预处理
+
+视觉模型的图片以 base64 原样发送时，几 MB 的截图会显著拉长上传时间和首 token 延迟。
+这里在发送前按模型的最大分辨率缩放图片，去除元数据并重新编码为 JPEG（带透明通道时为 WebP），
+处理结果按图片内容哈希缓存，多轮对话中重复出现的图片只处理一次。
+只处理 base64 / data URI 图片，远程 URL 原样发送。
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from dify_plugin.entities.model.message import (
+    ImagePromptMessageContent,
+    PromptMessage,
+    PromptMessageContentType,
+)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    # Pillow 缺失时跳过预处理
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# 默认最长边（像素）
+DEFAULT_MAX_IMAGE_SIDE = 2048
+# 按模型 ID 关键字匹配的最长边，模型目录 extra.max_image_side 优先
+MODEL_MAX_IMAGE_SIDES = (
+    ("claude", 1568),
+    ("gemini", 3072),
+)
+# 不需要缩放且小于该大小的 JPEG / WebP 图片不重新编码
+SMALL_IMAGE_BYTES = 256 * 1024
+JPEG_QUALITY = 85
+WEBP_QUALITY = 85
+# 缓存处理结果的总大小上限（base64 字节数）
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# 缓存值为 None 表示图片无需处理，原样发送
+_cache: OrderedDict[tuple[str, int], Optional[tuple[str, str]]] = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_MISSING = object()
+
+
+def get_max_image_side(model: str, extra: Optional[dict] = None) -> int:
+    """
+    获取模型的图片最长边
+
+    Args:
+        model: 模型 ID
+        extra: 模型 YAML 中的 extra 信息（可选）
+
+    Returns:
+        最长边像素数
+    """
+    if extra and extra.get("max_image_side"):
+        return int(extra["max_image_side"])
+
+    lowered = model.lower()
+    for keyword, max_side in MODEL_MAX_IMAGE_SIDES:
+        if keyword in lowered:
+            return max_side
+    return DEFAULT_MAX_IMAGE_SIDE
+
+
+def _cache_get(key: tuple[str, int]):
+    with _cache_lock:
+        value = _cache.get(key, _MISSING)
+        if value is not _MISSING:
+            _cache.move_to_end(key)
+        return value
+
+
+def _cache_put(key: tuple[str, int], value: Optional[tuple[str, str]]) -> None:
+    global _cache_bytes
+    size = len(value[1]) if value else 0
+    if size > IMAGE_CACHE_MAX_BYTES:
+        return
+
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = value
+        _cache_bytes += size
+        while _cache_bytes > IMAGE_CACHE_MAX_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted[1]) if evicted else 0
+
+
+def _get_base64_data(content: ImagePromptMessageContent) -> Optional[str]:
+    """返回图片的 base64 数据，远程 URL 返回 None"""
+    if content.url:
+        if not content.url.startswith("data:") or ";base64," not in content.url:
+            return None
+        return content.url.split(",", 1)[1]
+    return content.base64_data or None
+
+
+def _encode_image(raw: bytes, max_side: int) -> Optional[tuple[str, bytes]]:
+    """
+    缩放并重新编码图片
+
+    Returns:
+        (mime_type, 图片数据)，不需要处理或处理后反而更大时返回 None
+    """
+    with Image.open(io.BytesIO(raw)) as image:
+        # 动图重新编码会丢帧
+        if getattr(image, "is_animated", False):
+            return None
+
+        needs_resize = max(image.size) > max_side
+        if not needs_resize and len(raw) <= SMALL_IMAGE_BYTES and image.format in ("JPEG", "WEBP"):
+            return None
+
+        # 先按 EXIF 方向旋转，重新编码时不写入 EXIF 等元数据
+        image = ImageOps.exif_transpose(image)
+        if needs_resize:
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            image.convert("RGBA").save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+            mime_type = "image/webp"
+        else:
+            image.convert("RGB").save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            mime_type = "image/jpeg"
+
+    encoded = output.getvalue()
+    if not needs_resize and len(encoded) >= len(raw):
+        return None
+    return mime_type, encoded
+
+
+def preprocess_image(content: ImagePromptMessageContent, max_side: int) -> ImagePromptMessageContent:
+    """
+    预处理单张图片，结果按内容哈希缓存
+
+    Args:
+        content: 图片内容
+        max_side: 最长边像素数
+
+    Returns:
+        处理后的图片内容，无法处理时原样返回
+    """
+    data = _get_base64_data(content)
+    if data is None:
+        return content
+
+    key = (hashlib.blake2b(data.encode(), digest_size=16).hexdigest(), max_side)
+    cached = _cache_get(key)
+    if cached is _MISSING:
+        try:
+            encoded = _encode_image(base64.b64decode(data), max_side)
+        except (OSError, ValueError, binascii.Error, Image.DecompressionBombError) as ex:
+            logger.debug(f"图片预处理失败，原样发送: {ex}")
+            encoded = None
+        cached = (encoded[0], base64.b64encode(encoded[1]).decode("ascii")) if encoded else None
+        _cache_put(key, cached)
+
+    if cached is None:
+        return content
+
+    encoded_mime, encoded_data = cached
+    return content.model_copy(
+        update={
+            "url": "",
+            "base64_data": encoded_data,
+            "mime_type": encoded_mime,
+            "format": encoded_mime.split("/", 1)[1],
+        }
+    )
+
+
+def preprocess_prompt_images(prompt_messages: list[PromptMessage], max_side: int) -> list[PromptMessage]:
+    """
+    预处理提示消息中的全部图片
+
+    Args:
+        prompt_messages: 提示消息列表
+        max_side: 最长边像素数，<= 0 时不处理
+
+    Returns:
+        处理后的提示消息列表，没有图片时原样返回
+    """
+    if Image is None or max_side <= 0:
+        return prompt_messages
+
+    if not any(
+        isinstance(message.content, list)
+        and any(content.type == PromptMessageContentType.IMAGE for content in message.content)
+        for message in prompt_messages
+    ):
+        return prompt_messages
+
+    processed = []
+    for message in prompt_messages:
+        if not isinstance(message.content, list):
+            processed.append(message)
+            continue
+
+        contents = [
+            preprocess_image(content, max_side) if isinstance(content, ImagePromptMessageContent) else content
+            for content in message.content
+        ]
+        processed.append(message.model_copy(update={"content": contents}))
+    return processed
@@ -1,10 +1,48 @@
+import logging
+import time
 from collections.abc import Generator
 from typing import Optional, Union
-from dify_plugin.entities.model.llm import LLMMode, LLMResult
-from dify_plugin.entities.model.message import PromptMessage, PromptMessageTool
+
+import requests
+from dify_plugin.entities.model import ModelFeature, ModelPropertyKey
+from dify_plugin.entities.model.llm import LLMMode, LLMResult, LLMResultChunk
+from dify_plugin.entities.model.message import (
+    AssistantPromptMessage,
+    PromptMessage,
+    PromptMessageContentType,
+    PromptMessageTool,
+)
+from dify_plugin.errors.model import CredentialsValidateFailedError, InvokeBadRequestError, InvokeError
 from yarl import URL
 from dify_plugin import OAICompatLargeLanguageModel
 
+from models.llm.catalog import get_model_extra
+from models.llm.context_window import STRATEGY_NONE, fit_prompt_messages
+from models.llm.images import get_max_image_side, preprocess_prompt_images
+from models.llm.prompt_cache import PROMPT_CACHE_EXPLICIT, add_cache_control, get_cache_breakpoints
+from models.llm.reasoning import ReasoningFilter
+from models.llm.routing import (
+    AUTO_MODEL,
+    AUTO_MODELS_REQUIRED_MESSAGE,
+    DEFAULT_MAX_ATTEMPTS,
+    OBJECTIVE_LATENCY,
+    is_retryable_error,
+    parse_model_list,
+    routing_stats,
+    select_models,
+)
+from models.llm.singleflight import make_request_key, request_flights, should_coalesce
+from models.llm.stream import DEFAULT_COALESCE_MAX_CHARS, DEFAULT_COALESCE_WINDOW_MS, coalesce_stream
+from models.llm.tokenizer import (
+    TOKENS_PER_REPLY,
+    count_message_tokens,
+    count_tools_tokens,
+    get_tokenizer_family,
+)
+from models.llm.usage import apply_cached_price, log_usage
+
+logger = logging.getLogger(__name__)
+
 
 class QiniuLargeLanguageModel(OAICompatLargeLanguageModel):
     """
@@ -39,12 +77,347 @@ class QiniuLargeLanguageModel(OAICompatLargeLanguageModel):
         Returns:
             LLMResult 或 Generator
         """
+        # 开启请求合并时，相同的进行中请求共享一次上游调用
+        if should_coalesce(credentials.get("request_coalescing"), model_parameters):
+            key = make_request_key(model, credentials, prompt_messages, model_parameters, tools, stop, stream)
+            return request_flights.do(
+                key,
+                lambda: self._invoke_model(model, credentials, prompt_messages, model_parameters, tools, stop, stream, user),
+            )
+
+        return self._invoke_model(model, credentials, prompt_messages, model_parameters, tools, stop, stream, user)
+
+    def _invoke_model(
+        self,
+        model: str,
+        credentials: dict,
+        prompt_messages: list[PromptMessage],
+        model_parameters: dict,
+        tools: Optional[list[PromptMessageTool]] = None,
+        stop: Optional[list[str]] = None,
+        stream: bool = True,
+        user: Optional[str] = None,
+    ) -> Union[LLMResult, Generator]:
+        """
+        调用单个模型（不经过请求合并）
+
+        Args:
+            model: 模型名称
+            credentials: 认证信息
+            prompt_messages: 提示消息列表
+            model_parameters: 模型参数
+            tools: 工具列表（可选）
+            stop: 停止词列表（可选）
+            stream: 是否流式返回
+            user: 用户标识（可选）
+
+        Returns:
+            LLMResult 或 Generator
+        """
+        if model == AUTO_MODEL:
+            return self._invoke_auto(credentials, prompt_messages, model_parameters, tools, stop, stream, user)
+
         self._add_custom_parameters(credentials)
         
         # 对于自定义模型，model 参数已经是用户输入的模型名称
         # 不需要额外处理，直接使用即可
+
+        # reasoning_mode 只在插件内使用，不发送给上游；流式响应在 _invoke 返回后才被消费，
+        # 过滤器需要在整个响应期间保留
+        model_parameters = dict(model_parameters)
+        self._reasoning_filter = ReasoningFilter(
+            model_parameters.pop("reasoning_mode", None) or credentials.get("reasoning_mode"),
+            get_tokenizer_family(model),
+        )
+
+        # 视觉模型发送前缩放并重新编码图片
+        prompt_messages = self._preprocess_images(model, credentials, prompt_messages)
+
+        # 发送前按上下文窗口预检提示词
+        prompt_messages = self._fit_context_window(model, credentials, prompt_messages, model_parameters, tools)
         
-        return super()._invoke(model, credentials, prompt_messages, model_parameters, tools, stop, stream, user)
+        # 支持显式提示词缓存的模型标记缓存断点，请求体在 super()._invoke 中构造
+        self._cache_breakpoint_ids = {id(message) for message in self._get_cache_breakpoints(model, prompt_messages)}
+        try:
+            result = super()._invoke(model, credentials, prompt_messages, model_parameters, tools, stop, stream, user)
+        finally:
+            self._cache_breakpoint_ids = set()
+        if isinstance(result, LLMResult):
+            return result
+
+        # 合并连续的文本增量，减少发往插件运行时的消息数
+        return coalesce_stream(
+            result,
+            window_ms=self._get_number_credential(credentials, "stream_coalesce_window_ms", DEFAULT_COALESCE_WINDOW_MS),
+            max_chars=int(self._get_number_credential(credentials, "stream_coalesce_max_chars", DEFAULT_COALESCE_MAX_CHARS)),
+        )
+
+    def _invoke_auto(
+        self,
+        credentials: dict,
+        prompt_messages: list[PromptMessage],
+        model_parameters: dict,
+        tools: Optional[list[PromptMessageTool]] = None,
+        stop: Optional[list[str]] = None,
+        stream: bool = True,
+        user: Optional[str] = None,
+    ) -> Union[LLMResult, Generator]:
+        """
+        调用 qiniu-auto 虚拟模型
+
+        在凭据配置的候选模型中按请求需要的能力、提示词长度和路由目标选择模型，
+        依次尝试，遇到可重试的错误时切换到下一个候选模型
+
+        Args:
+            credentials: 认证信息
+            prompt_messages: 提示消息列表
+            model_parameters: 模型参数，routing_objective 指定路由目标
+            tools: 工具列表（可选）
+            stop: 停止词列表（可选）
+            stream: 是否流式返回
+            user: 用户标识（可选）
+
+        Returns:
+            LLMResult 或 Generator
+        """
+        model_parameters = dict(model_parameters)
+        objective = model_parameters.pop("routing_objective", None) or OBJECTIVE_LATENCY
+
+        features = []
+        if tools:
+            features.append("tool-call")
+        if any(
+            isinstance(message.content, list)
+            and any(content.type == PromptMessageContentType.IMAGE for content in message.content)
+            for message in prompt_messages
+        ):
+            features.append("vision")
+
+        allowed_models = parse_model_list(credentials.get("auto_routing_models"))
+        if not allowed_models:
+            raise InvokeBadRequestError(AUTO_MODELS_REQUIRED_MESSAGE)
+
+        candidates = select_models(
+            allowed_models,
+            self.predefined_models(),
+            objective=objective,
+            features=features,
+            prompt_tokens=self.get_num_tokens(AUTO_MODEL, dict(credentials), prompt_messages, tools),
+            max_tokens=model_parameters.get("max_tokens"),
+        )
+        if not candidates:
+            raise InvokeBadRequestError("没有满足本次请求能力和上下文长度要求的模型")
+
+        last_error: Optional[Exception] = None
+        for candidate in candidates[:DEFAULT_MAX_ATTEMPTS]:
+            started_at = time.monotonic()
+            try:
+                result = self._invoke_model(
+                    candidate, dict(credentials), prompt_messages, dict(model_parameters), tools, stop, stream, user
+                )
+            except Exception as ex:
+                routing_stats.record_failure(candidate)
+                if not is_retryable_error(ex):
+                    raise
+                logger.warning(f"{AUTO_MODEL} 调用 {candidate} 失败，切换到下一个候选模型: {ex}")
+                last_error = ex
+                continue
+
+            if isinstance(result, LLMResult):
+                routing_stats.record_success(candidate, (time.monotonic() - started_at) * 1000)
+                return result
+            return self._track_stream(result, candidate, started_at)
+
+        raise last_error
+
+    @staticmethod
+    def _track_stream(chunks: Generator, model: str, started_at: float) -> Generator:
+        """记录流式响应的首个 chunk 延迟，流中途出错时记为失败"""
+        latency = None
+        try:
+            for chunk in chunks:
+                if latency is None:
+                    latency = (time.monotonic() - started_at) * 1000
+                yield chunk
+        except Exception:
+            routing_stats.record_failure(model)
+            raise
+        routing_stats.record_success(model, latency if latency is not None else (time.monotonic() - started_at) * 1000)
+
+    def get_num_tokens(
+        self,
+        model: str,
+        credentials: dict,
+        prompt_messages: list[PromptMessage],
+        tools: Optional[list[PromptMessageTool]] = None,
+    ) -> int:
+        """
+        计算提示消息的 token 数
+
+        按模型家族选择本地分词方式：GPT 家族使用 tiktoken 精确计数，其他家族按字符比例估算，
+        结果是近似值。单条消息的计数结果会被缓存，对话增长时只需计算新增的消息
+
+        Args:
+            model: 模型名称
+            credentials: 认证信息
+            prompt_messages: 提示消息列表
+            tools: 工具列表（可选）
+
+        Returns:
+            token 数
+        """
+        self._add_custom_parameters(credentials)
+        family = get_tokenizer_family(model)
+
+        num_tokens = TOKENS_PER_REPLY
+        for message in prompt_messages:
+            num_tokens += count_message_tokens(self._convert_prompt_message_to_dict(message, credentials), family)
+
+        if tools:
+            num_tokens += count_tools_tokens(tools, family)
+
+        return num_tokens
+
+    def _preprocess_images(self, model: str, credentials: dict, prompt_messages: list[PromptMessage]) -> list[PromptMessage]:
+        """
+        按模型的最大分辨率缩放并重新编码提示消息中的图片，只处理支持视觉的模型
+
+        Args:
+            model: 模型名称
+            credentials: 认证信息
+            prompt_messages: 提示消息列表
+
+        Returns:
+            处理后的提示消息列表
+        """
+        model_schema = self.get_model_schema(model, credentials)
+        if not model_schema or ModelFeature.VISION not in (model_schema.features or []):
+            return prompt_messages
+
+        extra = get_model_extra(model)
+        max_side = self._get_number_credential(credentials, "image_max_side", get_max_image_side(model, extra))
+        return preprocess_prompt_images(prompt_messages, int(max_side))
+
+    def _get_cache_breakpoints(self, model: str, prompt_messages: list[PromptMessage]) -> list[PromptMessage]:
+        """
+        获取需要标记 cache_control 的消息，只有模型目录中标记为显式缓存的模型才需要
+
+        Args:
+            model: 模型名称
+            prompt_messages: 提示消息列表
+
+        Returns:
+            需要标记的消息列表
+        """
+        extra = get_model_extra(model)
+        if extra.get("prompt_cache") != PROMPT_CACHE_EXPLICIT:
+            return []
+        return get_cache_breakpoints(prompt_messages)
+
+    def _convert_prompt_message_to_dict(self, message: PromptMessage, credentials: Optional[dict] = None) -> dict:
+        """
+        转换为 OpenAI 格式的消息，缓存断点消息附加 cache_control 标记
+        """
+        message_dict = super()._convert_prompt_message_to_dict(message, credentials)
+        if id(message) in getattr(self, "_cache_breakpoint_ids", ()):
+            return add_cache_control(message_dict)
+        return message_dict
+
+    def _create_final_llm_result_chunk(
+        self,
+        index: int,
+        message: AssistantPromptMessage,
+        finish_reason: str,
+        usage: dict,
+        model: str,
+        prompt_messages: list[PromptMessage],
+        credentials: dict,
+        full_content: str,
+    ) -> LLMResultChunk:
+        """
+        生成流式响应的最后一个 chunk，补充输出未结束的推理内容，
+        completion_tokens 计入没有输出的推理内容，记录提示词缓存命中和推理的 token 数，
+        缓存命中的提示词按缓存命中价格计费
+        """
+        reasoning_filter = getattr(self, "_reasoning_filter", None)
+        pending = reasoning_filter.flush() if reasoning_filter else ""
+        if pending:
+            message = AssistantPromptMessage(content=pending)
+            full_content += pending
+
+        chunk = super()._create_final_llm_result_chunk(
+            index, message, finish_reason, usage, model, prompt_messages, credentials, full_content
+        )
+        # 上游未报告用量时 SDK 按输出内容估算 completion_tokens，补上没有输出的推理内容
+        hidden_tokens = reasoning_filter.hidden_tokens if reasoning_filter else 0
+        if hidden_tokens and not (usage and usage.get("completion_tokens") is not None):
+            chunk.delta.usage = self._calc_response_usage(
+                model, credentials, chunk.delta.usage.prompt_tokens, chunk.delta.usage.completion_tokens + hidden_tokens
+            )
+        details = log_usage(model, chunk.delta.usage, usage, reasoning_filter.estimated_tokens if reasoning_filter else 0)
+        chunk.delta.usage = apply_cached_price(
+            chunk.delta.usage, details.prompt_cached_tokens, get_model_extra(model).get("cached_input_price")
+        )
+        return chunk
+
+    def _handle_generate_response(
+        self, model: str, credentials: dict, response: requests.Response, prompt_messages: list[PromptMessage]
+    ) -> LLMResult:
+        """
+        处理非流式响应，记录提示词缓存命中和推理的 token 数，缓存命中的提示词按缓存命中价格计费
+        """
+        result = super()._handle_generate_response(model, credentials, response, prompt_messages)
+        details = log_usage(model, result.usage, response.json().get("usage"))
+        result.usage = apply_cached_price(
+            result.usage, details.prompt_cached_tokens, get_model_extra(model).get("cached_input_price")
+        )
+        return result
+
+    def _wrap_thinking_by_reasoning_content(self, delta: dict, is_reasoning: bool) -> tuple[str, bool]:
+        """
+        按 reasoning_mode 处理流式响应中的推理内容
+        """
+        reasoning_filter = getattr(self, "_reasoning_filter", None)
+        if reasoning_filter is None:
+            return super()._wrap_thinking_by_reasoning_content(delta, is_reasoning)
+        return reasoning_filter.wrap(delta, is_reasoning)
+
+    def _fit_context_window(
+        self,
+        model: str,
+        credentials: dict,
+        prompt_messages: list[PromptMessage],
+        model_parameters: dict,
+        tools: Optional[list[PromptMessageTool]] = None,
+    ) -> list[PromptMessage]:
+        """
+        按 context_size - max_tokens 预检提示词，并按配置的策略处理超长提示词
+
+        Args:
+            model: 模型名称
+            credentials: 认证信息
+            prompt_messages: 提示消息列表
+            model_parameters: 模型参数
+            tools: 工具列表（可选）
+
+        Returns:
+            处理后的提示消息列表
+        """
+        strategy = credentials.get("context_overflow_strategy") or STRATEGY_NONE
+        if strategy == STRATEGY_NONE:
+            return prompt_messages
+
+        model_schema = self.get_model_schema(model, credentials)
+        if not model_schema:
+            return prompt_messages
+
+        return fit_prompt_messages(
+            prompt_messages,
+            context_size=int(model_schema.model_properties.get(ModelPropertyKey.CONTEXT_SIZE) or 0),
+            max_tokens=model_parameters.get("max_tokens"),
+            strategy=strategy,
+            count_tokens=lambda messages: self.get_num_tokens(model, credentials, messages, tools),
+        )
 
     def validate_credentials(self, model: str, credentials: dict) -> None:
         """
@@ -58,9 +431,43 @@ class QiniuLargeLanguageModel(OAICompatLargeLanguageModel):
         
         # 对于自定义模型，model 参数已经是用户输入的模型名称
         # 不需要额外处理，直接使用即可
+
+        # 虚拟模型必须配置候选模型，使用其首个候选模型验证
+        if model == AUTO_MODEL:
+            candidates = select_models(parse_model_list(credentials.get("auto_routing_models")))
+            if not candidates:
+                raise CredentialsValidateFailedError(AUTO_MODELS_REQUIRED_MESSAGE)
+            model = candidates[0]
         
         super().validate_credentials(model, credentials)
 
+    @property
+    def _invoke_error_mapping(self) -> dict[type[InvokeError], list[type[Exception]]]:
+        """
+        在 OpenAI 兼容错误映射的基础上，保留插件内部主动抛出的请求错误类型
+        """
+        mapping = super()._invoke_error_mapping
+        mapping[InvokeBadRequestError] = [*mapping[InvokeBadRequestError], InvokeBadRequestError]
+        return mapping
+
+    @staticmethod
+    def _get_number_credential(credentials: dict, name: str, default: float) -> float:
+        """
+        读取数值类型的配置项，未填写或格式错误时使用默认值
+
+        Args:
+            credentials: 认证信息字典
+            name: 配置项名称
+            default: 默认值
+        """
+        value = credentials.get(name)
+        if value is None or value == "":
+            return default
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+
     @staticmethod
     def _add_custom_parameters(credentials: dict) -> None:
         """
@@ -0,0 +1,89 @@
+"""
+提示词缓存
+
+模型 YAML 中的 extra.prompt_cache 标记上游的提示词缓存方式：
+- explicit：需要在请求中用 cache_control 标记缓存断点（Claude 系列）
+- implicit：上游自动缓存相同前缀（DeepSeek、Qwen 系列），无需标记
+
+缓存命中的 token 数从响应 usage 中解析，见 models.llm.usage。
+"""
+
+from typing import Optional
+
+from dify_plugin.entities.model.message import PromptMessage, SystemPromptMessage, UserPromptMessage
+
+PROMPT_CACHE_EXPLICIT = "explicit"
+PROMPT_CACHE_IMPLICIT = "implicit"
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def get_cache_breakpoints(prompt_messages: list[PromptMessage]) -> list[PromptMessage]:
+    """
+    选择需要标记缓存断点的消息
+
+    标记最后一条系统消息（缓存静态的系统提示词）和最后一条用户消息（缓存到本轮为止的对话历史），
+    下一轮请求的前缀与本轮相同，可以命中缓存
+
+    Args:
+        prompt_messages: 提示消息列表
+
+    Returns:
+        需要标记的消息
+    """
+    breakpoints = []
+    for message_type in (SystemPromptMessage, UserPromptMessage):
+        last = next((message for message in reversed(prompt_messages) if isinstance(message, message_type)), None)
+        if last is not None and last.content:
+            breakpoints.append(last)
+    return breakpoints
+
+
+def add_cache_control(message_dict: dict) -> dict:
+    """
+    为请求中的单条消息添加 cache_control 标记
+
+    字符串内容转换为单个文本块，多段内容标记最后一个文本块
+
+    Args:
+        message_dict: OpenAI 格式的消息
+
+    Returns:
+        添加标记后的消息
+    """
+    content = message_dict.get("content")
+    if isinstance(content, str) and content:
+        return {**message_dict, "content": [{"type": "text", "text": content, "cache_control": CACHE_CONTROL}]}
+
+    if isinstance(content, list):
+        for index in range(len(content) - 1, -1, -1):
+            if content[index].get("type") == "text":
+                content = list(content)
+                content[index] = {**content[index], "cache_control": CACHE_CONTROL}
+                return {**message_dict, "content": content}
+    return message_dict
+
+
+def get_cached_tokens(usage: Optional[dict]) -> int:
+    """
+    从上游响应的 usage 中解析缓存命中的 token 数
+
+    兼容 OpenAI（prompt_tokens_details.cached_tokens）、DeepSeek（prompt_cache_hit_tokens）
+    和 Anthropic（cache_read_input_tokens）的字段
+
+    Args:
+        usage: 响应中的 usage 字典
+
+    Returns:
+        缓存命中的 token 数
+    """
+    if not usage:
+        return 0
+
+    details = usage.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens") or usage.get("cache_read_input_tokens")
+    try:
+        return max(int(cached or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
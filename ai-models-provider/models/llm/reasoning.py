@@ -0,0 +1,102 @@
+"""
+推理内容处理
+
+思考模型会以 reasoning_content 流式返回大量推理内容，SDK 默认用 <think> 标签包裹后逐条转发，
+并在内存中累积完整内容。reasoning_mode 决定推理内容的输出方式：
+- stream：逐条转发（SDK 默认行为）
+- collapse：不逐条转发，在回答开始时合并为一个 <think> 块发送
+- drop：丢弃推理内容
+- summarize_length：只输出推理内容的长度摘要
+
+推理 token 始终计入用量的 completion_tokens：上游未报告用量时，drop 和 summarize_length
+没有输出的推理内容按本地估算的 token 数补上。
+"""
+
+from typing import Optional
+
+from models.llm.tokenizer import DEFAULT_TOKENIZER_FAMILY, TokenizerFamily, count_text_tokens
+
+REASONING_STREAM = "stream"
+REASONING_COLLAPSE = "collapse"
+REASONING_DROP = "drop"
+REASONING_SUMMARIZE_LENGTH = "summarize_length"
+REASONING_MODES = (REASONING_STREAM, REASONING_COLLAPSE, REASONING_DROP, REASONING_SUMMARIZE_LENGTH)
+
+THINK_START = "<think>\n"
+THINK_END = "\n</think>"
+
+
+class ReasoningFilter:
+    """
+    按 reasoning_mode 处理单次流式响应中的推理内容
+
+    替代 SDK 的 _wrap_thinking_by_reasoning_content，每次请求使用一个实例
+    """
+
+    def __init__(self, mode: Optional[str] = None, family: TokenizerFamily = DEFAULT_TOKENIZER_FAMILY):
+        self.mode = mode if mode in REASONING_MODES else REASONING_STREAM
+        self.family = family
+        self.reasoning_chars = 0
+        self.estimated_tokens = 0
+        self._reasoning = False
+        self._parts: list[str] = []
+
+    @property
+    def hidden_tokens(self) -> int:
+        """没有出现在输出内容中的推理内容的估算 token 数"""
+        if self.mode in (REASONING_DROP, REASONING_SUMMARIZE_LENGTH):
+            return self.estimated_tokens
+        return 0
+
+    def wrap(self, delta: dict, is_reasoning: bool) -> tuple[str, bool]:
+        """
+        处理一条流式增量
+
+        Args:
+            delta: 上游响应中的 delta
+            is_reasoning: 上一条增量是否处于推理阶段
+
+        Returns:
+            (要输出的内容, 是否处于推理阶段)
+        """
+        content = delta.get("content") or ""
+        reasoning_content = delta.get("reasoning_content")
+
+        if reasoning_content:
+            self.reasoning_chars += len(reasoning_content)
+            self.estimated_tokens += count_text_tokens(reasoning_content, self.family)
+            self._reasoning = True
+            if self.mode == REASONING_STREAM:
+                return (reasoning_content if is_reasoning else THINK_START + reasoning_content), True
+            if self.mode == REASONING_COLLAPSE:
+                self._parts.append(reasoning_content)
+            return "", True
+
+        if not is_reasoning:
+            return content, False
+        return self.flush() + content, False
+
+    def flush(self) -> str:
+        """
+        结束推理阶段，返回需要补充输出的内容
+
+        Returns:
+            stream 模式为结束标签，collapse 模式为完整的推理块，
+            summarize_length 模式为长度摘要，drop 模式为空
+        """
+        if not self._reasoning:
+            return ""
+        self._reasoning = False
+
+        if self.mode == REASONING_STREAM:
+            return THINK_END
+        if self.mode == REASONING_COLLAPSE:
+            reasoning = "".join(self._parts)
+            self._parts = []
+            return THINK_START + reasoning + THINK_END
+        if self.mode == REASONING_SUMMARIZE_LENGTH:
+            return (
+                f"{THINK_START}[reasoning omitted: {self.reasoning_chars} characters, "
+                f"~{self.estimated_tokens} tokens]{THINK_END}"
+            )
+        return ""
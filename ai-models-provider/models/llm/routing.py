@@ -0,0 +1,185 @@
+"""
+自动路由
+
+qiniu-auto 是一个虚拟模型：每次请求在凭据中配置的候选模型里，根据所需能力（视觉、工具调用）、
+提示词长度筛选模型，再按路由目标排序：成本按模型 YAML 中的价格，延迟按运行时统计的延迟和错误率；
+调用失败时在同一候选列表内切换到下一个模型。
+
+延迟只来自运行时统计：没有统计或统计已过期的模型按最乐观的估计排在前面，保证每个候选模型
+都会被测量，并定期重新测量。
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from dify_plugin.entities.model import AIModelEntity
+from dify_plugin.errors.model import InvokeBadRequestError
+
+from models.llm.catalog import CatalogModel, query_models
+
+AUTO_MODEL = "qiniu-auto"
+AUTO_MODELS_REQUIRED_MESSAGE = "使用 qiniu-auto 需要在凭据中配置自动路由候选模型"
+
+# 路由目标
+OBJECTIVE_LATENCY = "latency"
+OBJECTIVE_COST = "cost"
+OBJECTIVE_QUALITY = "quality"
+ROUTING_OBJECTIVES = (OBJECTIVE_LATENCY, OBJECTIVE_COST, OBJECTIVE_QUALITY)
+
+# 单次请求最多尝试的模型数
+DEFAULT_MAX_ATTEMPTS = 3
+# 延迟和错误率的指数移动平均权重
+STATS_DECAY = 0.3
+# 模型失败后降低优先级的时间（秒）
+FAILURE_COOLDOWN = 30
+# 延迟统计的有效期（秒），过期后视为未测量，重新探测该模型
+STATS_TTL = 300
+# 这些状态码说明换一个模型可能成功（模型下线、超时、限流、服务端错误）
+RETRYABLE_STATUS_CODES = {404, 408, 429}
+
+
+@dataclass
+class ModelStats:
+    """单个模型的运行时统计"""
+
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    cooldown_until: float = 0.0
+    updated_at: float = 0.0
+
+
+class RoutingStats:
+    """
+    进程内共享的模型延迟和错误率统计
+
+    延迟为首个 chunk（流式）或完整响应（非流式）的耗时，单位毫秒
+    """
+
+    def __init__(self):
+        self._stats: dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str) -> ModelStats:
+        with self._lock:
+            stats = self._stats.get(model)
+            return ModelStats(**vars(stats)) if stats else ModelStats()
+
+    def record_success(self, model: str, latency: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(model, ModelStats())
+            stats.latency = latency if stats.latency is None else (1 - STATS_DECAY) * stats.latency + STATS_DECAY * latency
+            stats.error_rate *= 1 - STATS_DECAY
+            stats.updated_at = time.monotonic()
+
+    def record_failure(self, model: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(model, ModelStats())
+            stats.error_rate = (1 - STATS_DECAY) * stats.error_rate + STATS_DECAY
+            stats.cooldown_until = time.monotonic() + FAILURE_COOLDOWN
+
+
+routing_stats = RoutingStats()
+
+
+def parse_model_list(value: Optional[str]) -> list[str]:
+    """解析逗号或换行分隔的模型列表"""
+    return [item.strip() for item in re.split(r"[,\n]", value or "") if item.strip()]
+
+
+def _expected_latency(stats: ModelStats, now: float) -> Optional[float]:
+    """运行时统计的延迟，按错误率加权；没有统计或已过期时返回 None"""
+    if stats.latency is None or now - stats.updated_at > STATS_TTL:
+        return None
+    return stats.latency * (1 + 4 * stats.error_rate)
+
+
+def _total_price(model: CatalogModel) -> Optional[float]:
+    """每百万输入加输出 token 的价格，没有价格时返回 None"""
+    if model.input_price is None:
+        return None
+    return model.input_price + (model.output_price or 0.0)
+
+
+def select_models(
+    allowed_models: list[str],
+    schemas: list[AIModelEntity],
+    objective: str = OBJECTIVE_LATENCY,
+    features: Optional[list[str]] = None,
+    prompt_tokens: int = 0,
+    max_tokens: Optional[int] = None,
+    stats: RoutingStats = routing_stats,
+) -> list[str]:
+    """
+    为一次请求选择候选模型，按优先级排序
+
+    Args:
+        allowed_models: 允许路由到的模型及其质量优先顺序，为空时没有候选模型
+        schemas: 全部模型实体（predefined_models()），用于按能力、上下文长度和输出上限筛选
+        objective: 路由目标，见 ROUTING_OBJECTIVES
+        features: 必须支持的特性（可选）
+        prompt_tokens: 提示词 token 数
+        max_tokens: 本次请求的最大生成 token 数（可选）
+        stats: 运行时统计
+
+    Returns:
+        候选模型 ID 列表，正在冷却的模型排在最后；按延迟排序时，
+        未测量的模型按配置的顺序排在已测量的模型之前；按成本排序时，
+        没有价格的模型按配置的顺序排在有价格的模型之后
+    """
+    if objective not in ROUTING_OBJECTIVES:
+        objective = OBJECTIVE_LATENCY
+
+    priority = {model_id: index for index, model_id in enumerate(allowed_models) if model_id != AUTO_MODEL}
+    required_context = prompt_tokens + (max_tokens or 0)
+    candidates = sorted(
+        (
+            model
+            for model in query_models(schemas, features=features, min_context_size=required_context or None)
+            if model.model in priority
+            and (not max_tokens or not model.max_output_tokens or model.max_output_tokens >= max_tokens)
+        ),
+        key=lambda model: priority[model.model],
+    )
+
+    now = time.monotonic()
+    model_stats = {model.model: stats.get(model.model) for model in candidates}
+
+    def rank(model: CatalogModel) -> tuple:
+        current = model_stats[model.model]
+        cooling = current.cooldown_until > now
+        if objective == OBJECTIVE_COST:
+            price = _total_price(model)
+            return cooling, price is None, price or 0.0
+        if objective == OBJECTIVE_LATENCY:
+            latency = _expected_latency(current, now)
+            return cooling, latency is not None, latency or 0.0
+        # 质量：保持配置的优先顺序
+        return (cooling,)
+
+    return [model.model for model in sorted(candidates, key=rank)]
+
+
+def is_retryable_error(ex: Exception) -> bool:
+    """
+    判断换一个模型重试是否可能成功
+
+    Args:
+        ex: 调用模型时抛出的异常
+
+    Returns:
+        连接错误、超时、限流、模型不可用和服务端错误返回 True
+    """
+    if isinstance(ex, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(ex, InvokeBadRequestError):
+        return False
+
+    matched = re.search(r"status code (\d{3})", str(ex))
+    if not matched:
+        return False
+    status_code = int(matched.group(1))
+    return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
@@ -0,0 +1,318 @@
+"""
+请求合并（singleflight）
+
+扇出型工作流常在毫秒级时间内从多个并行分支或多个用户发起完全相同的请求。
+开启请求合并后，相同的进行中请求只向上游发起一次调用：
+非流式请求共享同一个结果，流式请求的 chunk 分发给所有订阅者。
+
+流式响应由订阅者按需从上游拉取，缓冲区只保留尚未被所有订阅者读取的 chunk，
+超过上限时最快的订阅者等待最慢的订阅者。缓冲区开始丢弃已读 chunk 后，
+新的相同请求无法再从头读取，会发起新的上游调用。
+"""
+
+import hashlib
+import json
+import threading
+from collections.abc import Callable, Generator, Iterator
+from typing import Any, Optional, Union
+
+from dify_plugin.entities.model.llm import LLMResult
+from dify_plugin.entities.model.message import PromptMessage, PromptMessageTool
+
+COALESCING_DISABLED = "disabled"
+COALESCING_DETERMINISTIC = "deterministic"
+COALESCING_ALL = "all"
+
+# 流式响应中尚未被所有订阅者读取的 chunk 数上限
+DEFAULT_MAX_BUFFERED_CHUNKS = 256
+
+
+def is_deterministic(model_parameters: dict) -> bool:
+    """
+    判断请求是否是确定性的（temperature 为 0），只有确定性请求的结果可以安全共享
+
+    Args:
+        model_parameters: 模型参数
+
+    Returns:
+        是否是确定性请求
+    """
+    try:
+        return float(model_parameters.get("temperature")) <= 0
+    except (TypeError, ValueError):
+        return False
+
+
+def should_coalesce(mode: Optional[str], model_parameters: dict) -> bool:
+    """
+    按配置的请求合并方式判断本次请求是否参与合并
+
+    Args:
+        mode: 请求合并方式
+        model_parameters: 模型参数
+
+    Returns:
+        是否参与合并
+    """
+    if mode == COALESCING_ALL:
+        return True
+    return mode == COALESCING_DETERMINISTIC and is_deterministic(model_parameters)
+
+
+def make_request_key(
+    model: str,
+    credentials: dict,
+    prompt_messages: list[PromptMessage],
+    model_parameters: dict,
+    tools: Optional[list[PromptMessageTool]] = None,
+    stop: Optional[list[str]] = None,
+    stream: bool = True,
+) -> str:
+    """
+    计算请求的合并键
+
+    认证信息参与计算，不同 API Key 或不同插件配置的请求不会合并；
+    user 不参与计算，不同用户的相同请求可以共享一次上游调用
+
+    Args:
+        model: 模型名称
+        credentials: 认证信息
+        prompt_messages: 提示消息列表
+        model_parameters: 模型参数
+        tools: 工具列表（可选）
+        stop: 停止词列表（可选）
+        stream: 是否流式返回
+
+    Returns:
+        合并键
+    """
+    payload = {
+        "model": model,
+        "credentials": credentials,
+        "messages": [message.model_dump(mode="json") for message in prompt_messages],
+        "parameters": model_parameters,
+        "tools": [tool.model_dump(mode="json") for tool in tools or []],
+        "stop": stop or [],
+        "stream": stream,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class _Flight:
+    """一次进行中的上游调用"""
+
+    def __init__(self, max_buffered_chunks: int):
+        self.max_buffered_chunks = max(max_buffered_chunks, 1)
+        self.condition = threading.Condition()
+        self.started = False
+        self.result: Optional[LLMResult] = None
+        self.error: Optional[BaseException] = None
+        self.upstream: Optional[Iterator] = None
+        # 流式响应状态：chunks[0] 是第 offset 个 chunk
+        self.chunks: list[Any] = []
+        self.offset = 0
+        self.pulling = False
+        self.done = False
+        self.cursors: dict[int, int] = {}
+        self.next_subscriber = 0
+
+    def wait_started(self) -> None:
+        with self.condition:
+            while not self.started:
+                self.condition.wait()
+
+    def start(self, result: Union[LLMResult, Iterator, None], error: Optional[BaseException] = None) -> None:
+        with self.condition:
+            if error is not None:
+                self.error = error
+                self.done = True
+            elif isinstance(result, LLMResult):
+                self.result = result
+                self.done = True
+            else:
+                self.upstream = result
+            self.started = True
+            self.condition.notify_all()
+
+    def subscribe(self) -> Optional[int]:
+        """注册订阅者，已经丢弃过 chunk 时返回 None"""
+        with self.condition:
+            if self.offset > 0:
+                return None
+            subscriber = self.next_subscriber
+            self.next_subscriber += 1
+            self.cursors[subscriber] = 0
+            return subscriber
+
+    def unsubscribe(self, subscriber: int) -> None:
+        with self.condition:
+            self.cursors.pop(subscriber, None)
+            self._trim()
+            upstream = self._abandon()
+            self.condition.notify_all()
+        self._close(upstream)
+
+    def _abandon(self) -> Optional[Iterator]:
+        """
+        所有订阅者都已离开时结束本次调用，需要在持有锁时调用
+
+        正在拉取时由拉取方在拉取结束后再检查
+
+        Returns:
+            需要关闭的上游迭代器，无需关闭时返回 None
+        """
+        if self.cursors or self.done or self.pulling:
+            return None
+        self.done = True
+        return self.upstream
+
+    @staticmethod
+    def _close(upstream: Optional[Iterator]) -> None:
+        """关闭上游连接，需要在释放锁后调用"""
+        if upstream is not None and hasattr(upstream, "close"):
+            upstream.close()
+
+    def _trim(self) -> None:
+        """丢弃所有订阅者都已读取的 chunk"""
+        if not self.cursors:
+            return
+        consumed = min(self.cursors.values()) - self.offset
+        if consumed > 0:
+            del self.chunks[:consumed]
+            self.offset += consumed
+
+    def _pull(self) -> None:
+        """从上游拉取一个 chunk，调用前需要已将 pulling 置为 True"""
+        chunk, finished, error = None, False, None
+        try:
+            chunk = next(self.upstream)
+        except StopIteration:
+            finished = True
+        except BaseException as ex:
+            finished, error = True, ex
+
+        with self.condition:
+            self.pulling = False
+            if finished:
+                self.done = True
+                self.error = error
+            else:
+                self.chunks.append(chunk)
+            # 拉取期间所有订阅者都已离开
+            upstream = self._abandon()
+            self.condition.notify_all()
+        self._close(upstream)
+
+    def read(self, subscriber: int) -> Generator:
+        """按订阅者的读取位置依次返回 chunk"""
+        try:
+            while True:
+                chunk, pull = None, False
+                with self.condition:
+                    while True:
+                        cursor = self.cursors[subscriber]
+                        if cursor < self.offset + len(self.chunks):
+                            chunk = self.chunks[cursor - self.offset]
+                            self.cursors[subscriber] = cursor + 1
+                            self._trim()
+                            self.condition.notify_all()
+                            break
+                        if self.done:
+                            if self.error is not None:
+                                raise self.error
+                            return
+                        if not self.pulling and len(self.chunks) < self.max_buffered_chunks:
+                            self.pulling = pull = True
+                            break
+                        self.condition.wait()
+
+                if pull:
+                    self._pull()
+                else:
+                    yield chunk
+        finally:
+            self.unsubscribe(subscriber)
+
+
+class SingleFlight:
+    """
+    合并相同的进行中请求
+    """
+
+    def __init__(self, max_buffered_chunks: int = DEFAULT_MAX_BUFFERED_CHUNKS):
+        self.max_buffered_chunks = max_buffered_chunks
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Union[LLMResult, Iterator]]) -> Union[LLMResult, Generator]:
+        """
+        执行请求，相同合并键的进行中请求共享 fn 的结果
+
+        fn 抛出的异常会传递给所有等待的请求
+
+        Args:
+            key: 合并键
+            fn: 发起上游调用的函数，返回 LLMResult 或 chunk 迭代器
+
+        Returns:
+            LLMResult 或 chunk 生成器
+        """
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight(self.max_buffered_chunks)
+
+            if leader:
+                return self._lead(key, flight, fn)
+
+            flight.wait_started()
+            if flight.error is not None and flight.upstream is None:
+                raise flight.error
+            if flight.result is not None:
+                return flight.result
+
+            subscriber = flight.subscribe()
+            if subscriber is not None:
+                return flight.read(subscriber)
+            # 已经无法从头读取，发起新的调用
+            self._forget(key, flight)
+
+    def _lead(self, key: str, flight: _Flight, fn: Callable[[], Union[LLMResult, Iterator]]):
+        try:
+            result = fn()
+        except BaseException as ex:
+            flight.start(None, ex)
+            self._forget(key, flight)
+            raise
+
+        if isinstance(result, LLMResult):
+            flight.start(result)
+            self._forget(key, flight)
+            return result
+
+        # 先注册发起者自己，避免其他订阅者读取后丢弃 chunk
+        subscriber = flight.subscribe()
+        flight.start(iter(result))
+        return self._read_and_forget(key, flight, subscriber)
+
+    def _read_and_forget(self, key: str, flight: _Flight, subscriber: int) -> Generator:
+        try:
+            yield from flight.read(subscriber)
+        finally:
+            self._forget(key, flight)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+# 插件进程内共享的请求合并器
+request_flights = SingleFlight()
@@ -0,0 +1,156 @@
+"""
+流式响应处理
+
+上游每个 SSE 增量都会变成一个 LLMResultChunk 经插件运行时 IPC 发送，
+高吞吐时单条消息的固定开销会成为插件守护进程的主要 CPU 消耗。
+开启合并（认证信息 stream_coalesce_window_ms > 0）后，把时间窗口内连续的纯文本增量合并成一个 chunk 再发送；
+默认不合并，保持上游的分块方式。
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Generator, Iterable
+
+from dify_plugin.entities.model.llm import LLMResultChunk
+from dify_plugin.entities.model.message import AssistantPromptMessage
+
+# 默认合并窗口（毫秒），0 表示不合并
+DEFAULT_COALESCE_WINDOW_MS = 0
+# 默认单个合并 chunk 的最大字符数
+DEFAULT_COALESCE_MAX_CHARS = 512
+# 读取线程最多预读的 chunk 数，调用方读得慢时读取线程等待，不再继续拉取上游
+READ_AHEAD_CHUNKS = 64
+# 队列已满时读取线程检查停止信号的间隔（秒）
+STOP_CHECK_INTERVAL = 0.1
+
+# 上游读取线程放入队列的结束标记
+_END = object()
+
+
+def _is_plain_text(chunk: LLMResultChunk) -> bool:
+    """只有纯文本增量可以合并，工具调用、结束原因和用量需要立即发送"""
+    delta = chunk.delta
+    return (
+        not delta.finish_reason
+        and delta.usage is None
+        and not delta.message.tool_calls
+        and isinstance(delta.message.content, str)
+    )
+
+
+def _merge(buffer: list[LLMResultChunk]) -> LLMResultChunk:
+    if len(buffer) == 1:
+        return buffer[0]
+
+    first = buffer[0]
+    content = "".join(chunk.delta.message.content for chunk in buffer)
+    return first.model_copy(
+        update={"delta": first.delta.model_copy(update={"message": AssistantPromptMessage(content=content)})}
+    )
+
+
+def _put(received: queue.Queue, item: object, stop: threading.Event) -> bool:
+    """
+    放入有界队列，队列已满时等待调用方读取
+
+    Returns:
+        是否放入；调用方已关闭（设置了停止信号）时返回 False
+    """
+    while not stop.is_set():
+        try:
+            received.put(item, timeout=STOP_CHECK_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _read_upstream(chunks: Iterable[LLMResultChunk], received: queue.Queue, stop: threading.Event) -> None:
+    """
+    在后台读取上游 chunk 放入队列，读取结束或出错后放入结束标记
+
+    队列有界，调用方读得慢时在这里等待；调用方关闭后停止读取并关闭上游
+    """
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if not _put(received, chunk, stop):
+                return
+        _put(received, _END, stop)
+    except BaseException as ex:
+        _put(received, ex, stop)
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def coalesce_stream(
+    chunks: Iterable[LLMResultChunk],
+    window_ms: float = DEFAULT_COALESCE_WINDOW_MS,
+    max_chars: int = DEFAULT_COALESCE_MAX_CHARS,
+) -> Generator[LLMResultChunk, None, None]:
+    """
+    合并连续的纯文本增量
+
+    在收到第一个待合并增量后的 window_ms 毫秒内，或累计字符数达到 max_chars 之前，
+    连续的纯文本增量会被合并为一个 chunk；遇到工具调用、结束原因或用量时先发送已缓冲的文本，
+    再立即发送该 chunk。上游在后台线程（插件运行时中为 greenlet）中读取，
+    窗口到期时即使上游暂时没有新的增量也会发送已缓冲的文本，缓冲时间不超过 window_ms。
+
+    Args:
+        chunks: 上游 chunk 序列
+        window_ms: 合并窗口（毫秒），<= 0 时不合并
+        max_chars: 单个合并 chunk 的最大字符数
+
+    Yields:
+        合并后的 chunk
+    """
+    if window_ms <= 0:
+        yield from chunks
+        return
+
+    window = window_ms / 1000
+    received: queue.Queue = queue.Queue(maxsize=READ_AHEAD_CHUNKS)
+    stop = threading.Event()
+    threading.Thread(target=_read_upstream, args=(chunks, received, stop), daemon=True).start()
+
+    buffer: list[LLMResultChunk] = []
+    buffered_chars = 0
+    deadline = 0.0
+    try:
+        while True:
+            try:
+                item = received.get(timeout=max(0.0, deadline - time.monotonic())) if buffer else received.get()
+            except queue.Empty:
+                # 窗口到期，上游还没有新的增量
+                yield _merge(buffer)
+                buffer, buffered_chars = [], 0
+                continue
+
+            if item is _END or isinstance(item, BaseException):
+                if buffer:
+                    yield _merge(buffer)
+                if item is not _END:
+                    raise item
+                return
+
+            if not _is_plain_text(item):
+                if buffer:
+                    yield _merge(buffer)
+                    buffer, buffered_chars = [], 0
+                yield item
+                continue
+
+            if not buffer:
+                deadline = time.monotonic() + window
+            buffer.append(item)
+            buffered_chars += len(item.delta.message.content)
+
+            if buffered_chars >= max_chars or time.monotonic() >= deadline:
+                yield _merge(buffer)
+                buffer, buffered_chars = [], 0
+    finally:
+        # 调用方提前关闭时通知读取线程停止
+        stop.set()
@@ -0,0 +1,225 @@
+"""
+七牛云模型本地 token 计数
+
+按模型家族选择分词方式，并对单条消息的计数结果做缓存：
+- GPT 家族优先使用 tiktoken（o200k_base），加载失败或加载中时退化为估算
+- DeepSeek、Qwen、GLM 等家族的词表未随插件分发，按固定的字符/token 比例估算；
+  比例是经验值，不是各家公布的数据，计数结果只是近似值
+- 每条消息按内容摘要缓存计数结果，对话每增加一条消息只需计算新增的那一条
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+from dify_plugin.entities.model.message import PromptMessageTool
+
+logger = logging.getLogger(__name__)
+
+# OpenAI 消息格式的固定开销（与 SDK 的估算口径保持一致）
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_NAME = 1
+TOKENS_PER_REPLY = 3
+
+# 消息计数缓存的最大条目数
+MESSAGE_CACHE_SIZE = 8192
+
+# CJK 统一表意文字、假名、谚文及全角标点
+CJK_PATTERN = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+class TokenizerFamily(NamedTuple):
+    """模型家族的分词参数"""
+
+    name: str
+    # 可用时使用的 tiktoken 编码，None 表示直接估算
+    encoding: Optional[str]
+    # 估算时每个 CJK 字符约等于的 token 数（经验值）
+    cjk_tokens_per_char: float
+    # 估算时每个 token 约等于的非 CJK 字符数（经验值）
+    chars_per_token: float
+
+
+# 按顺序匹配模型 ID 中的关键字，先匹配到的家族生效
+TOKENIZER_FAMILIES: list[tuple[tuple[str, ...], TokenizerFamily]] = [
+    (("gpt", "openai/"), TokenizerFamily("gpt", "o200k_base", 0.7, 4.0)),
+    (("deepseek",), TokenizerFamily("deepseek", None, 0.6, 3.3)),
+    (("qwen",), TokenizerFamily("qwen", None, 0.65, 3.8)),
+    (("glm",), TokenizerFamily("glm", None, 0.6, 3.6)),
+    (("kimi", "moonshot"), TokenizerFamily("kimi", None, 0.6, 3.6)),
+    (("claude", "anthropic/"), TokenizerFamily("claude", None, 1.0, 3.5)),
+    (("gemini", "google/"), TokenizerFamily("gemini", None, 0.8, 4.0)),
+    (("doubao", "bytedance/"), TokenizerFamily("doubao", None, 0.6, 3.6)),
+    (("minimax",), TokenizerFamily("minimax", None, 0.6, 3.6)),
+    (("grok", "x-ai/"), TokenizerFamily("grok", None, 0.8, 3.8)),
+]
+DEFAULT_TOKENIZER_FAMILY = TokenizerFamily("default", None, 1.0, 3.5)
+
+_encodings: dict[str, Any] = {}
+# 正在加载的编码名称
+_encodings_loading: set[str] = set()
+_encodings_lock = threading.Lock()
+
+_message_cache: "OrderedDict[tuple[str, bytes], int]" = OrderedDict()
+_message_cache_lock = threading.Lock()
+
+
+def get_tokenizer_family(model: str) -> TokenizerFamily:
+    """
+    根据模型 ID 选择分词家族
+
+    Args:
+        model: 模型 ID，例如 deepseek/deepseek-v4-pro
+
+    Returns:
+        匹配到的分词家族，未匹配时返回默认家族
+    """
+    model_id = (model or "").lower()
+    for keywords, family in TOKENIZER_FAMILIES:
+        if any(keyword in model_id for keyword in keywords):
+            return family
+    return DEFAULT_TOKENIZER_FAMILY
+
+
+def _get_encoding(name: str) -> Any:
+    """
+    加载 tiktoken 编码，结果（包括加载失败）只计算一次
+
+    tiktoken 首次使用可能需要下载词表：加载在锁外进行，只有第一个调用方加载，
+    加载完成前其他调用方直接返回 None 改用估算，不会阻塞在网络上；
+    离线环境下加载失败后不再重试。
+
+    Returns:
+        编码，加载中或加载失败时为 None
+    """
+    with _encodings_lock:
+        if name in _encodings:
+            return _encodings[name]
+        if name in _encodings_loading:
+            return None
+        _encodings_loading.add(name)
+
+    encoding = None
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(name)
+    except Exception as ex:
+        logger.warning(f"tiktoken 编码 {name} 加载失败，改用估算: {ex}")
+    finally:
+        with _encodings_lock:
+            _encodings[name] = encoding
+            _encodings_loading.discard(name)
+    return encoding
+
+
+def count_text_tokens(text: str, family: TokenizerFamily) -> int:
+    """
+    计算一段文本的 token 数：有可用的 tiktoken 编码时精确计数，否则按家族的比例估算
+
+    Args:
+        text: 文本
+        family: 分词家族
+
+    Returns:
+        token 数
+    """
+    if not text:
+        return 0
+
+    if family.encoding:
+        encoding = _get_encoding(family.encoding)
+        if encoding is not None:
+            return len(encoding.encode_ordinary(text))
+
+    cjk_chars = len(CJK_PATTERN.findall(text))
+    other_chars = len(text) - cjk_chars
+    return int(cjk_chars * family.cjk_tokens_per_char + other_chars / family.chars_per_token + 0.5)
+
+
+def _message_parts(message: dict) -> tuple[list[str], bool]:
+    """
+    提取 OpenAI 格式消息中参与计数的文本片段
+
+    图片等非文本内容不计入（与 SDK 口径一致）。
+
+    Returns:
+        (文本片段列表, 是否带有 name 字段)
+    """
+    parts: list[str] = []
+    for key, value in message.items():
+        if key == "tool_calls":
+            for tool_call in value or []:
+                for t_key, t_value in tool_call.items():
+                    parts.append(t_key)
+                    if t_key == "function":
+                        for f_key, f_value in (t_value or {}).items():
+                            parts.append(f_key)
+                            parts.append(str(f_value or ""))
+                    else:
+                        parts.append(str(t_value or ""))
+        elif isinstance(value, list):
+            parts.append("".join(item["text"] for item in value if isinstance(item, dict) and item.get("type") == "text"))
+        else:
+            parts.append(str(value))
+    return parts, "name" in message
+
+
+def count_message_tokens(message: dict, family: TokenizerFamily) -> int:
+    """
+    计算单条 OpenAI 格式消息的 token 数，按内容摘要缓存
+
+    Args:
+        message: 已转换为 OpenAI 格式的消息字典
+        family: 分词家族
+
+    Returns:
+        token 数（含消息固定开销）
+    """
+    parts, has_name = _message_parts(message)
+    digest = hashlib.blake2b("\x00".join(parts).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    cache_key = (family.name, digest)
+
+    with _message_cache_lock:
+        cached = _message_cache.get(cache_key)
+        if cached is not None:
+            _message_cache.move_to_end(cache_key)
+            return cached
+
+    num_tokens = TOKENS_PER_MESSAGE + sum(count_text_tokens(part, family) for part in parts)
+    if has_name:
+        num_tokens += TOKENS_PER_NAME
+
+    with _message_cache_lock:
+        _message_cache[cache_key] = num_tokens
+        if len(_message_cache) > MESSAGE_CACHE_SIZE:
+            _message_cache.popitem(last=False)
+
+    return num_tokens
+
+
+def count_tools_tokens(tools: list[PromptMessageTool], family: TokenizerFamily) -> int:
+    """
+    计算工具定义的 token 数，工具定义同样按内容摘要缓存
+
+    Args:
+        tools: 工具列表
+        family: 分词家族
+
+    Returns:
+        token 数
+    """
+    num_tokens = 0
+    for tool in tools:
+        definition = {
+            "type": "function",
+            "function": {"name": tool.name, "description": tool.description, "parameters": tool.parameters},
+        }
+        num_tokens += count_message_tokens(
+            {"tool": json.dumps(definition, ensure_ascii=False, sort_keys=True)}, family
+        ) - TOKENS_PER_MESSAGE
+    return num_tokens
@@ -0,0 +1,112 @@
+"""
+用量统计
+
+Dify 按声明的 LLMUsage 类型序列化用量，无法附加额外字段。上游响应中的提示词缓存命中和
+推理 token 数在这里解析，并记录到插件日志中；缓存命中的 token 已包含在 prompt_tokens 中。
+模型配置了缓存命中价格（extra.cached_input_price）时，提示词费用中缓存命中的部分按该价格重新计算。
+"""
+
+import logging
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, NamedTuple, Optional
+
+from dify_plugin.entities.model.llm import LLMUsage
+
+from models.llm.prompt_cache import get_cached_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class UsageDetails(NamedTuple):
+    """LLMUsage 之外的用量明细"""
+
+    prompt_cached_tokens: int
+    prompt_uncached_tokens: int
+    reasoning_tokens: int
+
+
+def get_reasoning_tokens(usage: Optional[dict]) -> int:
+    """
+    从上游响应的 usage 中解析推理 token 数（completion_tokens_details.reasoning_tokens）
+
+    Args:
+        usage: 响应中的 usage 字典
+
+    Returns:
+        推理 token 数，未提供时返回 0
+    """
+    details = (usage or {}).get("completion_tokens_details") or {}
+    try:
+        return max(int(details.get("reasoning_tokens") or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_usage_details(usage: LLMUsage, raw_usage: Optional[dict], estimated_reasoning_tokens: int = 0) -> UsageDetails:
+    """
+    解析缓存命中、未命中的提示词 token 数和推理 token 数
+
+    Args:
+        usage: SDK 计算出的用量
+        raw_usage: 上游响应中的 usage 字典
+        estimated_reasoning_tokens: 本地估算的推理 token 数，上游未提供时使用
+
+    Returns:
+        用量明细
+    """
+    cached = min(get_cached_tokens(raw_usage), usage.prompt_tokens)
+    return UsageDetails(
+        prompt_cached_tokens=cached,
+        prompt_uncached_tokens=usage.prompt_tokens - cached,
+        reasoning_tokens=get_reasoning_tokens(raw_usage) or estimated_reasoning_tokens,
+    )
+
+
+def apply_cached_price(usage: LLMUsage, cached_tokens: int, cached_unit_price: Any) -> LLMUsage:
+    """
+    按缓存命中价格重新计算提示词费用和总费用
+
+    Args:
+        usage: SDK 按输入价格计算出的用量
+        cached_tokens: 缓存命中的提示词 token 数
+        cached_unit_price: 缓存命中价格，与 pricing.input 使用相同的计价单位
+
+    Returns:
+        新的用量；没有缓存命中、没有配置价格或模型没有定价时返回原用量
+    """
+    if not cached_tokens or cached_unit_price is None or not usage.prompt_price_unit:
+        return usage
+    try:
+        cached_unit_price = Decimal(str(cached_unit_price))
+    except InvalidOperation:
+        logger.warning(f"缓存命中价格无效: {cached_unit_price}")
+        return usage
+
+    uncached_tokens = usage.prompt_tokens - cached_tokens
+    prompt_price = (uncached_tokens * usage.prompt_unit_price + cached_tokens * cached_unit_price) * usage.prompt_price_unit
+    prompt_price = prompt_price.quantize(Decimal("0.0000001"), rounding=ROUND_HALF_UP)
+    return usage.model_copy(update={"prompt_price": prompt_price, "total_price": prompt_price + usage.completion_price})
+
+
+def log_usage(
+    model: str, usage: LLMUsage, raw_usage: Optional[dict], estimated_reasoning_tokens: int = 0
+) -> UsageDetails:
+    """
+    记录一次请求的用量明细
+
+    Args:
+        model: 模型名称
+        usage: SDK 计算出的用量
+        raw_usage: 上游响应中的 usage 字典
+        estimated_reasoning_tokens: 本地估算的推理 token 数，上游未提供时使用
+
+    Returns:
+        用量明细
+    """
+    details = get_usage_details(usage, raw_usage, estimated_reasoning_tokens)
+    logger.info(
+        f"{model} 用量: 提示词 {usage.prompt_tokens} tokens（缓存命中 {details.prompt_cached_tokens}，"
+        f"未命中 {details.prompt_uncached_tokens}），输出 {usage.completion_tokens} tokens"
+        f"（推理 {details.reasoning_tokens}）"
+    )
+    return details
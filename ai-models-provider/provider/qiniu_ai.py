@@ -1,15 +1,83 @@
+import hashlib
 import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urljoin
+
+import requests
+import yaml
 from dify_plugin.entities.model import ModelType
 from dify_plugin.errors.model import CredentialsValidateFailedError
 from dify_plugin import ModelProvider
+from yarl import URL
+
+from models.llm.routing import AUTO_MODEL
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_ENDPOINT_URL = "https://openai.qiniu.com/v1"
+
+# 认证成功结果的缓存有效期（秒）
+VALIDATION_CACHE_TTL = 600
+# 缓存的认证结果和 endpoint 数上限，超出时淘汰最久未使用的
+VALIDATION_CACHE_SIZE = 256
+MODELS_AUTH_CACHE_SIZE = 64
+# 补全验证优先使用的模型（与最初的实现一致），不在当前模型列表中时使用列表中第一个具体模型
+PREFERRED_VALIDATION_MODEL = "deepseek-v3"
+POSITION_FILE = Path(__file__).parent.parent / "models" / "llm" / "_position.yaml"
+
+_validation_cache: "OrderedDict[tuple[str, str], float]" = OrderedDict()
+# 各 endpoint 的 /models 接口是否校验 API Key：endpoint -> (是否校验, 过期时间)
+_models_auth_cache: "OrderedDict[str, tuple[bool, float]]" = OrderedDict()
+_validation_cache_lock = threading.Lock()
+_validation_model: Optional[str] = None
+
+
+def get_validation_model() -> str:
+    """
+    补全验证使用的模型，从 _position.yaml 中选择，首次调用后缓存
+
+    模型列表会随每日同步增删，不能固定某个模型：优先使用 PREFERRED_VALIDATION_MODEL，
+    已下线时使用列表中第一个有配置文件的具体模型（跳过 qiniu-auto 虚拟模型）
+
+    Returns:
+        模型 ID
+
+    Raises:
+        CredentialsValidateFailedError: 模型列表中没有可用的具体模型
+    """
+    global _validation_model
+    if _validation_model is not None:
+        return _validation_model
+
+    with open(POSITION_FILE, "r", encoding="utf-8") as f:
+        position = yaml.safe_load(f) or []
+    models = [
+        model for model in position
+        if model != AUTO_MODEL and (POSITION_FILE.parent / f"{model}.yaml").exists()
+    ]
+    if not models:
+        raise CredentialsValidateFailedError("模型列表中没有可用于验证认证信息的模型")
+    _validation_model = PREFERRED_VALIDATION_MODEL if PREFERRED_VALIDATION_MODEL in models else models[0]
+    return _validation_model
+
+
+def _cache_put(cache: OrderedDict, key, value, max_size: int) -> None:
+    """写入 LRU 缓存，调用方需持有 _validation_cache_lock"""
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > max_size:
+        cache.popitem(last=False)
+
 
 class QiniuProvider(ModelProvider):
     """
     七牛云 AI 模型提供商实现类
-    
+
     提供七牛云 AI 模型的接入能力，支持多种大语言模型
     """
 
@@ -18,18 +86,115 @@ class QiniuProvider(ModelProvider):
         验证供应商认证信息
         如果验证失败，会抛出异常
 
+        优先请求轻量的 GET /models 接口：只有确认该接口会拒绝无效的 API Key 时才信任它的 200 响应，
+        否则退化为对模型列表中具体模型的 1 token 补全请求（见 get_validation_model）；
+        验证成功的结果按 (endpoint, api_key 摘要) 缓存 VALIDATION_CACHE_TTL 秒，最多缓存 VALIDATION_CACHE_SIZE 个
+
         Args:
             credentials: 供应商认证信息，格式由 `provider_credential_schema` 定义
 
         Raises:
             CredentialsValidateFailedError: 认证验证失败
         """
+        endpoint_url = str(URL(credentials.get("endpoint_url") or DEFAULT_ENDPOINT_URL))
+        api_key = credentials.get("api_key") or ""
+        cache_key = (endpoint_url, hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+
+        with _validation_cache_lock:
+            expires_at = _validation_cache.get(cache_key)
+            if expires_at:
+                _validation_cache.move_to_end(cache_key)
+        if expires_at and expires_at > time.monotonic():
+            return
+
         try:
-            model_instance = self.get_model_instance(ModelType.LLM)
-            # 使用 deepseek-v3 作为默认验证模型
-            model_instance.validate_credentials(model="deepseek-v3", credentials=credentials)
+            if not self._validate_by_models_endpoint(endpoint_url, api_key):
+                self._validate_by_completion(credentials)
         except CredentialsValidateFailedError as ex:
             raise ex
         except Exception as ex:
             logger.exception(f"{self.get_provider_schema().provider} credentials validate failed")
             raise ex
+
+        with _validation_cache_lock:
+            _cache_put(_validation_cache, cache_key, time.monotonic() + VALIDATION_CACHE_TTL, VALIDATION_CACHE_SIZE)
+
+    @staticmethod
+    def _models_endpoint_enforces_auth(models_url: str) -> bool:
+        """
+        用随机生成的无效 API Key 请求 /models，确认接口会校验 API Key，结果按 endpoint 缓存
+
+        公开的模型列表接口对任何 API Key 都返回 200，不能用来验证认证信息
+
+        Args:
+            models_url: /models 接口地址
+
+        Returns:
+            无效的 API Key 被拒绝（401/403）时返回 True
+        """
+        with _validation_cache_lock:
+            cached = _models_auth_cache.get(models_url)
+            if cached:
+                _models_auth_cache.move_to_end(models_url)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        try:
+            response = requests.get(
+                models_url, headers={"Authorization": f"Bearer invalid-{uuid.uuid4().hex}"}, timeout=(10, 30)
+            )
+        except requests.RequestException as ex:
+            logger.warning(f"请求 {models_url} 失败，无法确认接口是否校验 API Key: {ex}")
+            return False
+
+        enforces_auth = response.status_code in (401, 403)
+        if not enforces_auth:
+            logger.warning(f"{models_url} 未拒绝无效的 API Key（HTTP {response.status_code}），改用补全接口验证")
+        with _validation_cache_lock:
+            _cache_put(
+                _models_auth_cache, models_url, (enforces_auth, time.monotonic() + VALIDATION_CACHE_TTL),
+                MODELS_AUTH_CACHE_SIZE,
+            )
+        return enforces_auth
+
+    @classmethod
+    def _validate_by_models_endpoint(cls, endpoint_url: str, api_key: str) -> bool:
+        """
+        通过 GET /models 验证认证信息
+
+        Args:
+            endpoint_url: API 地址
+            api_key: API Key
+
+        Returns:
+            验证通过返回 True；接口不可用、不校验 API Key 或无法判断时返回 False
+
+        Raises:
+            CredentialsValidateFailedError: API Key 被拒绝
+        """
+        models_url = urljoin(endpoint_url.rstrip("/") + "/", "models")
+        try:
+            response = requests.get(models_url, headers={"Authorization": f"Bearer {api_key}"}, timeout=(10, 30))
+        except requests.RequestException as ex:
+            logger.warning(f"请求 {models_url} 失败，改用补全接口验证: {ex}")
+            return False
+
+        if response.status_code in (401, 403):
+            raise CredentialsValidateFailedError(
+                f"Credentials validation failed with status code {response.status_code} "
+                f"and response body {response.text}"
+            )
+        return response.status_code == 200 and cls._models_endpoint_enforces_auth(models_url)
+
+    def _validate_by_completion(self, credentials: dict) -> None:
+        """
+        使用模型列表中的具体模型发起 1 token 补全请求验证认证信息
+
+        Args:
+            credentials: 供应商认证信息
+        """
+        model_instance = self.get_model_instance(ModelType.LLM)
+        model_instance.validate_credentials(
+            model=get_validation_model(),
+            credentials={**credentials, "validate_credentials_max_tokens": 1},
+        )
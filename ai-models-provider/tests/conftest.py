@@ -0,0 +1,46 @@
+"""
+测试公共配置
+
+测试从插件目录运行（python -m pytest tests），插件代码按 models.llm.xxx 导入
+"""
+
+import sys
+from functools import cache
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+
+if str(PLUGIN_DIR) not in sys.path:
+    sys.path.insert(0, str(PLUGIN_DIR))
+
+
+def model_entity(model, features=(), context_size=None, max_output_tokens=None, pricing=None):
+    """构造一个最小的 LLM 模型实体，字段与模型 YAML 一致，pricing 为 (输入, 输出) 每百万 token 价格"""
+    from dify_plugin.entities.model import AIModelEntity
+
+    config = {
+        "model": model,
+        "label": {"en_US": model, "zh_Hans": model},
+        "model_type": "llm",
+        "features": list(features),
+        "model_properties": {"mode": "chat"},
+        "parameter_rules": [{"name": "max_tokens", "use_template": "max_tokens", "max": max_output_tokens}],
+    }
+    if context_size:
+        config["model_properties"]["context_size"] = context_size
+    if pricing:
+        config["pricing"] = {"input": pricing[0], "output": pricing[1], "unit": "0.000001", "currency": "USD"}
+    return AIModelEntity.model_validate(config)
+
+
+@cache
+def load_model_schemas():
+    """与 SDK 启动时相同，把 models/llm 下的模型 YAML 解析为模型实体"""
+    import yaml
+    from dify_plugin.entities.model import AIModelEntity
+
+    schemas = []
+    for path in sorted((PLUGIN_DIR / "models" / "llm").glob("*.yaml")):
+        if path.name != "_position.yaml":
+            schemas.append(AIModelEntity(**yaml.safe_load(path.read_text(encoding="utf-8"))))
+    return schemas
@@ -0,0 +1,85 @@
+import pytest
+
+from models.llm import catalog
+from tests.conftest import model_entity
+
+MODELS = [
+    model_entity("long", features=["tool-call"], context_size=1000000, max_output_tokens=8192, pricing=("3", "15")),
+    model_entity("vision", features=["vision"], context_size=128000, max_output_tokens=32000, pricing=("0.5", "2")),
+    model_entity("small", context_size=8000, pricing=("0.1", None)),
+    model_entity("unknown"),
+]
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    """把模型目录指向临时目录，并清空 extra 缓存"""
+    monkeypatch.setattr(catalog, "MODELS_DIR", tmp_path)
+    monkeypatch.setattr(catalog, "_extras", {})
+    return tmp_path
+
+
+def test_extra_is_read_once_and_cached(models_dir):
+    path = models_dir / "vision.yaml"
+    path.write_text("model: vision\nextra:\n  prompt_cache: explicit\n", encoding="utf-8")
+    assert catalog.get_model_extra("vision") == {"prompt_cache": "explicit"}
+    path.write_text("model: vision\n", encoding="utf-8")
+    assert catalog.get_model_extra("vision") == {"prompt_cache": "explicit"}
+
+
+@pytest.mark.parametrize("model", ["missing", "../vision", "broken"])
+def test_missing_or_unreadable_extra_is_empty(models_dir, model):
+    (models_dir / "broken.yaml").write_text("extra: [", encoding="utf-8")
+    (models_dir.parent / "vision.yaml").write_text("extra:\n  prompt_cache: explicit\n", encoding="utf-8")
+    assert catalog.get_model_extra(model) == {}
+
+
+def test_shipped_model_extra():
+    assert catalog.get_model_extra("claude-4.5-sonnet")["prompt_cache"] == "explicit"
+
+
+def test_query_keeps_input_order():
+    assert [summary.model for summary in catalog.query_models(MODELS)] == ["long", "vision", "small", "unknown"]
+
+
+def test_query_filters_by_features_and_context():
+    assert [summary.model for summary in catalog.query_models(MODELS, features=["vision"])] == ["vision"]
+    # 缺少上下文长度的模型在设置了下限时被排除
+    assert [summary.model for summary in catalog.query_models(MODELS, min_context_size=100000)] == ["long", "vision"]
+
+
+def test_query_sorts_with_missing_values_last():
+    ranked = catalog.query_models(reversed(MODELS), sort_by="context_size")
+    assert [summary.model for summary in ranked] == ["long", "vision", "small", "unknown"]
+    assert ranked[1].features == ("vision",) and ranked[1].context_size == 128000
+
+
+def test_summary_has_output_limit_and_price_per_million_tokens():
+    summary = catalog.summarize(MODELS[1])
+    assert summary.max_output_tokens == 32000
+    assert summary.input_price == 0.5 and summary.output_price == 2.0 and summary.currency == "USD"
+    assert catalog.summarize(MODELS[2]).output_price is None
+    assert catalog.summarize(MODELS[3])[3:] == (None, None, None, None)
+
+
+def test_query_filters_by_output_limit_and_price():
+    assert [summary.model for summary in catalog.query_models(MODELS, min_output_tokens=16000)] == ["vision"]
+    assert [summary.model for summary in catalog.query_models(MODELS, max_input_price=1)] == ["vision", "small"]
+    assert [summary.model for summary in catalog.query_models(MODELS, max_output_price=5)] == ["vision"]
+
+
+@pytest.mark.parametrize(
+    "sort_by, expected",
+    [
+        ("input_price", ["small", "vision", "long", "unknown"]),
+        ("output_price", ["vision", "long", "small", "unknown"]),
+        ("max_output_tokens", ["vision", "long", "small", "unknown"]),
+    ],
+)
+def test_query_sorts_by_output_limit_and_price(sort_by, expected):
+    assert [summary.model for summary in catalog.query_models(MODELS, sort_by=sort_by)] == expected
+
+
+def test_query_rejects_unknown_sort_field():
+    with pytest.raises(ValueError):
+        catalog.query_models(MODELS, sort_by="popularity")
@@ -0,0 +1,108 @@
+import pytest
+from dify_plugin.entities.model.message import (
+    AssistantPromptMessage,
+    SystemPromptMessage,
+    ToolPromptMessage,
+    UserPromptMessage,
+)
+from dify_plugin.errors.model import InvokeBadRequestError
+
+from models.llm.context_window import (
+    STRATEGY_DROP_OLDEST,
+    STRATEGY_NONE,
+    STRATEGY_REJECT,
+    STRATEGY_TRUNCATE_TOOL_OUTPUTS,
+    TRUNCATED_MARKER,
+    fit_prompt_messages,
+)
+
+
+def count_chars(messages):
+    """一个字符记为一个 token"""
+    return sum(len(message.content or "") for message in messages)
+
+
+def conversation():
+    return [
+        SystemPromptMessage(content="s" * 10),
+        UserPromptMessage(content="u" * 20),
+        AssistantPromptMessage(content="a" * 20),
+        UserPromptMessage(content="u" * 20),
+        AssistantPromptMessage(content="a" * 20),
+        UserPromptMessage(content="q" * 10),
+    ]
+
+
+def test_fitting_prompt_is_returned_unchanged():
+    messages = conversation()
+    assert fit_prompt_messages(messages, 1000, 100, STRATEGY_REJECT, count_chars) is messages
+
+
+def test_none_strategy_and_unknown_context_skip_the_check():
+    messages = conversation()
+    assert fit_prompt_messages(messages, 10, 0, STRATEGY_NONE, count_chars) is messages
+    assert fit_prompt_messages(messages, None, 0, STRATEGY_REJECT, count_chars) is messages
+
+
+def test_reject_raises_when_prompt_exceeds_context_minus_max_tokens():
+    with pytest.raises(InvokeBadRequestError):
+        fit_prompt_messages(conversation(), 140, 50, STRATEGY_REJECT, count_chars)
+
+
+def test_drop_oldest_keeps_system_message_and_last_turn():
+    fitted = fit_prompt_messages(conversation(), 100, 40, STRATEGY_DROP_OLDEST, count_chars)
+    assert isinstance(fitted[0], SystemPromptMessage)
+    assert [message.content for message in fitted[1:]] == ["u" * 20, "a" * 20, "q" * 10]
+    assert count_chars(fitted) <= 60
+
+
+def test_drop_oldest_raises_when_last_turn_does_not_fit():
+    with pytest.raises(InvokeBadRequestError):
+        fit_prompt_messages(conversation(), 15, 0, STRATEGY_DROP_OLDEST, count_chars)
+
+
+def test_truncate_tool_outputs_shortens_longest_tool_result():
+    messages = [
+        UserPromptMessage(content="u" * 10),
+        ToolPromptMessage(content="x" * 200, tool_call_id="1"),
+        ToolPromptMessage(content="y" * 20, tool_call_id="2"),
+    ]
+    fitted = fit_prompt_messages(messages, 150, 0, STRATEGY_TRUNCATE_TOOL_OUTPUTS, count_chars)
+    assert fitted[1].content.endswith(TRUNCATED_MARKER)
+    assert fitted[2].content == "y" * 20
+    assert count_chars(fitted) <= 150
+    # 原消息不被修改
+    assert messages[1].content == "x" * 200
+
+
+def test_drop_oldest_keeps_mid_conversation_system_message_in_place():
+    messages = conversation()
+    messages.insert(3, SystemPromptMessage(content="m" * 5))
+    fitted = fit_prompt_messages(messages, 100, 30, STRATEGY_DROP_OLDEST, count_chars)
+    # 中间的系统消息与其后的用户消息同属一轮，保留时位置不变
+    assert [message.content for message in fitted] == ["s" * 10, "m" * 5, "u" * 20, "a" * 20, "q" * 10]
+
+
+def test_truncate_tool_outputs_keeps_truncating_until_prompt_fits():
+    messages = [
+        UserPromptMessage(content="u" * 10),
+        ToolPromptMessage(content="x" * 100, tool_call_id="1"),
+        ToolPromptMessage(content="y" * 100, tool_call_id="2"),
+    ]
+    fitted = fit_prompt_messages(messages, 80, 0, STRATEGY_TRUNCATE_TOOL_OUTPUTS, count_chars)
+    assert all(message.content.endswith(TRUNCATED_MARKER) for message in fitted[1:])
+    assert count_chars(fitted) <= 80
+
+
+def test_truncate_tool_outputs_falls_back_to_dropping_oldest_turns():
+    messages = [
+        SystemPromptMessage(content="s" * 10),
+        UserPromptMessage(content="u" * 60),
+        AssistantPromptMessage(content="a" * 60),
+        UserPromptMessage(content="q" * 10),
+        ToolPromptMessage(content="x" * 100, tool_call_id="1"),
+    ]
+    fitted = fit_prompt_messages(messages, 50, 0, STRATEGY_TRUNCATE_TOOL_OUTPUTS, count_chars)
+    assert [type(message) for message in fitted] == [SystemPromptMessage, UserPromptMessage, ToolPromptMessage]
+    assert fitted[2].content.endswith(TRUNCATED_MARKER)
+    assert count_chars(fitted) <= 50
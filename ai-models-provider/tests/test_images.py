@@ -0,0 +1,120 @@
+import base64
+import io
+
+import pytest
+from dify_plugin.entities.model.message import (
+    ImagePromptMessageContent,
+    TextPromptMessageContent,
+    UserPromptMessage,
+)
+from PIL import Image
+
+from models.llm import images
+from models.llm.images import (
+    DEFAULT_MAX_IMAGE_SIDE,
+    get_max_image_side,
+    preprocess_image,
+    preprocess_prompt_images,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(images, "_cache", images.OrderedDict())
+    monkeypatch.setattr(images, "_cache_bytes", 0)
+
+
+def encode(size, mode="RGB", image_format="PNG"):
+    """生成带噪点的图片，避免被压缩得过小；RGBA 图片为半透明"""
+    image = Image.effect_noise(size, 64).convert(mode)
+    if mode == "RGBA":
+        image.putalpha(128)
+    output = io.BytesIO()
+    image.save(output, format=image_format)
+    return base64.b64encode(output.getvalue()).decode("ascii")
+
+
+def image_content(data, mime_type="image/png"):
+    return ImagePromptMessageContent(format=mime_type.split("/")[1], mime_type=mime_type, base64_data=data)
+
+
+def decode(content):
+    return Image.open(io.BytesIO(base64.b64decode(content.base64_data)))
+
+
+def test_max_image_side_by_model_and_catalog():
+    assert get_max_image_side("anthropic/claude-4.5-sonnet") == 1568
+    assert get_max_image_side("google/gemini-2.5-pro") == 3072
+    assert get_max_image_side("deepseek-v3") == DEFAULT_MAX_IMAGE_SIDE
+    assert get_max_image_side("anthropic/claude-4.5-sonnet", {"max_image_side": 1024}) == 1024
+
+
+def test_large_image_is_downscaled_to_jpeg():
+    result = preprocess_image(image_content(encode((1200, 600))), 400)
+    assert result.mime_type == "image/jpeg"
+    assert result.format == "jpeg"
+    assert result.url == ""
+    assert decode(result).size == (400, 200)
+
+
+def test_transparent_image_is_encoded_as_webp():
+    result = preprocess_image(image_content(encode((800, 800), mode="RGBA")), 200)
+    assert result.mime_type == "image/webp"
+    assert decode(result).mode == "RGBA"
+
+
+def test_small_jpeg_is_sent_unchanged():
+    content = image_content(encode((100, 100), image_format="JPEG"), "image/jpeg")
+    assert preprocess_image(content, 400) is content
+
+
+def test_remote_url_and_invalid_data_are_sent_unchanged():
+    remote = ImagePromptMessageContent(format="png", mime_type="image/png", url="https://example.com/a.png")
+    assert preprocess_image(remote, 400) is remote
+
+    broken = image_content(base64.b64encode(b"not an image").decode("ascii"))
+    assert preprocess_image(broken, 400) is broken
+
+
+def test_data_uri_is_processed():
+    data = encode((1000, 1000))
+    content = ImagePromptMessageContent(format="png", mime_type="image/png", url=f"data:image/png;base64,{data}")
+    assert decode(preprocess_image(content, 500)).size == (500, 500)
+
+
+def test_repeated_image_is_encoded_once(monkeypatch):
+    calls = []
+    encode_image = images._encode_image
+    monkeypatch.setattr(images, "_encode_image", lambda raw, max_side: calls.append(max_side) or encode_image(raw, max_side))
+
+    data = encode((1000, 500))
+    first = preprocess_image(image_content(data), 300)
+    second = preprocess_image(image_content(data), 300)
+    assert calls == [300]
+    assert second.base64_data == first.base64_data
+
+
+def test_cache_evicts_oldest_entries(monkeypatch):
+    monkeypatch.setattr(images, "IMAGE_CACHE_MAX_BYTES", 10)
+    images._cache_put(("a", 1), ("image/jpeg", "x" * 6))
+    images._cache_put(("b", 1), ("image/jpeg", "y" * 6))
+    assert list(images._cache) == [("b", 1)]
+    assert images._cache_bytes == 6
+
+
+def test_prompt_messages_without_images_are_returned_as_is():
+    messages = [UserPromptMessage(content="hello")]
+    assert preprocess_prompt_images(messages, 400) is messages
+    assert preprocess_prompt_images(messages, 0) is messages
+
+
+def test_prompt_images_are_processed_and_text_kept():
+    message = UserPromptMessage(
+        content=[TextPromptMessageContent(data="describe"), image_content(encode((900, 300)))]
+    )
+    [processed] = preprocess_prompt_images([message], 300)
+    text, image = processed.content
+    assert text.data == "describe"
+    assert decode(image).size == (300, 100)
+    # 原消息不被修改
+    assert message.content[1].mime_type == "image/png"
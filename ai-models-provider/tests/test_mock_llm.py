@@ -0,0 +1,79 @@
+import sys
+
+import pytest
+from dify_plugin.entities.model.message import (
+    PromptMessageTool,
+    SystemPromptMessage,
+    UserPromptMessage,
+)
+from dify_plugin.errors.model import InvokeError
+
+from models.llm.llm import QiniuLargeLanguageModel
+from tests.conftest import PLUGIN_DIR, load_model_schemas
+
+sys.path.insert(0, str(PLUGIN_DIR.parent / "scripts" / "benchmark"))
+
+from common import start_mock_server  # noqa: E402
+from mock_llm_server import token_text  # noqa: E402
+
+OUTPUT_TOKENS = 20
+FAST = ["--ttft-ms", "0", "--tokens-per-sec", "100000", "--output-tokens", str(OUTPUT_TOKENS)]
+MESSAGES = [SystemPromptMessage(content="You are a helpful assistant."), UserPromptMessage(content="hello")]
+TOOL = PromptMessageTool(
+    name="search",
+    description="Search the web",
+    parameters={"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]},
+)
+
+
+@pytest.fixture(scope="module")
+def server():
+    with start_mock_server("mock_llm_server.py", [*FAST, "--tool-call-rate", "1"]) as srv:
+        yield srv
+
+
+def invoke(url, stream=True, tools=None, **credentials):
+    return QiniuLargeLanguageModel(load_model_schemas()).invoke(
+        model="deepseek-v3",
+        credentials={"api_key": "test", "endpoint_url": url, **credentials},
+        prompt_messages=MESSAGES,
+        model_parameters={"temperature": 0},
+        tools=tools,
+        stream=stream,
+    )
+
+
+def test_stream_returns_content_and_upstream_usage(server):
+    chunks = list(invoke(server.url))
+    content = "".join(chunk.delta.message.content or "" for chunk in chunks)
+    assert content == "".join(token_text(i) for i in range(OUTPUT_TOKENS))
+    assert chunks[-1].delta.finish_reason == "stop"
+    assert chunks[-1].delta.usage.completion_tokens == OUTPUT_TOKENS
+
+
+def test_blocking_call_returns_full_result(server):
+    # 插件运行时把非流式结果转换为单个 chunk
+    [chunk] = list(invoke(server.url, stream=False))
+    assert chunk.delta.message.content == "".join(token_text(i) for i in range(OUTPUT_TOKENS))
+    assert chunk.delta.usage.completion_tokens == OUTPUT_TOKENS
+
+
+def test_stream_tool_call_is_reassembled(server):
+    chunks = list(invoke(server.url, tools=[TOOL]))
+    tool_calls = [call for chunk in chunks for call in chunk.delta.message.tool_calls]
+    assert [call.function.name for call in tool_calls] == ["search"]
+    assert tool_calls[0].function.arguments == '{"query": "benchmark"}'
+
+
+def test_coalesced_stream_keeps_content(server):
+    chunks = list(invoke(server.url, stream_coalesce_window_ms="30"))
+    content = "".join(chunk.delta.message.content or "" for chunk in chunks)
+    assert content == "".join(token_text(i) for i in range(OUTPUT_TOKENS))
+    assert len(chunks) < OUTPUT_TOKENS
+
+
+@pytest.mark.parametrize("args, status", [(["--error-rate", "1"], 500), (["--rate-limit-rate", "1"], 429)])
+def test_upstream_errors_carry_status_code(args, status):
+    with start_mock_server("mock_llm_server.py", [*FAST, *args]) as srv:
+        with pytest.raises(InvokeError, match=f"status code {status}"):
+            list(invoke(srv.url))
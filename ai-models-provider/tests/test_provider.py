@@ -0,0 +1,137 @@
+from collections import OrderedDict
+
+import pytest
+import requests
+from dify_plugin.errors.model import CredentialsValidateFailedError
+
+from provider import qiniu_ai
+from provider.qiniu_ai import PREFERRED_VALIDATION_MODEL, QiniuProvider, get_validation_model
+
+MODELS_URL = "https://api.example.com/v1/models"
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+
+class FakeModelInstance:
+    def __init__(self):
+        self.calls = []
+
+    def validate_credentials(self, model, credentials):
+        self.calls.append((model, credentials))
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(monkeypatch):
+    monkeypatch.setattr(qiniu_ai, "_validation_cache", OrderedDict())
+    monkeypatch.setattr(qiniu_ai, "_models_auth_cache", OrderedDict())
+    monkeypatch.setattr(qiniu_ai, "_validation_model", None)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    instance = object.__new__(QiniuProvider)
+    model_instance = FakeModelInstance()
+    monkeypatch.setattr(instance, "get_model_instance", lambda model_type: model_instance, raising=False)
+    return instance, model_instance
+
+
+def fake_models_endpoint(monkeypatch, valid_key_status, invalid_key_status):
+    """/models 对 "good-key" 返回 valid_key_status，对其他 API Key 返回 invalid_key_status"""
+    requested = []
+
+    def get(url, headers, timeout):
+        requested.append(headers["Authorization"])
+        if headers["Authorization"] == "Bearer good-key":
+            return FakeResponse(valid_key_status)
+        return FakeResponse(invalid_key_status)
+
+    monkeypatch.setattr(requests, "get", get)
+    return requested
+
+
+def test_models_endpoint_is_trusted_only_when_it_rejects_invalid_keys(monkeypatch, provider):
+    instance, model_instance = provider
+    requested = fake_models_endpoint(monkeypatch, 200, 401)
+
+    instance.validate_provider_credentials({"endpoint_url": "https://api.example.com/v1", "api_key": "good-key"})
+
+    assert model_instance.calls == []
+    assert requested[0] == "Bearer good-key"
+    assert requested[1].startswith("Bearer invalid-")
+
+
+def test_public_models_endpoint_falls_back_to_completion(monkeypatch, provider):
+    instance, model_instance = provider
+    fake_models_endpoint(monkeypatch, 200, 200)
+
+    instance.validate_provider_credentials({"endpoint_url": "https://api.example.com/v1", "api_key": "good-key"})
+
+    assert [model for model, _ in model_instance.calls] == [get_validation_model()]
+    assert model_instance.calls[0][1]["validate_credentials_max_tokens"] == 1
+
+
+def test_rejected_key_fails_without_fallback(monkeypatch, provider):
+    instance, model_instance = provider
+    fake_models_endpoint(monkeypatch, 401, 401)
+
+    with pytest.raises(CredentialsValidateFailedError):
+        instance.validate_provider_credentials({"endpoint_url": "https://api.example.com/v1", "api_key": "bad"})
+    assert model_instance.calls == []
+
+
+def test_unreachable_models_endpoint_falls_back_to_completion(monkeypatch, provider):
+    instance, model_instance = provider
+
+    def get(url, headers, timeout):
+        raise requests.ConnectionError("down")
+
+    monkeypatch.setattr(requests, "get", get)
+    instance.validate_provider_credentials({"api_key": "good-key"})
+    assert [model for model, _ in model_instance.calls] == [get_validation_model()]
+
+
+def test_successful_validation_is_cached(monkeypatch, provider):
+    instance, _ = provider
+    requested = fake_models_endpoint(monkeypatch, 200, 401)
+    credentials = {"endpoint_url": "https://api.example.com/v1", "api_key": "good-key"}
+
+    instance.validate_provider_credentials(credentials)
+    instance.validate_provider_credentials(credentials)
+
+    assert len(requested) == 2
+
+
+def test_validation_model_comes_from_position_file(monkeypatch, tmp_path):
+    position = tmp_path / "_position.yaml"
+    monkeypatch.setattr(qiniu_ai, "POSITION_FILE", position)
+    position.write_text("- qiniu-auto\n- removed-model\n- model-a\n- model-b\n")
+    (tmp_path / "model-a.yaml").write_text("model: model-a\n")
+    (tmp_path / "model-b.yaml").write_text("model: model-b\n")
+    assert get_validation_model() == "model-a"
+
+    monkeypatch.setattr(qiniu_ai, "_validation_model", None)
+    (tmp_path / f"{PREFERRED_VALIDATION_MODEL}.yaml").write_text("model: x\n")
+    position.write_text(f"- model-a\n- {PREFERRED_VALIDATION_MODEL}\n")
+    assert get_validation_model() == PREFERRED_VALIDATION_MODEL
+
+
+def test_validation_caches_are_bounded(monkeypatch, provider):
+    instance, _ = provider
+    monkeypatch.setattr(qiniu_ai, "VALIDATION_CACHE_SIZE", 2)
+    monkeypatch.setattr(qiniu_ai, "MODELS_AUTH_CACHE_SIZE", 2)
+    fake_models_endpoint(monkeypatch, 200, 401)
+
+    for index in range(4):
+        instance.validate_provider_credentials(
+            {"endpoint_url": f"https://api{index}.example.com/v1", "api_key": "good-key"}
+        )
+
+    assert len(qiniu_ai._validation_cache) == 2
+    assert list(qiniu_ai._models_auth_cache) == [
+        "https://api2.example.com/v1/models",
+        "https://api3.example.com/v1/models",
+    ]
@@ -0,0 +1,112 @@
+import time
+
+from dify_plugin.entities.model.message import AssistantPromptMessage, UserPromptMessage
+
+from models.llm.llm import QiniuLargeLanguageModel
+from models.llm.reasoning import (
+    REASONING_COLLAPSE,
+    REASONING_DROP,
+    REASONING_STREAM,
+    REASONING_SUMMARIZE_LENGTH,
+    THINK_END,
+    THINK_START,
+    ReasoningFilter,
+)
+from models.llm.tokenizer import count_text_tokens
+from tests.conftest import load_model_schemas
+
+REASONING = ["let me ", "think about ", "this"]
+
+
+def run(mode):
+    """依次输入推理增量和回答增量，返回输出内容和过滤器"""
+    reasoning_filter = ReasoningFilter(mode)
+    output = []
+    is_reasoning = False
+    for part in REASONING:
+        text, is_reasoning = reasoning_filter.wrap({"reasoning_content": part}, is_reasoning)
+        output.append(text)
+    text, is_reasoning = reasoning_filter.wrap({"content": "answer"}, is_reasoning)
+    output.append(text)
+    return output, reasoning_filter
+
+
+def test_stream_mode_forwards_reasoning_as_it_arrives():
+    output, reasoning_filter = run(REASONING_STREAM)
+    assert output == [THINK_START + "let me ", "think about ", "this", THINK_END + "answer"]
+    assert reasoning_filter.hidden_tokens == 0
+
+
+def test_collapse_mode_emits_one_block_when_answer_starts():
+    output, reasoning_filter = run(REASONING_COLLAPSE)
+    assert output == ["", "", "", THINK_START + "let me think about this" + THINK_END + "answer"]
+    assert reasoning_filter.hidden_tokens == 0
+
+
+def test_drop_mode_hides_reasoning_but_counts_it():
+    output, reasoning_filter = run(REASONING_DROP)
+    assert output == ["", "", "", "answer"]
+    assert reasoning_filter.hidden_tokens == reasoning_filter.estimated_tokens > 0
+
+
+def test_summarize_length_reports_characters_and_tokens():
+    output, reasoning_filter = run(REASONING_SUMMARIZE_LENGTH)
+    expected_tokens = sum(count_text_tokens(part, reasoning_filter.family) for part in REASONING)
+    assert output[-1] == (
+        f"{THINK_START}[reasoning omitted: {len(''.join(REASONING))} characters, ~{expected_tokens} tokens]{THINK_END}answer"
+    )
+    assert reasoning_filter.hidden_tokens == expected_tokens
+
+
+def test_unknown_mode_falls_back_to_stream():
+    assert ReasoningFilter("verbose").mode == REASONING_STREAM
+
+
+def test_flush_closes_unfinished_reasoning():
+    reasoning_filter = ReasoningFilter(REASONING_COLLAPSE)
+    reasoning_filter.wrap({"reasoning_content": "partial"}, False)
+    assert reasoning_filter.flush() == THINK_START + "partial" + THINK_END
+    assert reasoning_filter.flush() == ""
+
+
+def final_usage(mode, raw_usage):
+    """按 reasoning_mode 处理推理内容后，生成最后一个 chunk 并返回序列化后的用量"""
+    llm = QiniuLargeLanguageModel(model_schemas=load_model_schemas())
+    llm.started_at = time.perf_counter()
+    # SDK 默认用 GPT-2 词表估算输出 token 数，需要联网下载词表
+    llm._num_tokens_from_string = lambda text, tools=None: len(text.split())
+    output, llm._reasoning_filter = run(mode)
+    chunk = llm._create_final_llm_result_chunk(
+        0,
+        AssistantPromptMessage(content=""),
+        "stop",
+        raw_usage,
+        "deepseek-r1",
+        [UserPromptMessage(content="hi")],
+        {"api_key": "test"},
+        "".join(output),
+    )
+    return chunk.model_dump()["delta"]["usage"], llm._reasoning_filter
+
+
+def test_dropped_reasoning_counts_toward_completion_tokens():
+    usage, reasoning_filter = final_usage(REASONING_DROP, {"prompt_tokens": 10})
+    # 输出内容只有 "answer"，被丢弃的推理内容按估算值补上
+    assert usage["completion_tokens"] == 1 + reasoning_filter.estimated_tokens
+    assert usage["total_tokens"] == 10 + usage["completion_tokens"]
+
+
+def test_summarized_reasoning_counts_toward_completion_tokens():
+    usage, reasoning_filter = final_usage(REASONING_SUMMARIZE_LENGTH, {"prompt_tokens": 10})
+    assert usage["completion_tokens"] > reasoning_filter.estimated_tokens
+
+
+def test_streamed_reasoning_is_counted_from_output_only():
+    usage, _ = final_usage(REASONING_STREAM, {"prompt_tokens": 10})
+    assert usage["completion_tokens"] == len((THINK_START + "".join(REASONING) + THINK_END + "answer").split())
+
+
+def test_upstream_completion_tokens_are_kept():
+    usage, _ = final_usage(REASONING_DROP, {"prompt_tokens": 10, "completion_tokens": 50})
+    assert usage["completion_tokens"] == 50
+    assert usage["total_tokens"] == 60
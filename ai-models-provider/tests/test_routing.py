@@ -0,0 +1,126 @@
+import time
+
+import pytest
+import requests
+from dify_plugin.errors.model import InvokeBadRequestError
+
+from models.llm import routing
+from models.llm.routing import (
+    AUTO_MODEL,
+    OBJECTIVE_COST,
+    OBJECTIVE_LATENCY,
+    OBJECTIVE_QUALITY,
+    STATS_TTL,
+    ModelStats,
+    RoutingStats,
+    is_retryable_error,
+    parse_model_list,
+    select_models,
+)
+from tests.conftest import model_entity
+
+SCHEMAS = [
+    model_entity(AUTO_MODEL, features=["vision"], context_size=1000000),
+    model_entity("a", context_size=8000),
+    model_entity("b", features=["vision"], context_size=128000, pricing=("3", "15")),
+    model_entity("c", features=["vision"], context_size=128000, pricing=("0.5", "2")),
+    model_entity("d", context_size=128000, max_output_tokens=4096),
+]
+
+
+def measured(latency, age=0.0, **fields):
+    return ModelStats(latency=latency, updated_at=time.monotonic() - age, **fields)
+
+
+def stats_with(**models):
+    stats = RoutingStats()
+    stats._stats.update(models)
+    return stats
+
+
+def test_no_configured_models_means_no_candidates():
+    assert select_models([], SCHEMAS, stats=RoutingStats()) == []
+
+
+def test_only_configured_models_in_configured_order():
+    assert select_models(["d", "x", AUTO_MODEL, "b"], SCHEMAS, objective=OBJECTIVE_QUALITY, stats=RoutingStats()) == ["d", "b"]
+
+
+def test_filters_by_features_and_context():
+    allowed = ["a", "b", "c", "d"]
+    assert select_models(allowed, SCHEMAS, features=["vision"], stats=RoutingStats()) == ["b", "c"]
+    assert select_models(allowed, SCHEMAS, prompt_tokens=7000, max_tokens=2000, stats=RoutingStats()) == ["b", "c", "d"]
+
+
+def test_filters_by_max_output_tokens():
+    allowed = ["b", "c", "d"]
+    assert select_models(allowed, SCHEMAS, max_tokens=4096, objective=OBJECTIVE_QUALITY, stats=RoutingStats()) == allowed
+    # 没有输出上限的模型不按 max_tokens 排除
+    assert select_models(allowed, SCHEMAS, max_tokens=8192, objective=OBJECTIVE_QUALITY, stats=RoutingStats()) == ["b", "c"]
+
+
+def test_unmeasured_models_are_tried_before_measured_ones():
+    stats = stats_with(b=measured(100.0), d=measured(50.0))
+    assert select_models(["b", "c", "d"], SCHEMAS, objective=OBJECTIVE_LATENCY, stats=stats) == ["c", "d", "b"]
+
+
+def test_measured_models_rank_by_latency_weighted_by_errors():
+    stats = stats_with(b=measured(100.0), c=measured(60.0, error_rate=0.5), d=measured(150.0))
+    # c: 60 * (1 + 4 * 0.5) = 180
+    assert select_models(["b", "c", "d"], SCHEMAS, stats=stats) == ["b", "d", "c"]
+
+
+def test_stale_measurements_are_explored_again():
+    stats = stats_with(b=measured(100.0), c=measured(500.0, age=STATS_TTL + 1))
+    assert select_models(["b", "c"], SCHEMAS, stats=stats) == ["c", "b"]
+
+
+def test_cooling_models_rank_last():
+    stats = stats_with(b=ModelStats(cooldown_until=time.monotonic() + 60))
+    assert select_models(["b", "c", "d"], SCHEMAS, objective=OBJECTIVE_QUALITY, stats=stats) == ["c", "d", "b"]
+    assert select_models(["b", "c", "d"], SCHEMAS, stats=stats) == ["c", "d", "b"]
+
+
+def test_cost_ranks_by_price_with_unpriced_models_last():
+    stats = stats_with(c=measured(500.0), b=measured(50.0))
+    assert select_models(["d", "b", "c"], SCHEMAS, objective=OBJECTIVE_COST, stats=stats) == ["c", "b", "d"]
+    stats = stats_with(c=ModelStats(cooldown_until=time.monotonic() + 60))
+    assert select_models(["d", "b", "c"], SCHEMAS, objective=OBJECTIVE_COST, stats=stats) == ["b", "d", "c"]
+
+
+def test_unknown_objective_falls_back_to_latency():
+    stats = stats_with(b=measured(100.0), c=measured(50.0))
+    assert select_models(["b", "c"], SCHEMAS, objective="cheapest", stats=stats) == ["c", "b"]
+
+
+def test_record_success_and_failure_update_stats():
+    stats = RoutingStats()
+    stats.record_success("b", 100.0)
+    stats.record_success("b", 200.0)
+    assert stats.get("b").latency == pytest.approx(130.0)
+
+    stats.record_failure("b")
+    current = stats.get("b")
+    assert current.error_rate == pytest.approx(routing.STATS_DECAY)
+    assert current.cooldown_until > time.monotonic()
+
+
+def test_parse_model_list():
+    assert parse_model_list(" a, b\nc ,,") == ["a", "b", "c"]
+    assert parse_model_list(None) == []
+
+
+@pytest.mark.parametrize(
+    "ex, expected",
+    [
+        (requests.ConnectionError("refused"), True),
+        (requests.Timeout("slow"), True),
+        (InvokeBadRequestError("status code 500"), False),
+        (Exception("Error: status code 429"), True),
+        (Exception("Error: status code 503"), True),
+        (Exception("Error: status code 401"), False),
+        (Exception("something else"), False),
+    ],
+)
+def test_is_retryable_error(ex, expected):
+    assert is_retryable_error(ex) is expected
@@ -0,0 +1,189 @@
+import threading
+
+import pytest
+from dify_plugin.entities.model.llm import LLMResult, LLMUsage
+from dify_plugin.entities.model.message import AssistantPromptMessage, UserPromptMessage
+
+from models.llm.singleflight import (
+    COALESCING_ALL,
+    COALESCING_DETERMINISTIC,
+    COALESCING_DISABLED,
+    SingleFlight,
+    _Flight,
+    make_request_key,
+    should_coalesce,
+)
+
+
+class Upstream:
+    """可关闭的 chunk 迭代器，记录拉取次数"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.pulled = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = next(self.chunks)
+        self.pulled += 1
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+def result():
+    return LLMResult(
+        model="m",
+        prompt_messages=[],
+        message=AssistantPromptMessage(content="ok"),
+        usage=LLMUsage.empty_usage(),
+    )
+
+
+@pytest.mark.parametrize(
+    "mode, parameters, expected",
+    [
+        (COALESCING_DISABLED, {"temperature": 0}, False),
+        (COALESCING_DETERMINISTIC, {"temperature": 0}, True),
+        (COALESCING_DETERMINISTIC, {"temperature": 0.7}, False),
+        (COALESCING_DETERMINISTIC, {}, False),
+        (COALESCING_ALL, {"temperature": 0.7}, True),
+        (None, {"temperature": 0}, False),
+    ],
+)
+def test_should_coalesce(mode, parameters, expected):
+    assert should_coalesce(mode, parameters) is expected
+
+
+def test_request_key_depends_on_request_and_credentials():
+    messages = [UserPromptMessage(content="hi")]
+    key = make_request_key("m", {"api_key": "a"}, messages, {"temperature": 0})
+    assert key == make_request_key("m", {"api_key": "a"}, [UserPromptMessage(content="hi")], {"temperature": 0})
+    assert key != make_request_key("m", {"api_key": "b"}, messages, {"temperature": 0})
+    assert key != make_request_key("m", {"api_key": "a"}, messages, {"temperature": 0}, stream=False)
+
+
+def test_concurrent_requests_share_one_result():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait()
+        return result()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("k", fn))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while len(flights) == 0:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 3 and all(item is results[0] for item in results)
+    assert len(flights) == 0
+
+
+def test_error_is_shared_with_waiting_requests():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait()
+        raise RuntimeError("upstream failed")
+
+    errors = []
+
+    def call():
+        try:
+            flights.do("k", fn)
+        except RuntimeError as ex:
+            errors.append(ex)
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    while len(flights) == 0:
+        threading.Event().wait(0.001)
+    threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 2
+
+
+def test_stream_is_fanned_out_to_every_subscriber():
+    flights = SingleFlight()
+    upstream = Upstream(range(5))
+    leader = flights.do("k", lambda: upstream)
+    follower = flights.do("k", lambda: pytest.fail("second upstream call"))
+
+    assert list(leader) == list(range(5))
+    assert list(follower) == list(range(5))
+    assert upstream.pulled == 5
+    assert len(flights) == 0
+
+
+def test_late_follower_starts_new_call_after_buffer_trimmed():
+    flights = SingleFlight(max_buffered_chunks=2)
+    leader = flights.do("k", lambda: Upstream(range(5)))
+    assert [next(leader), next(leader), next(leader)] == [0, 1, 2]
+
+    second = Upstream(["fresh"])
+    follower = flights.do("k", lambda: second)
+    assert list(follower) == ["fresh"]
+    assert list(leader) == [3, 4]
+
+
+def test_fast_subscriber_waits_for_slow_one_when_buffer_full():
+    flight = _Flight(max_buffered_chunks=2)
+    fast, slow = flight.subscribe(), flight.subscribe()
+    flight.start(Upstream(range(10)))
+
+    fast_reader = flight.read(fast)
+    assert [next(fast_reader), next(fast_reader)] == [0, 1]
+    assert len(flight.chunks) == 2
+
+    slow_reader = flight.read(slow)
+    assert next(slow_reader) == 0
+    assert flight.offset == 1 and len(flight.chunks) == 1
+
+
+def test_upstream_closed_when_all_subscribers_leave():
+    flights = SingleFlight()
+    upstream = Upstream(range(10))
+    leader = flights.do("k", lambda: upstream)
+    follower = flights.do("k", lambda: upstream)
+    next(leader)
+    next(follower)
+
+    leader.close()
+    assert not upstream.closed
+    follower.close()
+    assert upstream.closed
+    assert len(flights) == 0
+
+
+def test_upstream_closed_when_last_subscriber_leaves_during_pull():
+    flight = _Flight(max_buffered_chunks=4)
+    subscriber = flight.subscribe()
+    upstream = Upstream(range(3))
+    flight.start(upstream)
+
+    # 拉取中的订阅者离开时由拉取方关闭上游
+    flight.pulling = True
+    flight.unsubscribe(subscriber)
+    assert not upstream.closed
+
+    flight._pull()
+    assert upstream.closed
+    assert flight.done
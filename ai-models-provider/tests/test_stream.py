@@ -0,0 +1,126 @@
+import time
+
+import pytest
+from dify_plugin.entities.model.llm import LLMResultChunk, LLMResultChunkDelta, LLMUsage
+from dify_plugin.entities.model.message import AssistantPromptMessage
+
+from models.llm.stream import DEFAULT_COALESCE_WINDOW_MS, READ_AHEAD_CHUNKS, coalesce_stream
+
+
+def text_chunk(text, index=0):
+    return LLMResultChunk(
+        model="m",
+        prompt_messages=[],
+        delta=LLMResultChunkDelta(index=index, message=AssistantPromptMessage(content=text)),
+    )
+
+
+def final_chunk():
+    return LLMResultChunk(
+        model="m",
+        prompt_messages=[],
+        delta=LLMResultChunkDelta(
+            index=0,
+            message=AssistantPromptMessage(content=""),
+            finish_reason="stop",
+            usage=LLMUsage.empty_usage(),
+        ),
+    )
+
+
+def contents(chunks):
+    return [chunk.delta.message.content for chunk in chunks]
+
+
+def test_coalescing_is_off_by_default():
+    upstream = [text_chunk("a"), text_chunk("b"), final_chunk()]
+    assert DEFAULT_COALESCE_WINDOW_MS == 0
+    assert contents(coalesce_stream(upstream)) == ["a", "b", ""]
+
+
+def test_consecutive_text_is_merged_until_finish():
+    upstream = [text_chunk("a"), text_chunk("b"), text_chunk("c"), final_chunk()]
+    merged = list(coalesce_stream(upstream, window_ms=1000))
+    assert contents(merged) == ["abc", ""]
+    assert merged[-1].delta.finish_reason == "stop"
+
+
+def test_max_chars_flushes_early():
+    upstream = [text_chunk("aa"), text_chunk("bb"), text_chunk("cc")]
+    assert contents(coalesce_stream(upstream, window_ms=1000, max_chars=4)) == ["aabb", "cc"]
+
+
+def test_buffered_text_is_flushed_while_upstream_stalls():
+    received_at = {}
+
+    def upstream():
+        yield text_chunk("first")
+        time.sleep(0.5)
+        yield text_chunk("second")
+
+    started = time.monotonic()
+    for chunk in coalesce_stream(upstream(), window_ms=30):
+        received_at.setdefault(chunk.delta.message.content, time.monotonic() - started)
+
+    # 上游停顿 500ms，第一段文本在窗口到期时发送，而不是等到下一个增量
+    assert received_at["first"] < 0.3
+    assert received_at["second"] >= 0.5
+
+
+def test_upstream_error_is_raised_after_flushing_buffer():
+    def upstream():
+        yield text_chunk("partial")
+        raise RuntimeError("upstream failed")
+
+    output = []
+    with pytest.raises(RuntimeError, match="upstream failed"):
+        for chunk in coalesce_stream(upstream(), window_ms=1000):
+            output.append(chunk.delta.message.content)
+    assert output == ["partial"]
+
+
+def test_closing_early_stops_reading_upstream():
+    closed = []
+
+    def upstream():
+        try:
+            for index in range(1000):
+                yield text_chunk(str(index))
+                time.sleep(0.005)
+        finally:
+            closed.append(True)
+
+    stream = coalesce_stream(upstream(), window_ms=10)
+    next(stream)
+    stream.close()
+
+    deadline = time.monotonic() + 2
+    while not closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert closed == [True]
+
+
+def test_slow_consumer_bounds_read_ahead():
+    pulled = []
+    closed = []
+
+    def upstream():
+        try:
+            for index in range(1000):
+                pulled.append(index)
+                yield text_chunk(str(index))
+        finally:
+            closed.append(True)
+
+    stream = coalesce_stream(upstream(), window_ms=1000, max_chars=1)
+    next(stream)
+    time.sleep(0.2)
+    # 调用方暂停读取时，读取线程最多预读一个队列的 chunk
+    assert len(pulled) <= READ_AHEAD_CHUNKS + 2
+    stream.close()
+
+    # 读取线程在队列已满时也能发现调用方已关闭，并关闭上游
+    deadline = time.monotonic() + 2
+    while not closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert closed == [True] and len(pulled) < 1000
@@ -0,0 +1,96 @@
+import pytest
+
+from models.llm import tokenizer
+from models.llm.tokenizer import (
+    DEFAULT_TOKENIZER_FAMILY,
+    TOKENS_PER_MESSAGE,
+    count_message_tokens,
+    count_text_tokens,
+    get_tokenizer_family,
+)
+
+
+class FakeEncoding:
+    def encode_ordinary(self, text):
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(monkeypatch):
+    monkeypatch.setattr(tokenizer, "_encodings", {})
+    monkeypatch.setattr(tokenizer, "_encodings_loading", set())
+    monkeypatch.setattr(tokenizer, "_message_cache", tokenizer.OrderedDict())
+
+
+def test_family_matches_model_id_keywords():
+    assert get_tokenizer_family("openai/gpt-5").name == "gpt"
+    assert get_tokenizer_family("deepseek/deepseek-v4-pro").name == "deepseek"
+    assert get_tokenizer_family("qwen3-max").name == "qwen"
+    assert get_tokenizer_family("unknown-model") is DEFAULT_TOKENIZER_FAMILY
+
+
+def test_estimate_uses_family_ratios():
+    family = get_tokenizer_family("deepseek-v3")
+    # 10 个 CJK 字符 * 0.6 + 33 个其他字符 / 3.3
+    text = "你" * 10 + "a" * 33
+    assert count_text_tokens(text, family) == 16
+    assert count_text_tokens("", family) == 0
+
+
+def test_gpt_uses_tiktoken_encoding(monkeypatch):
+    monkeypatch.setitem(tokenizer._encodings, "o200k_base", FakeEncoding())
+    assert count_text_tokens("one two three", get_tokenizer_family("gpt-4o")) == 3
+
+
+def test_gpt_falls_back_to_estimate_when_encoding_unavailable(monkeypatch):
+    monkeypatch.setitem(tokenizer._encodings, "o200k_base", None)
+    assert count_text_tokens("a" * 40, get_tokenizer_family("gpt-4o")) == 10
+
+
+def test_encoding_is_loaded_outside_lock(monkeypatch):
+    tiktoken = pytest.importorskip("tiktoken")
+    seen_while_loading = []
+
+    def get_encoding(name):
+        # 加载期间的其他调用不等待锁，直接返回 None 改用估算
+        assert not tokenizer._encodings_lock.locked()
+        seen_while_loading.append(tokenizer._get_encoding(name))
+        return FakeEncoding()
+
+    monkeypatch.setattr(tiktoken, "get_encoding", get_encoding)
+    encoding = tokenizer._get_encoding("o200k_base")
+
+    assert isinstance(encoding, FakeEncoding)
+    assert seen_while_loading == [None]
+    assert tokenizer._get_encoding("o200k_base") is encoding
+
+
+def test_failed_encoding_load_is_not_retried(monkeypatch):
+    tiktoken = pytest.importorskip("tiktoken")
+    calls = []
+
+    def get_encoding(name):
+        calls.append(name)
+        raise OSError("offline")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", get_encoding)
+    assert tokenizer._get_encoding("o200k_base") is None
+    assert tokenizer._get_encoding("o200k_base") is None
+    assert calls == ["o200k_base"]
+
+
+def test_message_count_is_cached(monkeypatch):
+    family = get_tokenizer_family("qwen3-max")
+    message = {"role": "user", "content": "hello world"}
+    first = count_message_tokens(message, family)
+
+    monkeypatch.setattr(tokenizer, "count_text_tokens", lambda text, family: pytest.fail("cache miss"))
+    assert count_message_tokens(dict(message), family) == first
+    assert first > TOKENS_PER_MESSAGE
+
+
+def test_message_count_includes_name_and_text_parts():
+    family = get_tokenizer_family("qwen3-max")
+    plain = count_message_tokens({"role": "user", "content": [{"type": "text", "text": "hi"}]}, family)
+    named = count_message_tokens({"role": "user", "content": [{"type": "text", "text": "hi"}], "name": "a"}, family)
+    assert named > plain
@@ -0,0 +1,91 @@
+import sys
+
+import pytest
+import yaml
+
+from tests.conftest import PLUGIN_DIR
+
+sys.path.insert(0, str(PLUGIN_DIR.parent / "scripts"))
+
+import update_models  # noqa: E402
+
+MODEL = {
+    "id": "vendor/model-a",
+    "name": "Model A",
+    "architecture": {"input_modalities": ["text"], "output_modalities": ["text"]},
+    "model_constraints": {"context_length": 32768},
+}
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """在临时目录中运行脚本，市场 API 返回固定的模型列表"""
+    models_dir = tmp_path / "models" / "llm"
+    models_dir.mkdir(parents=True)
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text("version: 1.2.3\n", encoding="utf-8")
+
+    monkeypatch.setattr(update_models, "MODELS_DIR", models_dir)
+    monkeypatch.setattr(update_models, "POSITION_FILE", models_dir / update_models.POSITION_FILENAME)
+    monkeypatch.setattr(update_models, "MANIFEST_FILE", manifest)
+    monkeypatch.setattr(update_models, "MARKET_CACHE_FILE", tmp_path / "cache.json")
+    monkeypatch.setattr(update_models, "fetch_models_from_api", lambda cache: ([dict(MODEL)], {}))
+    return models_dir
+
+
+def run(argv=()):
+    with pytest.raises(SystemExit) as exc_info:
+        update_models.main(list(argv))
+    return exc_info.value.code
+
+
+def test_first_run_adds_model_and_bumps_version(workspace):
+    assert run() == 0
+    assert update_models.get_manifest_version() == "1.2.4"
+    assert (workspace / "vendor-model-a.yaml").exists()
+
+
+def test_unchanged_run_does_not_release(workspace):
+    run()
+    assert run() == 1
+    assert update_models.get_manifest_version() == "1.2.4"
+
+
+def test_formatting_only_rewrite_does_not_release(workspace):
+    run()
+    model_file = workspace / "vendor-model-a.yaml"
+    config = yaml.safe_load(model_file.read_text(encoding="utf-8"))
+    model_file.write_text(yaml.dump(config, sort_keys=True), encoding="utf-8")
+
+    assert run() == 1
+    assert update_models.get_manifest_version() == "1.2.4"
+
+
+def test_config_change_releases(workspace, monkeypatch):
+    run()
+    changed = dict(MODEL, model_constraints={"context_length": 65536})
+    monkeypatch.setattr(update_models, "fetch_models_from_api", lambda cache: ([changed], {}))
+
+    assert run() == 0
+    assert update_models.get_manifest_version() == "1.2.5"
+
+
+def test_output_limit_and_pricing_are_mapped():
+    config = update_models.generate_model_yaml(
+        dict(
+            MODEL,
+            model_constraints={"context_length": 32768, "max_output_tokens": 8192},
+            pricing={"prompt": "0.0000025", "completion": "0.00001", "input_cache_read": "0.00000025"},
+            performance={"throughput": 85.123},
+        )
+    )
+    max_tokens = next(rule for rule in config["parameter_rules"] if rule["name"] == "max_tokens")
+    assert (max_tokens["min"], max_tokens["max"], max_tokens["default"]) == (1, 8192, 4096)
+    assert config["pricing"] == {"input": "2.5", "output": "10", "unit": "0.000001", "currency": "USD"}
+    assert config["extra"] == {"throughput": 85.12, "cached_input_price": "0.25"}
+
+
+def test_missing_output_limit_and_pricing_keep_templates():
+    config = update_models.generate_model_yaml(dict(MODEL))
+    assert {"name": "max_tokens", "use_template": "max_tokens"} in config["parameter_rules"]
+    assert "pricing" not in config and "extra" not in config
@@ -0,0 +1,141 @@
+import logging
+import time
+from decimal import Decimal
+
+import pytest
+from dify_plugin.entities.model.llm import LLMUsage
+from dify_plugin.entities.model.message import (
+    AssistantPromptMessage,
+    SystemPromptMessage,
+    UserPromptMessage,
+)
+
+from models.llm.llm import QiniuLargeLanguageModel
+from models.llm.prompt_cache import CACHE_CONTROL, add_cache_control, get_cache_breakpoints, get_cached_tokens
+from models.llm import llm as llm_module
+from models.llm.usage import apply_cached_price, get_reasoning_tokens, get_usage_details
+from tests.conftest import load_model_schemas, model_entity
+
+
+def usage_with(prompt_tokens, completion_tokens=0):
+    return LLMUsage.empty_usage().model_copy(update={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens})
+
+
+def final_chunk(raw_usage, full_content="hello", model="deepseek-v3", schemas=None):
+    llm = QiniuLargeLanguageModel(model_schemas=schemas or load_model_schemas())
+    llm.started_at = time.perf_counter()
+    return llm._create_final_llm_result_chunk(
+        0,
+        AssistantPromptMessage(content=""),
+        "stop",
+        raw_usage,
+        model,
+        [UserPromptMessage(content="hi")],
+        {"api_key": "test"},
+        full_content,
+    )
+
+
+def test_breakpoints_are_last_system_and_last_user_message():
+    messages = [
+        SystemPromptMessage(content="rules"),
+        UserPromptMessage(content="first"),
+        AssistantPromptMessage(content="answer"),
+        UserPromptMessage(content="second"),
+    ]
+    assert get_cache_breakpoints(messages) == [messages[0], messages[3]]
+    assert get_cache_breakpoints([UserPromptMessage(content="")]) == []
+
+
+def test_cache_control_marks_string_and_last_text_block():
+    marked = add_cache_control({"role": "user", "content": "hi"})
+    assert marked["content"] == [{"type": "text", "text": "hi", "cache_control": CACHE_CONTROL}]
+
+    content = [{"type": "text", "text": "a"}, {"type": "text", "text": "b"}, {"type": "image_url", "image_url": {}}]
+    marked = add_cache_control({"role": "user", "content": content})
+    assert "cache_control" not in marked["content"][0]
+    assert marked["content"][1]["cache_control"] == CACHE_CONTROL
+    assert "cache_control" not in content[1]
+
+
+@pytest.mark.parametrize(
+    "raw_usage, expected",
+    [
+        ({"prompt_tokens_details": {"cached_tokens": 80}}, 80),
+        ({"prompt_cache_hit_tokens": 60}, 60),
+        ({"cache_read_input_tokens": 40}, 40),
+        ({"prompt_tokens_details": {"cached_tokens": "bad"}}, 0),
+        (None, 0),
+    ],
+)
+def test_cached_tokens_from_each_provider_format(raw_usage, expected):
+    assert get_cached_tokens(raw_usage) == expected
+
+
+def test_usage_details_split_prompt_tokens():
+    details = get_usage_details(
+        usage_with(100), {"prompt_tokens_details": {"cached_tokens": 150}, "completion_tokens_details": {"reasoning_tokens": 7}}
+    )
+    assert details == (100, 0, 7)
+    assert get_usage_details(usage_with(100), {}, estimated_reasoning_tokens=5) == (0, 100, 5)
+    assert get_reasoning_tokens({"completion_tokens_details": {"reasoning_tokens": -3}}) == 0
+
+
+def test_final_chunk_usage_serializes_as_standard_llm_usage(caplog):
+    raw_usage = {
+        "prompt_tokens": 100,
+        "completion_tokens": 20,
+        "prompt_tokens_details": {"cached_tokens": 80},
+        "completion_tokens_details": {"reasoning_tokens": 12},
+    }
+    with caplog.at_level(logging.INFO, logger="models.llm.usage"):
+        chunk = final_chunk(raw_usage)
+
+    usage = chunk.model_dump()["delta"]["usage"]
+    assert set(usage) == set(LLMUsage.model_fields)
+    assert usage["prompt_tokens"] == 100
+    assert usage["completion_tokens"] == 20
+    assert usage["total_tokens"] == 120
+    assert "缓存命中 80，未命中 20" in caplog.text
+    assert "推理 12" in caplog.text
+
+
+def priced_usage(prompt_tokens, completion_tokens):
+    """输入每百万 token 2 元、输出 8 元计价的用量"""
+    unit = Decimal("0.000001")
+    return usage_with(prompt_tokens, completion_tokens).model_copy(
+        update={
+            "prompt_unit_price": Decimal("2"),
+            "prompt_price_unit": unit,
+            "prompt_price": prompt_tokens * Decimal("2") * unit,
+            "completion_unit_price": Decimal("8"),
+            "completion_price_unit": unit,
+            "completion_price": completion_tokens * Decimal("8") * unit,
+            "total_price": prompt_tokens * Decimal("2") * unit + completion_tokens * Decimal("8") * unit,
+        }
+    )
+
+
+def test_cached_tokens_are_billed_at_cached_price():
+    usage = apply_cached_price(priced_usage(1000, 100), 800, "0.2")
+    # 200 个未命中按 2 元、800 个命中按 0.2 元计价（每百万 token）
+    assert usage.prompt_price == Decimal("0.00056")
+    assert usage.total_price == Decimal("0.00136")
+    assert usage.prompt_tokens == 1000
+    # 模型没有定价时不计费
+    unpriced = usage_with(1000, 100)
+    assert apply_cached_price(unpriced, 800, "0.2") is unpriced
+
+
+@pytest.mark.parametrize("cached_tokens, cached_unit_price", [(0, "0.2"), (800, None), (800, "free")])
+def test_cached_price_keeps_usage_when_not_applicable(cached_tokens, cached_unit_price):
+    usage = priced_usage(1000, 100)
+    assert apply_cached_price(usage, cached_tokens, cached_unit_price) is usage
+
+
+def test_final_chunk_bills_cached_tokens_from_model_extra(monkeypatch):
+    monkeypatch.setattr(llm_module, "get_model_extra", lambda model: {"cached_input_price": "0.2"})
+    raw_usage = {"prompt_tokens": 1000, "completion_tokens": 100, "prompt_tokens_details": {"cached_tokens": 800}}
+    chunk = final_chunk(raw_usage, model="priced", schemas=[model_entity("priced", pricing=("2", "8"))])
+    assert chunk.delta.usage.prompt_price == Decimal("0.00056")
+    assert chunk.delta.usage.total_price == Decimal("0.00136")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+LLM 插件基准测试
+
+在独立进程中启动本地模拟 LLM 服务（mock_llm_server.py），在本进程中以指定并发调用
+QiniuLargeLanguageModel.invoke（插件运行时的入口，内部调用 _invoke），测量插件自身的开销：
+- 请求延迟和首 chunk 延迟的 p50 / p90 / p99
+- 每秒请求数、每秒 chunk 数
+- 本进程的 CPU 时间和常驻内存（模拟服务在独立进程中，不计入）
+
+用法：
+    python scripts/benchmark/bench_llm.py --concurrency 32 --requests 500
+    python scripts/benchmark/bench_llm.py --credential stream_coalesce_window_ms=30 --json
+    python scripts/benchmark/bench_llm.py --url http://127.0.0.1:8900/v1   # 使用已启动的模拟服务
+
+对比优化前后的结果时，保持模拟服务参数和 --seed 相同。
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from common import ROOT_DIR, LatencyStats, UsageMeter, parse_key_values, print_report, start_mock_server
+from mock_llm_server import add_mock_arguments, mock_arguments
+
+PLUGIN_DIR = ROOT_DIR / "ai-models-provider"
+sys.path.insert(0, str(PLUGIN_DIR))
+
+# dify_plugin 导入时会 monkey patch（gevent），需要在创建线程之前导入
+import dify_plugin  # noqa: E402,F401
+from dify_plugin.entities.model.message import (  # noqa: E402
+    PromptMessageTool,
+    SystemPromptMessage,
+    UserPromptMessage,
+)
+from models.llm.llm import QiniuLargeLanguageModel  # noqa: E402
+
+BENCHMARK_TOOL = PromptMessageTool(
+    name="search",
+    description="Search the knowledge base",
+    parameters={"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]},
+)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数。"""
+    parser = argparse.ArgumentParser(description="七牛云 AI 模型插件基准测试")
+    parser.add_argument("--model", default="deepseek-v3", help="模型 ID（需要在模型目录中）")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发数")
+    parser.add_argument("--requests", type=int, default=200, help="请求总数")
+    parser.add_argument("--warmup", type=int, default=5, help="预热请求数（不计入结果）")
+    parser.add_argument("--no-stream", action="store_true", help="使用非流式调用")
+    parser.add_argument("--tools", action="store_true", help="请求中携带工具（配合 --tool-call-rate）")
+    parser.add_argument("--prompt-chars", type=int, default=2000, help="用户消息长度（字符）")
+    parser.add_argument("--credential", action="append", metavar="KEY=VALUE", help="额外的认证信息，可重复")
+    parser.add_argument("--param", action="append", metavar="KEY=VALUE", help="模型参数（值按 JSON 解析），可重复")
+    parser.add_argument("--url", help="使用已启动的模拟服务，不再自动启动")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    add_mock_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def parse_model_parameters(items: Optional[List[str]]) -> dict:
+    """模型参数的值按 JSON 解析，解析失败时作为字符串"""
+    parameters = {}
+    for key, value in parse_key_values(items).items():
+        try:
+            parameters[key] = json.loads(value)
+        except json.JSONDecodeError:
+            parameters[key] = value
+    return parameters
+
+
+class LLMBenchmark:
+    """以固定并发调用模型并收集统计"""
+
+    def __init__(self, args: argparse.Namespace, endpoint_url: str):
+        self.args = args
+        self.credentials = {"api_key": "benchmark", "endpoint_url": endpoint_url, **parse_key_values(args.credential)}
+        self.model_parameters = parse_model_parameters(args.param)
+        self.prompt_messages = [
+            SystemPromptMessage(content="You are a helpful assistant."),
+            UserPromptMessage(content=("benchmark " * (args.prompt_chars // 10 + 1))[: args.prompt_chars]),
+        ]
+        self.tools = [BENCHMARK_TOOL] if args.tools else None
+        self.latency = LatencyStats()
+        self.first_chunk = LatencyStats()
+        self.chunks = 0
+        self.output_chars = 0
+        self._lock = threading.Lock()
+
+    def invoke_once(self, record: bool = True) -> None:
+        # 插件运行时为每次调用创建新的模型实例
+        model = QiniuLargeLanguageModel([])
+        started_at = time.perf_counter()
+        first_chunk_ms = None
+        chunks = 0
+        output_chars = 0
+        try:
+            for chunk in model.invoke(
+                model=self.args.model,
+                credentials=dict(self.credentials),
+                prompt_messages=self.prompt_messages,
+                model_parameters=dict(self.model_parameters),
+                tools=self.tools,
+                stream=not self.args.no_stream,
+            ):
+                if first_chunk_ms is None:
+                    first_chunk_ms = (time.perf_counter() - started_at) * 1000
+                chunks += 1
+                content = chunk.delta.message.content
+                output_chars += len(content) if isinstance(content, str) else 0
+        except Exception as ex:
+            if record:
+                with self._lock:
+                    self.latency.add_error(ex)
+            return
+
+        if not record:
+            return
+        with self._lock:
+            self.latency.latencies_ms.append((time.perf_counter() - started_at) * 1000)
+            self.first_chunk.latencies_ms.append(first_chunk_ms or 0.0)
+            self.chunks += chunks
+            self.output_chars += output_chars
+
+    def run(self) -> tuple:
+        concurrency = max(self.args.concurrency, 1)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda _: self.invoke_once(record=False), range(self.args.warmup)))
+            with UsageMeter() as meter:
+                list(executor.map(lambda _: self.invoke_once(), range(self.args.requests)))
+        return self.results(meter.usage.wall_seconds), meter.usage
+
+    def results(self, wall_seconds: float) -> dict:
+        succeeded = len(self.latency.latencies_ms)
+        latency = self.latency.summary()
+        first_chunk = self.first_chunk.summary()
+        return {
+            "succeeded": succeeded,
+            "errors": self.latency.errors or "-",
+            "latency_p50_ms": latency["p50_ms"],
+            "latency_p90_ms": latency["p90_ms"],
+            "latency_p99_ms": latency["p99_ms"],
+            "first_chunk_p50_ms": first_chunk["p50_ms"],
+            "first_chunk_p99_ms": first_chunk["p99_ms"],
+            "requests_per_sec": round(succeeded / wall_seconds, 2) if wall_seconds else 0,
+            "chunks_per_sec": round(self.chunks / wall_seconds, 1) if wall_seconds else 0,
+            "chunks_per_request": round(self.chunks / succeeded, 1) if succeeded else 0,
+            "output_chars": self.output_chars,
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    config = {
+        "model": args.model,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "stream": not args.no_stream,
+        "tools": args.tools,
+        "prompt_chars": args.prompt_chars,
+        "ttft_ms": args.ttft_ms,
+        "tokens_per_sec": args.tokens_per_sec,
+        "output_tokens": args.output_tokens,
+        "tool_call_rate": args.tool_call_rate,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "credentials": parse_key_values(args.credential) or "-",
+        "parameters": parse_model_parameters(args.param) or "-",
+    }
+
+    if args.url:
+        results, usage = LLMBenchmark(args, args.url).run()
+    else:
+        with start_mock_server("mock_llm_server.py", mock_arguments(args)) as server:
+            results, usage = LLMBenchmark(args, server.url).run()
+
+    print_report("七牛云 AI 模型插件基准测试", config, results, usage, as_json=args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+存储工具基准测试
+
+在独立进程中启动本地模拟七牛云存储服务（mock_storage_server.py），让 qiniu SDK 和 requests
+指向它，在本进程中以指定并发调用存储工具，测量：
+- 每个工具的延迟分位数、吞吐量和错误数
+- 延迟拆分：每次调用发出的 HTTP 请求数、按接口统计的 HTTP 耗时，以及工具自身（签名、
+  序列化、消息构造）的耗时
+- 大对象上传 / 下载时本进程 Python 内存分配的峰值（tracemalloc）
+
+用法：
+    python scripts/benchmark/bench_storage.py --concurrency 16 --iterations 200
+    python scripts/benchmark/bench_storage.py --tools get_file_content --large-object-mb 50
+    python scripts/benchmark/bench_storage.py --latency-ms 20 --json
+
+对比优化前后的结果时，保持模拟服务参数和 --seed 相同。
+"""
+
+import argparse
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from common import ROOT_DIR, LatencyStats, UsageMeter, print_report, start_mock_server
+from mock_storage_server import add_mock_arguments, download_domain, mock_arguments
+
+PLUGIN_DIR = ROOT_DIR / "storage-tools"
+sys.path.insert(0, str(PLUGIN_DIR))
+
+# dify_plugin 导入时会 monkey patch（gevent），需要在创建线程之前导入
+import dify_plugin  # noqa: E402,F401
+import qiniu  # noqa: E402
+import requests  # noqa: E402
+from dify_plugin.entities.tool import ToolInvokeMessage, ToolRuntime  # noqa: E402
+from tools.fetch_to_bucket import QiniuFetchTool  # noqa: E402
+from tools.file_upload import QiniuUploadTool  # noqa: E402
+from tools.get_file_content import QiniuGetContentTool  # noqa: E402
+from tools.list_bucket_files import QiniuListFilesTool  # noqa: E402
+from tools.list_buckets import QiniuListBucketsTool  # noqa: E402
+
+TOOLS = {
+    "list_buckets": QiniuListBucketsTool,
+    "list_bucket_files": QiniuListFilesTool,
+    "file_upload": QiniuUploadTool,
+    "get_file_content": QiniuGetContentTool,
+    "fetch_to_bucket": QiniuFetchTool,
+}
+
+
+class HttpRecorder:
+    """
+    记录当前线程中每次工具调用发出的 HTTP 请求
+
+    包装 requests.Session.send，qiniu SDK 和工具直接使用的 requests 都会经过这里
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._original_send = None
+
+    def install(self) -> None:
+        recorder = self
+        original_send = requests.Session.send
+        self._original_send = original_send
+
+        def send(session, request, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return original_send(session, request, **kwargs)
+            finally:
+                calls = getattr(recorder._local, "calls", None)
+                if calls is not None:
+                    calls.append((endpoint_name(request.url), (time.perf_counter() - started_at) * 1000))
+
+        requests.Session.send = send
+
+    def uninstall(self) -> None:
+        if self._original_send is not None:
+            requests.Session.send = self._original_send
+
+    def start(self) -> None:
+        self._local.calls = []
+
+    def stop(self) -> list:
+        calls, self._local.calls = self._local.calls, None
+        return calls
+
+
+def endpoint_name(url: str) -> str:
+    """把请求 URL 归类为接口名称"""
+    path = urlsplit(url).path
+    if path.startswith("/download/"):
+        return "download"
+    if path == "/":
+        return "upload"
+    return "/" + path.strip("/").split("/")[0]
+
+
+def tool_parameters(name: str, args: argparse.Namespace, server_url: str, index: int) -> dict:
+    """构造各工具的调用参数"""
+    bucket = args.buckets.split(",")[0]
+    if name == "list_bucket_files":
+        return {"bucket": bucket, "prefix": "docs/", "limit": args.list_limit}
+    if name == "file_upload":
+        return {
+            "content": "x" * args.upload_bytes,
+            "filename": f"{index:06d}-{time.monotonic_ns()}.txt",
+            "prefix": "uploads/",
+            "bucket": bucket,
+            "overwrite": True,
+        }
+    if name == "get_file_content":
+        key = f"docs/{index % max(args.seed_objects, 1):06d}.txt"
+        return {"file_key": key, "domain": download_domain(server_url, bucket), "expire_time": 3600}
+    if name == "fetch_to_bucket":
+        # 源地址是模拟服务的公开下载地址，由模拟服务自己下载
+        source = f"docs/{index % max(args.seed_objects, 1):06d}.txt"
+        return {
+            "url": f"{server_url}/public/{bucket}/{source}",
+            "filename": f"{index:06d}-{time.monotonic_ns()}.txt",
+            "prefix": "fetched/",
+            "bucket": bucket,
+            "overwrite": True,
+        }
+    return {}
+
+
+def has_error(messages: List[ToolInvokeMessage]) -> Optional[str]:
+    """工具以 JSON 消息中的 error 字段报告失败，没有 JSON 消息时以最后一条文本判断"""
+    for message in messages:
+        if message.type == ToolInvokeMessage.MessageType.JSON:
+            error = message.message.json_object.get("error")
+            return str(error) if error else None
+    if messages and messages[-1].type == ToolInvokeMessage.MessageType.TEXT:
+        text = messages[-1].message.text
+        if "失败" in text or "错误" in text:
+            return text
+    return None if messages else "no output"
+
+
+class ToolBenchmark:
+    """以固定并发调用单个工具并收集统计"""
+
+    def __init__(self, name: str, args: argparse.Namespace, server_url: str, recorder: HttpRecorder):
+        self.name = name
+        self.args = args
+        self.server_url = server_url
+        self.recorder = recorder
+        self.credentials = {"qiniu_access_key": args.access_key, "qiniu_secret_key": args.secret_key}
+        self.latency = LatencyStats()
+        self.http_calls: Dict[str, List[float]] = defaultdict(list)
+        self.http_ms = 0.0
+        self.total_ms = 0.0
+        self.error_samples: List[str] = []
+        self._lock = threading.Lock()
+
+    def invoke_once(self, index: int, record: bool = True) -> None:
+        # 插件运行时为每次调用创建新的工具实例
+        tool = TOOLS[self.name](
+            runtime=ToolRuntime(credentials=dict(self.credentials), user_id=None, session_id=None),
+            session=None,
+        )
+        parameters = tool_parameters(self.name, self.args, self.server_url, index)
+        self.recorder.start()
+        started_at = time.perf_counter()
+        try:
+            messages = list(tool.invoke(parameters))
+            error = has_error(messages)
+        except Exception as ex:
+            error = f"{type(ex).__name__}: {ex}"
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        calls = self.recorder.stop()
+
+        if not record:
+            return
+        with self._lock:
+            if error:
+                self.latency.errors[error[:80]] = self.latency.errors.get(error[:80], 0) + 1
+                return
+            self.latency.latencies_ms.append(elapsed_ms)
+            self.total_ms += elapsed_ms
+            for endpoint, duration in calls:
+                self.http_calls[endpoint].append(duration)
+                self.http_ms += duration
+
+    def run(self, executor: ThreadPoolExecutor) -> dict:
+        list(executor.map(lambda i: self.invoke_once(i, record=False), range(self.args.warmup)))
+        started_at = time.perf_counter()
+        list(executor.map(self.invoke_once, range(self.args.iterations)))
+        wall = time.perf_counter() - started_at
+
+        succeeded = len(self.latency.latencies_ms)
+        summary = self.latency.summary()
+        http_requests = sum(len(durations) for durations in self.http_calls.values())
+        return {
+            "succeeded": succeeded,
+            "errors": self.latency.errors or "-",
+            "p50_ms": summary["p50_ms"],
+            "p90_ms": summary["p90_ms"],
+            "p99_ms": summary["p99_ms"],
+            "ops_per_sec": round(succeeded / wall, 2) if wall else 0,
+            "http_requests_per_op": round(http_requests / succeeded, 2) if succeeded else 0,
+            "http_ms_per_op": round(self.http_ms / succeeded, 2) if succeeded else 0,
+            "tool_ms_per_op": round((self.total_ms - self.http_ms) / succeeded, 2) if succeeded else 0,
+            "http_breakdown": {
+                endpoint: f"{len(durations) / succeeded:.2f} x {sum(durations) / len(durations):.2f}ms"
+                for endpoint, durations in sorted(self.http_calls.items())
+            }
+            if succeeded
+            else "-",
+        }
+
+
+def measure_large_objects(args: argparse.Namespace, server_url: str, tools: List[str]) -> dict:
+    """
+    测量大对象上传和下载时 Python 内存分配的峰值
+
+    Returns:
+        每个工具的峰值内存（MB）和对象大小的比值
+    """
+    size = int(args.large_object_mb * 1024 * 1024)
+    bucket = args.buckets.split(",")[0]
+    credentials = {"qiniu_access_key": args.access_key, "qiniu_secret_key": args.secret_key}
+    results = {"object_mb": args.large_object_mb}
+
+    if "get_file_content" in tools or "file_upload" in tools:
+        auth = qiniu.Auth(args.access_key, args.secret_key)
+        qiniu.put_data(auth.upload_token(bucket, "large/object.bin"), "large/object.bin", b"\0" * size)
+
+    cases = {
+        "file_upload": (QiniuUploadTool, {"content": "x" * size, "filename": "large/upload.txt", "bucket": bucket, "overwrite": True}),
+        # 上传 Dify 文件：从文件地址流式读取（源地址是模拟服务的公开下载地址）
+        "file_upload[file]": (
+            QiniuUploadTool,
+            {
+                "file": {
+                    "dify_model_identity": "__dify__file__",
+                    "url": f"{server_url}/public/{bucket}/large/object.bin",
+                    "filename": "object.bin",
+                    "type": "document",
+                },
+                "filename": "large/upload.bin",
+                "bucket": bucket,
+                "overwrite": True,
+            },
+        ),
+        "get_file_content": (
+            QiniuGetContentTool,
+            {"file_key": "large/object.bin", "domain": download_domain(server_url, bucket), "expire_time": 3600},
+        ),
+    }
+    for name, (tool_class, parameters) in cases.items():
+        if name.split("[")[0] not in tools:
+            continue
+        tool = tool_class(runtime=ToolRuntime(credentials=dict(credentials), user_id=None, session_id=None), session=None)
+        gc.collect()
+        tracemalloc.start()
+        started_at = time.perf_counter()
+        messages = list(tool.invoke(parameters))
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        error = has_error(messages)
+        results[name] = {
+            "peak_alloc_mb": round(peak / 1024 / 1024, 1),
+            "peak_per_object": round(peak / size, 2) if size else 0,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "error": error[:80] if error else None,
+        }
+        del messages
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数。"""
+    parser = argparse.ArgumentParser(description="七牛云存储工具基准测试")
+    parser.add_argument("--tools", default=",".join(TOOLS), help=f"要测试的工具，逗号分隔（{', '.join(TOOLS)}）")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发数")
+    parser.add_argument("--iterations", type=int, default=100, help="每个工具的调用次数")
+    parser.add_argument("--warmup", type=int, default=3, help="每个工具的预热调用次数（不计入结果）")
+    parser.add_argument("--list-limit", type=int, default=100, help="list_bucket_files 每页数量")
+    parser.add_argument("--upload-bytes", type=int, default=4096, help="file_upload 每次上传的内容大小（字节）")
+    parser.add_argument("--large-object-mb", type=float, default=0, help="大对象内存测试的对象大小（MB），0 表示跳过")
+    parser.add_argument("--url", help="使用已启动的模拟服务，不再自动启动")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    add_mock_arguments(parser)
+    parser.set_defaults(seed_objects=500)
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace, server_url: str) -> tuple:
+    tools = [name.strip() for name in args.tools.split(",") if name.strip()]
+    unknown = [name for name in tools if name not in TOOLS]
+    if unknown:
+        raise SystemExit(f"未知的工具: {', '.join(unknown)}")
+
+    # qiniu SDK 的区域查询和空间列表都指向模拟服务，其他服务域名由区域查询结果给出
+    qiniu.config.set_default(default_uc_host=server_url)
+
+    recorder = HttpRecorder()
+    recorder.install()
+    results = {}
+    try:
+        with UsageMeter() as meter, ThreadPoolExecutor(max_workers=max(args.concurrency, 1)) as executor:
+            for name in tools:
+                results[name] = ToolBenchmark(name, args, server_url, recorder).run(executor)
+        if args.large_object_mb > 0:
+            results["large_objects"] = measure_large_objects(args, server_url, tools)
+    finally:
+        recorder.uninstall()
+    return results, meter.usage
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    config = {
+        "tools": args.tools,
+        "concurrency": args.concurrency,
+        "iterations": args.iterations,
+        "list_limit": args.list_limit,
+        "upload_bytes": args.upload_bytes,
+        "seed_objects": args.seed_objects,
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "large_object_mb": args.large_object_mb or "-",
+    }
+
+    if args.url:
+        results, usage = run(args, args.url)
+    else:
+        with start_mock_server("mock_storage_server.py", mock_arguments(args)) as server:
+            results, usage = run(args, server.url)
+
+    print_report("七牛云存储工具基准测试", config, results, usage, as_json=args.json)
+
+
+if __name__ == "__main__":
+    main()
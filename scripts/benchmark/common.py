@@ -0,0 +1,199 @@
+"""
+基准测试公共工具
+
+- 统计：分位数、进程 CPU 时间和内存占用
+- 启动独立进程中的模拟服务，避免模拟服务占用被测进程的 CPU
+- 报告输出
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCHMARK_DIR.parent.parent
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    计算分位数（线性插值）
+
+    Args:
+        values: 样本
+        pct: 百分位，0-100
+
+    Returns:
+        分位数，样本为空时返回 0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def current_rss_mb() -> float:
+    """当前进程的常驻内存（MB），无法读取 /proc 时返回峰值"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+@dataclass
+class ProcessUsage:
+    """一段时间内被测进程的资源消耗"""
+
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rss_start_mb: float = 0.0
+    rss_end_mb: float = 0.0
+    rss_peak_mb: float = 0.0
+
+    @property
+    def cpu_percent(self) -> float:
+        return self.cpu_seconds / self.wall_seconds * 100 if self.wall_seconds else 0.0
+
+
+class UsageMeter:
+    """记录被测代码段的墙钟时间、CPU 时间和内存"""
+
+    def __enter__(self) -> "UsageMeter":
+        self.usage = ProcessUsage(rss_start_mb=current_rss_mb())
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.usage.wall_seconds = time.perf_counter() - self._wall
+        self.usage.cpu_seconds = time.process_time() - self._cpu
+        self.usage.rss_end_mb = current_rss_mb()
+        self.usage.rss_peak_mb = max(peak_rss_mb(), self.usage.rss_end_mb)
+
+
+@dataclass
+class LatencyStats:
+    """请求延迟和错误统计"""
+
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def add_error(self, ex: BaseException) -> None:
+        name = type(ex).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self) -> dict:
+        return {
+            "count": len(self.latencies_ms),
+            "p50_ms": round(percentile(self.latencies_ms, 50), 2),
+            "p90_ms": round(percentile(self.latencies_ms, 90), 2),
+            "p99_ms": round(percentile(self.latencies_ms, 99), 2),
+            "max_ms": round(max(self.latencies_ms, default=0.0), 2),
+        }
+
+
+def start_mock_server(script: str, args: List[str]) -> "MockServerProcess":
+    """
+    在独立进程中启动模拟服务
+
+    模拟服务启动后在标准输出的第一行打印监听地址
+
+    Args:
+        script: benchmark 目录下的脚本文件名
+        args: 命令行参数
+
+    Returns:
+        模拟服务进程
+    """
+    process = subprocess.Popen(
+        [sys.executable, str(BENCHMARK_DIR / script), "--port", "0", *args],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = process.stdout.readline().strip()
+    if not line.startswith("http"):
+        process.kill()
+        raise RuntimeError(f"模拟服务启动失败: {script} {line}")
+    return MockServerProcess(process, line)
+
+
+class MockServerProcess:
+    """独立进程中运行的模拟服务"""
+
+    def __init__(self, process: subprocess.Popen, url: str):
+        self.process = process
+        self.url = url
+
+    def close(self) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def __enter__(self) -> "MockServerProcess":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def parse_key_values(items: Optional[List[str]]) -> Dict[str, str]:
+    """解析重复出现的 KEY=VALUE 参数"""
+    result = {}
+    for item in items or []:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"参数格式应为 KEY=VALUE: {item}")
+        result[key.strip()] = value.strip()
+    return result
+
+
+def print_report(title: str, config: dict, results: dict, usage: ProcessUsage, as_json: bool = False) -> None:
+    """
+    输出基准测试报告
+
+    Args:
+        title: 报告标题
+        config: 测试配置
+        results: 测试结果
+        usage: 被测进程资源消耗
+        as_json: 是否以 JSON 输出（便于比较不同版本的结果）
+    """
+    resources = {
+        "wall_seconds": round(usage.wall_seconds, 3),
+        "cpu_seconds": round(usage.cpu_seconds, 3),
+        "cpu_percent": round(usage.cpu_percent, 1),
+        "rss_start_mb": round(usage.rss_start_mb, 1),
+        "rss_end_mb": round(usage.rss_end_mb, 1),
+        "rss_peak_mb": round(usage.rss_peak_mb, 1),
+    }
+    if as_json:
+        print(json.dumps({"benchmark": title, "config": config, "results": results, "resources": resources}, indent=2))
+        return
+
+    print("=" * 70)
+    print(title)
+    print("=" * 70)
+    for section, values in (("配置", config), ("结果", results), ("资源", resources)):
+        print(f"{section}:")
+        for key, value in values.items():
+            print(f"  {key:<24} {value}")
+    print("=" * 70)
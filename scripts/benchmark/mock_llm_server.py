@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+OpenAI 兼容的本地模拟 LLM 服务
+
+实现 POST /v1/chat/completions 和 GET /v1/models，用于离线测量插件自身的开销：
+- 首 token 延迟（TTFT）和输出速度可配置
+- 按比例返回工具调用流、500 错误和 429 限流
+- 流式和非流式响应都带 usage
+
+用法：
+    python scripts/benchmark/mock_llm_server.py --port 8900 --ttft-ms 200 --tokens-per-sec 80
+
+启动后在标准输出的第一行打印 API 地址（--port 0 时随机选择端口）。
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+@dataclass
+class MockConfig:
+    """模拟服务的行为配置"""
+
+    ttft_ms: float = 50.0
+    tokens_per_sec: float = 500.0
+    output_tokens: int = 200
+    tool_call_rate: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: int = 1
+    seed: Optional[int] = None
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """处理 OpenAI 兼容请求"""
+
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写入，开启 Nagle 算法时会与客户端的延迟确认叠加出约 40ms 的延迟
+    disable_nagle_algorithm = True
+    server: "MockLLMServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+            return
+        self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        config = self.server.config
+        roll = self.server.random()
+        if roll < config.rate_limit_rate:
+            self._send_json(
+                429,
+                {"error": {"message": "rate limited", "type": "rate_limit_error"}},
+                headers={"Retry-After": str(config.retry_after)},
+            )
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._send_json(500, {"error": {"message": "mock upstream error", "type": "server_error"}})
+            return
+
+        use_tools = bool(body.get("tools")) and self.server.random() < config.tool_call_rate
+        prompt_tokens = max(len(json.dumps(body.get("messages", []))) // 4, 1)
+        if body.get("stream"):
+            self._stream(body, prompt_tokens, use_tools)
+        else:
+            self._complete(body, prompt_tokens, use_tools)
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _usage(self, prompt_tokens: int, completion_tokens: int) -> dict:
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _tool_call(self, body: dict) -> dict:
+        function = body["tools"][0].get("function", {})
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": function.get("name", "tool"), "arguments": json.dumps({"query": "benchmark"})},
+        }
+
+    def _complete(self, body: dict, prompt_tokens: int, use_tools: bool) -> None:
+        config = self.server.config
+        time.sleep((config.ttft_ms + config.output_tokens / config.tokens_per_sec * 1000) / 1000)
+
+        message = {"role": "assistant", "content": ""}
+        if use_tools:
+            message["tool_calls"] = [self._tool_call(body)]
+            finish_reason = "tool_calls"
+        else:
+            message["content"] = "".join(token_text(i) for i in range(config.output_tokens))
+            finish_reason = "stop"
+
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": self._usage(prompt_tokens, config.output_tokens),
+            },
+        )
+
+    def _stream(self, body: dict, prompt_tokens: int, use_tools: bool) -> None:
+        config = self.server.config
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", "mock")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(delta: dict, finish_reason: Optional[str] = None, usage: Optional[dict] = None) -> None:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        try:
+            time.sleep(config.ttft_ms / 1000)
+            pieces = tool_call_deltas(self._tool_call(body)) if use_tools else None
+            total = len(pieces) if pieces else config.output_tokens
+
+            # 按目标速度发送，落后时不再等待
+            started_at = time.monotonic()
+            for index in range(total):
+                delay = started_at + index / config.tokens_per_sec - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                send(pieces[index] if pieces else {"content": token_text(index)})
+
+            send({}, "tool_calls" if pieces else "stop", self._usage(prompt_tokens, total))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def token_text(index: int) -> str:
+    """第 index 个模拟 token 的文本"""
+    return f"tok{index} "
+
+
+def tool_call_deltas(tool_call: dict, fragment_size: int = 8) -> List[dict]:
+    """把工具调用拆分为 OpenAI 流式格式的多个增量"""
+    arguments = tool_call["function"]["arguments"]
+    deltas = [
+        {
+            "tool_calls": [
+                {
+                    "index": 0,
+                    "id": tool_call["id"],
+                    "type": "function",
+                    "function": {"name": tool_call["function"]["name"], "arguments": ""},
+                }
+            ]
+        }
+    ]
+    for start in range(0, len(arguments), fragment_size):
+        deltas.append(
+            {"tool_calls": [{"index": 0, "function": {"arguments": arguments[start : start + fragment_size]}}]}
+        )
+    return deltas
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """模拟 LLM 服务"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, MockLLMHandler)
+        self.config = config
+        self._random = random.Random(config.seed)
+        self._random_lock = threading.Lock()
+
+    def random(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数。"""
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地模拟 LLM 服务")
+    add_mock_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8900, help="监听端口，0 表示随机端口")
+    return parser.parse_args(argv)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加模拟服务行为参数，基准测试脚本复用"""
+    defaults = MockConfig()
+    parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms, help="首 token 延迟（毫秒）")
+    parser.add_argument("--tokens-per-sec", type=float, default=defaults.tokens_per_sec, help="输出速度（token/秒）")
+    parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens, help="每次回复的 token 数")
+    parser.add_argument("--tool-call-rate", type=float, default=defaults.tool_call_rate, help="带工具的请求返回工具调用的比例")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="返回 500 错误的比例")
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate, help="返回 429 限流的比例")
+    parser.add_argument("--retry-after", type=int, default=defaults.retry_after, help="429 响应的 Retry-After（秒）")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="随机种子，便于复现")
+
+
+def mock_arguments(args: argparse.Namespace) -> List[str]:
+    """把解析后的行为参数还原为命令行参数，用于启动独立进程中的模拟服务"""
+    result = [
+        "--ttft-ms", str(args.ttft_ms),
+        "--tokens-per-sec", str(args.tokens_per_sec),
+        "--output-tokens", str(args.output_tokens),
+        "--tool-call-rate", str(args.tool_call_rate),
+        "--error-rate", str(args.error_rate),
+        "--rate-limit-rate", str(args.rate_limit_rate),
+        "--retry-after", str(args.retry_after),
+    ]
+    if args.seed is not None:
+        result += ["--seed", str(args.seed)]
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    config = MockConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=max(args.tokens_per_sec, 0.001),
+        output_tokens=max(args.output_tokens, 1),
+        tool_call_rate=args.tool_call_rate,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    server = MockLLMServer((args.host, args.port), config)
+    print(server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,689 @@
+#!/usr/bin/env python3
+"""
+本地模拟七牛云对象存储服务
+
+在一个端口上实现存储工具用到的接口，qiniu SDK 和 requests 都可以指向它：
+- UC：GET /v4/query（区域查询，所有服务域名都指向本服务）、POST /buckets
+- RSF：GET /list（分页列举，支持 prefix / marker / limit / delimiter）
+- RS：/stat/<entry>、/delete/<entry>、/copy/<src>/<dest>、/move/<src>/<dest>、POST /batch
+- UP：POST /（表单上传，校验上传凭证的签名、scope 和 insertOnly）、/buckets/<bucket>/objects/<key>/uploads[/<id>[/<n>]]（分片上传 v2）
+- 抓取：POST /fetch/<url>/to/<entry>（同步）、POST / GET /sisyphus/fetch（异步任务和状态查询），由本服务下载源地址
+- 下载：GET /download/<bucket>/<key>?e=<deadline>&token=<ak:sign>（校验私有下载签名）
+- 公开下载：GET /public/<bucket>/<key>（不校验签名，可作为抓取的源地址）
+
+数据保存在内存中。管理接口只校验 Authorization 中的 Access Key，不校验签名。
+上传时的自定义元数据（x-qn-meta-*）保存在对象上，下载时作为响应头返回。下载支持 HEAD 和 Range 请求。
+
+用法：
+    python scripts/benchmark/mock_storage_server.py --port 8901 --buckets bench,media --seed-objects 1000
+
+启动后在标准输出的第一行打印服务地址（--port 0 时随机选择端口）。
+让 qiniu SDK 使用本服务：
+    qiniu.config.set_default(default_uc_host=url)
+存储工具的域名参数使用 download_domain(url, bucket) 的返回值。
+"""
+
+import argparse
+import base64
+import email.parser
+import email.policy
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_ACCESS_KEY = "mock-access-key"
+DEFAULT_SECRET_KEY = "mock-secret-key"
+BLOCK_SIZE = 4 * 1024 * 1024
+# 七牛云接口的特有状态码
+STATUS_BAD_TOKEN = 401
+STATUS_FILE_EXISTS = 614
+STATUS_NO_SUCH_ENTRY = 612
+STATUS_NO_SUCH_BUCKET = 631
+STATUS_SOURCE_ERROR = 478
+
+
+def urlsafe_b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def urlsafe_b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def qetag(data: bytes) -> str:
+    """计算七牛云 etag：不超过 4MB 时为 SHA1，否则为各 4MB 分块 SHA1 拼接后的 SHA1"""
+    if len(data) <= BLOCK_SIZE:
+        return urlsafe_b64encode(b"\x16" + hashlib.sha1(data).digest())
+    digests = b"".join(hashlib.sha1(data[i : i + BLOCK_SIZE]).digest() for i in range(0, len(data), BLOCK_SIZE))
+    return urlsafe_b64encode(b"\x96" + hashlib.sha1(digests).digest())
+
+
+def download_domain(url: str, bucket: str) -> str:
+    """存储工具访问某个空间时使用的域名（含协议和路径前缀）"""
+    return f"{url.rstrip('/')}/download/{bucket}"
+
+
+@dataclass
+class StoredObject:
+    """存储的对象"""
+
+    data: bytes
+    mime_type: str
+    put_time: int
+    hash: str
+    metadata: Optional[Dict[str, str]] = None
+
+    def stat(self) -> dict:
+        return {
+            "fsize": len(self.data),
+            "hash": self.hash,
+            "mimeType": self.mime_type,
+            "putTime": self.put_time,
+            "type": 0,
+            "status": 0,
+            "md5": hashlib.md5(self.data).hexdigest(),
+            **({"x-qn-meta": self.metadata} if self.metadata else {}),
+        }
+
+    def headers(self) -> dict:
+        """下载响应头：ETag 和自定义元数据"""
+        return {"ETag": f'"{self.hash}"', **(self.metadata or {})}
+
+
+@dataclass
+class StorageConfig:
+    """模拟服务的行为配置"""
+
+    access_key: str = DEFAULT_ACCESS_KEY
+    secret_key: str = DEFAULT_SECRET_KEY
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class MockStorage:
+    """线程安全的内存对象存储"""
+
+    def __init__(self, buckets: List[str]):
+        self._lock = threading.Lock()
+        self.buckets: Dict[str, Dict[str, StoredObject]] = {name: {} for name in buckets}
+
+    def put(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        mime_type: str = "",
+        insert_only: bool = False,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, dict]:
+        with self._lock:
+            objects = self.buckets.get(bucket)
+            if objects is None:
+                return STATUS_NO_SUCH_BUCKET, {"error": "no such bucket"}
+            if insert_only and key in objects:
+                return STATUS_FILE_EXISTS, {"error": "file exists"}
+            stored = StoredObject(
+                data=data,
+                mime_type=mime_type or "application/octet-stream",
+                put_time=time.time_ns() // 100,
+                hash=qetag(data),
+                metadata=metadata or None,
+            )
+            objects[key] = stored
+        return 200, {"hash": stored.hash, "key": key}
+
+    def get(self, bucket: str, key: str) -> Optional[StoredObject]:
+        with self._lock:
+            return self.buckets.get(bucket, {}).get(key)
+
+    def delete(self, bucket: str, key: str) -> int:
+        with self._lock:
+            objects = self.buckets.get(bucket)
+            if objects is None:
+                return STATUS_NO_SUCH_BUCKET
+            return 200 if objects.pop(key, None) else STATUS_NO_SUCH_ENTRY
+
+    def list(self, bucket: str, prefix: str, marker: str, limit: int, delimiter: str) -> Optional[dict]:
+        with self._lock:
+            objects = self.buckets.get(bucket)
+            if objects is None:
+                return None
+            keys = sorted(key for key in objects if key.startswith(prefix))
+            start_after = urlsafe_b64decode(marker).decode() if marker else ""
+
+            items, prefixes, last = [], [], ""
+            for key in keys:
+                if key <= start_after:
+                    continue
+                if len(items) + len(prefixes) >= limit:
+                    break
+                last = key
+                if delimiter:
+                    index = key.find(delimiter, len(prefix))
+                    if index >= 0:
+                        common = key[: index + len(delimiter)]
+                        if common not in prefixes:
+                            prefixes.append(common)
+                        continue
+                items.append({"key": key, **objects[key].stat()})
+
+            has_more = bool(last) and last != keys[-1]
+        result = {"items": items, "marker": urlsafe_b64encode(last.encode()) if has_more else ""}
+        if delimiter:
+            result["commonPrefixes"] = prefixes
+        return result
+
+
+class MockStorageHandler(BaseHTTPRequestHandler):
+    """处理七牛云存储接口请求"""
+
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写入，开启 Nagle 算法时会与客户端的延迟确认叠加出约 40ms 的延迟
+    disable_nagle_algorithm = True
+    server: "MockStorageServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_HEAD(self):
+        self._dispatch("HEAD")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str) -> None:
+        parts = urlsplit(self.path)
+        path, query = parts.path, parse_qs(parts.query)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        config = self.server.config
+        if config.latency_ms > 0:
+            time.sleep(config.latency_ms / 1000)
+        if self.server.random() < config.error_rate:
+            self._send_json(503, {"error": "mock service unavailable"})
+            return
+
+        if path == "/v4/query":
+            self._send_json(200, self.server.query_region())
+        elif path.startswith("/download/"):
+            self._download(path, parts.query, query, method)
+        elif path.startswith("/public/"):
+            self._public(path, method)
+        elif method == "POST" and path == "/":
+            self._upload(body)
+        elif path.startswith("/buckets/") and "/uploads" in path:
+            self._multipart_upload(method, path, body)
+        elif not self._check_management_auth():
+            self._send_json(STATUS_BAD_TOKEN, {"error": "bad token"})
+        elif path == "/buckets":
+            self._send_json(200, sorted(self.server.storage.buckets))
+        elif path == "/list":
+            self._list(query)
+        elif path == "/batch":
+            self._batch(body)
+        elif path.startswith("/fetch/"):
+            self._fetch(path)
+        elif path == "/sisyphus/fetch":
+            self._async_fetch(method, query, body)
+        else:
+            status, payload = self.server.operate(path)
+            self._send_json(status, payload)
+
+    def _send_json(self, status: int, payload, headers: Optional[dict] = None) -> None:
+        self._send(status, json.dumps(payload).encode(), "application/json", headers)
+
+    def _send(self, status: int, data: bytes, content_type: str, headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        # 所有响应都带上请求 ID，SDK 以此判断响应来自七牛云
+        self.send_header("X-Reqid", f"mock-{time.monotonic_ns()}")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _check_management_auth(self) -> bool:
+        authorization = self.headers.get("Authorization", "")
+        scheme, _, credential = authorization.partition(" ")
+        return scheme in ("Qiniu", "QBox") and credential.split(":", 1)[0] == self.server.config.access_key
+
+    def _list(self, query: dict) -> None:
+        def first(name: str, default: str = "") -> str:
+            return query.get(name, [default])[0]
+
+        limit = max(1, min(int(first("limit", "1000") or 1000), 1000))
+        result = self.server.storage.list(first("bucket"), first("prefix"), first("marker"), limit, first("delimiter"))
+        if result is None:
+            self._send_json(STATUS_NO_SUCH_BUCKET, {"error": "no such bucket"})
+            return
+        self._send_json(200, result)
+
+    def _batch(self, body: bytes) -> None:
+        operations = parse_qs(body.decode()).get("op", [])
+        results = []
+        for operation in operations:
+            status, payload = self.server.operate("/" + operation.lstrip("/"))
+            results.append({"code": status, "data": payload} if payload else {"code": status})
+        self._send_json(200, results)
+
+    def _fetch(self, path: str) -> None:
+        segments = path.strip("/").split("/")
+        try:
+            url = urlsafe_b64decode(segments[1]).decode()
+            bucket, key = urlsafe_b64decode(segments[3]).decode().split(":", 1)
+        except (IndexError, ValueError):
+            self._send_json(400, {"error": "invalid fetch path"})
+            return
+        status, payload = self.server.fetch(url, bucket, key)
+        self._send_json(status, payload)
+
+    def _async_fetch(self, method: str, query: dict, body: bytes) -> None:
+        if method == "GET":
+            job = self.server.fetch_job(query.get("id", [""])[0])
+            if job is None:
+                self._send_json(404, {"error": "no such job"})
+                return
+            self._send_json(200, job)
+            return
+
+        try:
+            request = json.loads(body)
+            url, bucket = request["url"], request["bucket"]
+        except (KeyError, TypeError, json.JSONDecodeError):
+            self._send_json(400, {"error": "invalid request body"})
+            return
+        if bucket not in self.server.storage.buckets:
+            self._send_json(STATUS_NO_SUCH_BUCKET, {"error": "no such bucket"})
+            return
+        key = request.get("key") or urlsplit(url).path.rsplit("/", 1)[-1]
+        job_id = self.server.submit_fetch(url, bucket, key, insert_only=bool(request.get("ignore_same_key")))
+        self._send_json(200, {"id": job_id, "wait": 0})
+
+    def _upload(self, body: bytes) -> None:
+        fields = parse_multipart(self.headers.get("Content-Type", ""), body)
+        token = fields.get("token", (b"", ""))[0].decode()
+        policy = self.server.verify_upload_token(token)
+        if policy is None:
+            self._send_json(STATUS_BAD_TOKEN, {"error": "bad token"})
+            return
+
+        bucket, _, scope_key = policy.get("scope", "").partition(":")
+        key = fields["key"][0].decode() if "key" in fields else scope_key
+        if not key_in_scope(policy, key):
+            self._send_json(403, {"error": "key doesn't match with scope"})
+            return
+
+        data, mime_type = fields.get("file", (b"", ""))
+        metadata = {name: value.decode() for name, (value, _) in fields.items() if name.startswith("x-qn-meta-")}
+        status, payload = self.server.storage.put(
+            bucket, key, data, mime_type, insert_only=bool(policy.get("insertOnly")), metadata=metadata
+        )
+        self._send_json(status, payload)
+
+    def _multipart_upload(self, method: str, path: str, body: bytes) -> None:
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        policy = self.server.verify_upload_token(token) if scheme == "UpToken" else None
+        if policy is None:
+            self._send_json(STATUS_BAD_TOKEN, {"error": "bad token"})
+            return
+
+        # /buckets/<bucket>/objects/<key>/uploads[/<upload_id>[/<part_number>]]
+        segments = path.strip("/").split("/")
+        try:
+            bucket = segments[1]
+            key = "" if segments[3] == "~" else urlsafe_b64decode(segments[3]).decode()
+        except (IndexError, ValueError):
+            self._send_json(400, {"error": "invalid upload path"})
+            return
+        if bucket != policy.get("scope", "").partition(":")[0] or not key_in_scope(policy, key):
+            self._send_json(403, {"error": "key doesn't match with scope"})
+            return
+
+        upload_id = segments[5] if len(segments) > 5 else None
+        if upload_id is None and method == "POST":
+            self._send_json(200, self.server.create_upload(bucket, key))
+        elif len(segments) == 7 and method == "PUT":
+            if not self.server.put_part(upload_id, int(segments[6]), body):
+                self._send_json(612, {"error": "no such uploadId"})
+                return
+            self._send_json(200, {"etag": qetag(body), "md5": hashlib.md5(body).hexdigest()})
+        elif upload_id and method == "POST":
+            try:
+                request = json.loads(body)
+                numbers = [part["partNumber"] for part in request["parts"]]
+            except (KeyError, TypeError, json.JSONDecodeError):
+                self._send_json(400, {"error": "invalid request body"})
+                return
+            data = self.server.complete_upload(upload_id, numbers)
+            if data is None:
+                self._send_json(612, {"error": "no such uploadId or part"})
+                return
+            status, payload = self.server.storage.put(
+                bucket,
+                key,
+                data,
+                request.get("mimeType") or "",
+                insert_only=bool(policy.get("insertOnly")),
+                metadata=request.get("metadata"),
+            )
+            self._send_json(status, payload)
+        elif upload_id and method == "DELETE":
+            self.server.complete_upload(upload_id, [])
+            self._send_json(200, {})
+        else:
+            self._send_json(400, {"error": "unsupported upload request"})
+
+    def _download(self, path: str, raw_query: str, query: dict, method: str) -> None:
+        _, _, bucket, key = unquote(path).split("/", 3)
+        deadline = query.get("e", ["0"])[0]
+        token = query.get("token", [""])[0]
+        signed = raw_query.rsplit("&token=", 1)[0]
+        # 签名使用的是未编码的 URL，请求时可能被编码
+        valid = any(
+            self.server.verify_download_token(f"http://{self.headers.get('Host')}{signed_path}?{signed}", token)
+            for signed_path in (path, unquote(path))
+        )
+        if not valid or int(deadline) < time.time():
+            self._send_json(401, {"error": "token out of date or invalid"})
+            return
+
+        stored = self.server.storage.get(bucket, key)
+        if stored is None:
+            self._send_json(404, {"error": "Document not found"})
+            return
+        self._send_object(stored, method)
+
+
+    def _public(self, path: str, method: str) -> None:
+        try:
+            _, _, bucket, key = unquote(path).split("/", 3)
+        except ValueError:
+            self._send_json(404, {"error": "Document not found"})
+            return
+        stored = self.server.storage.get(bucket, key)
+        if stored is None:
+            self._send_json(404, {"error": "Document not found"})
+            return
+        self._send_object(stored, method)
+
+
+    def _send_object(self, stored: StoredObject, method: str) -> None:
+        """返回对象内容，支持单个 Range（bytes=start-end / bytes=start-）"""
+        data, status, headers = stored.data, 200, {**stored.headers(), "Accept-Ranges": "bytes"}
+        byte_range = self.headers.get("Range", "")
+        if byte_range.startswith("bytes="):
+            start_text, _, end_text = byte_range[len("bytes="):].partition("-")
+            try:
+                start = int(start_text)
+                end = min(int(end_text) if end_text else len(data) - 1, len(data) - 1)
+            except ValueError:
+                start, end = -1, -1
+            if start < 0 or start >= len(data) or end < start:
+                self._send(416, b"", stored.mime_type, {"Content-Range": f"bytes */{len(data)}"})
+                return
+            data, status = data[start : end + 1], 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(stored.data)}"
+        self._send(status, data if method == "GET" else b"", stored.mime_type, headers)
+
+
+def key_in_scope(policy: dict, key: str) -> bool:
+    """上传的 key 是否符合上传策略的 scope"""
+    scope_key = policy.get("scope", "").partition(":")[2]
+    return not scope_key or policy.get("isPrefixalScope") == 1 or key == scope_key
+
+
+def parse_multipart(content_type: str, body: bytes) -> Dict[str, Tuple[bytes, str]]:
+    """解析 multipart/form-data，返回 {字段名: (内容, Content-Type)}"""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = (part.get_payload(decode=True) or b"", part.get_content_type())
+    return fields
+
+
+class MockStorageServer(ThreadingHTTPServer):
+    """模拟七牛云对象存储服务"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config: StorageConfig, storage: MockStorage):
+        super().__init__(address, MockStorageHandler)
+        self.config = config
+        self.storage = storage
+        self._random = random.Random(config.seed)
+        self._random_lock = threading.Lock()
+        self._fetch_jobs: Dict[str, dict] = {}
+        self._uploads: Dict[str, Dict[int, bytes]] = {}
+        self._uploads_lock = threading.Lock()
+        self._fetch_jobs_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def random(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    def _sign(self, data: str) -> str:
+        return urlsafe_b64encode(hmac.new(self.config.secret_key.encode(), data.encode(), hashlib.sha1).digest())
+
+    def query_region(self) -> dict:
+        host, port = self.server_address[:2]
+        domains = {"domains": [f"{host}:{port}"]}
+        return {
+            "hosts": [
+                {
+                    "region": "mock",
+                    "ttl": 86400,
+                    **{service: domains for service in ("up", "io", "rs", "rsf", "api", "uc", "s3")},
+                }
+            ]
+        }
+
+    def verify_upload_token(self, token: str) -> Optional[dict]:
+        """校验上传凭证，返回上传策略"""
+        try:
+            access_key, sign, encoded_policy = token.split(":")
+            policy = json.loads(urlsafe_b64decode(encoded_policy))
+        except (ValueError, json.JSONDecodeError):
+            return None
+        if access_key != self.config.access_key or not hmac.compare_digest(sign, self._sign(encoded_policy)):
+            return None
+        if int(policy.get("deadline", 0)) < time.time():
+            return None
+        return policy
+
+    def verify_download_token(self, url: str, token: str) -> bool:
+        access_key, _, sign = token.partition(":")
+        return access_key == self.config.access_key and hmac.compare_digest(sign, self._sign(url))
+
+    def create_upload(self, bucket: str, key: str) -> dict:
+        """创建分片上传任务"""
+        upload_id = uuid.uuid4().hex
+        with self._uploads_lock:
+            self._uploads[upload_id] = {}
+        return {"uploadId": upload_id, "expireAt": int(time.time()) + 7 * 86400}
+
+    def put_part(self, upload_id: str, part_number: int, data: bytes) -> bool:
+        with self._uploads_lock:
+            parts = self._uploads.get(upload_id)
+            if parts is None:
+                return False
+            parts[part_number] = data
+            return True
+
+    def complete_upload(self, upload_id: str, part_numbers: List[int]) -> Optional[bytes]:
+        """结束分片上传任务，按给定顺序拼接分片"""
+        with self._uploads_lock:
+            parts = self._uploads.pop(upload_id, None)
+        if parts is None or any(number not in parts for number in part_numbers):
+            return None
+        return b"".join(parts[number] for number in part_numbers)
+
+    def fetch(self, url: str, bucket: str, key: str, insert_only: bool = False) -> Tuple[int, dict]:
+        """下载源地址并保存到空间，返回与七牛云 fetch 接口相同的结果"""
+        if bucket not in self.storage.buckets:
+            return STATUS_NO_SUCH_BUCKET, {"error": "no such bucket"}
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                data = response.read()
+                mime_type = response.headers.get_content_type()
+        except (urllib.error.URLError, ValueError, OSError) as ex:
+            return STATUS_SOURCE_ERROR, {"error": f"fetch source failed: {ex}"}
+
+        status, payload = self.storage.put(bucket, key, data, mime_type, insert_only=insert_only)
+        if status != 200:
+            return status, payload
+        stored = self.storage.get(bucket, key)
+        return 200, {"key": key, "hash": stored.hash, "fsize": len(stored.data), "mimeType": stored.mime_type}
+
+    def submit_fetch(self, url: str, bucket: str, key: str, insert_only: bool) -> str:
+        """创建异步抓取任务，在后台线程中执行"""
+        job_id = uuid.uuid4().hex
+        with self._fetch_jobs_lock:
+            self._fetch_jobs[job_id] = {"id": job_id, "wait": 0}
+
+        def run() -> None:
+            self.fetch(url, bucket, key, insert_only=insert_only)
+            with self._fetch_jobs_lock:
+                # 与七牛云一致：wait 为 -1 表示任务已被处理，是否成功需要查询文件
+                self._fetch_jobs[job_id]["wait"] = -1
+
+        threading.Thread(target=run, daemon=True).start()
+        return job_id
+
+    def fetch_job(self, job_id: str) -> Optional[dict]:
+        with self._fetch_jobs_lock:
+            job = self._fetch_jobs.get(job_id)
+            return dict(job) if job else None
+
+    def operate(self, path: str) -> Tuple[int, Optional[dict]]:
+        """执行单个资源管理操作（也用于 batch 中的操作）"""
+        segments = path.strip("/").split("/")
+        command, args = segments[0], segments[1:]
+        try:
+            entries = [urlsafe_b64decode(arg).decode().split(":", 1) for arg in args[:2]]
+        except ValueError:
+            return 400, {"error": "invalid entry"}
+
+        if command == "stat" and entries:
+            stored = self.storage.get(*entries[0])
+            return (200, stored.stat()) if stored else (STATUS_NO_SUCH_ENTRY, {"error": "no such file or directory"})
+        if command == "delete" and entries:
+            status = self.storage.delete(*entries[0])
+            return status, None if status == 200 else {"error": "no such file or directory"}
+        if command in ("copy", "move") and len(entries) == 2:
+            stored = self.storage.get(*entries[0])
+            if stored is None:
+                return STATUS_NO_SUCH_ENTRY, {"error": "no such file or directory"}
+            force = "force/true" in path
+            status, payload = self.storage.put(
+                *entries[1], stored.data, stored.mime_type, insert_only=not force, metadata=stored.metadata
+            )
+            if status != 200:
+                return status, payload
+            if command == "move":
+                self.storage.delete(*entries[0])
+            return 200, None
+        return 400, {"error": f"unsupported operation: {command}"}
+
+
+def seed_objects(storage: MockStorage, bucket: str, count: int, size: int, prefix: str = "docs/") -> None:
+    """在空间中预置对象，用于列举和下载测试"""
+    payload = (b"qiniu benchmark object\n" * (size // 23 + 1))[:size]
+    for index in range(count):
+        storage.put(bucket, f"{prefix}{index:06d}.txt", payload, "text/plain")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数。"""
+    parser = argparse.ArgumentParser(description="本地模拟七牛云对象存储服务")
+    add_mock_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8901, help="监听端口，0 表示随机端口")
+    return parser.parse_args(argv)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加模拟服务行为参数，基准测试脚本复用"""
+    defaults = StorageConfig()
+    parser.add_argument("--access-key", default=defaults.access_key, help="接受的 Access Key")
+    parser.add_argument("--secret-key", default=defaults.secret_key, help="用于校验签名的 Secret Key")
+    parser.add_argument("--buckets", default="bench", help="存储空间列表，逗号分隔")
+    parser.add_argument("--seed-objects", type=int, default=0, help="在第一个空间的 docs/ 下预置的对象数")
+    parser.add_argument("--seed-object-size", type=int, default=1024, help="预置对象的大小（字节）")
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="每个请求的附加延迟（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="返回 503 错误的比例")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="随机种子，便于复现")
+
+
+def mock_arguments(args: argparse.Namespace) -> List[str]:
+    """把解析后的行为参数还原为命令行参数，用于启动独立进程中的模拟服务"""
+    result = [
+        "--access-key", args.access_key,
+        "--secret-key", args.secret_key,
+        "--buckets", args.buckets,
+        "--seed-objects", str(args.seed_objects),
+        "--seed-object-size", str(args.seed_object_size),
+        "--latency-ms", str(args.latency_ms),
+        "--error-rate", str(args.error_rate),
+    ]
+    if args.seed is not None:
+        result += ["--seed", str(args.seed)]
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    buckets = [name.strip() for name in args.buckets.split(",") if name.strip()]
+    storage = MockStorage(buckets)
+    if buckets and args.seed_objects > 0:
+        seed_objects(storage, buckets[0], args.seed_objects, args.seed_object_size)
+
+    config = StorageConfig(
+        access_key=args.access_key,
+        secret_key=args.secret_key,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server = MockStorageServer((args.host, args.port), config, storage)
+    print(server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -31,8 +31,29 @@
 │   ├─ temperature            →   使用模板 "temperature"              │
 │   ├─ top_p                  →   使用模板 "top_p"                    │
 │   └─ max_tokens             →   使用模板 "max_tokens"               │
+│ model_constraints           → max_tokens 的 max / default           │
+│   └─ max_output_tokens      →   max（default 取 min(max, 4096)）    │
+│ pricing                     → pricing (每百万 token 价格)           │
+│   ├─ input / prompt         →   input                               │
+│   ├─ output / completion    →   output                              │
+│   ├─ cached_input           →   extra.cached_input_price            │
+│   └─ currency               →   currency (默认 USD)                 │
+│ performance                 → extra (插件自用，Dify 不读取)         │
+│   ├─ throughput             →   throughput (tokens/s)               │
+│   └─ latency                →   latency (首 token 延迟, ms)         │
+│ id (思考模型)               → parameter_rules 追加 reasoning_mode   │
+│ id (按模型家族)             → extra.prompt_cache                    │
+│   ├─ claude                 →   explicit (需要 cache_control 标记)  │
+│   └─ deepseek / qwen        →   implicit (上游自动缓存)             │
 └─────────────────────────────────────────────────────────────────────┘
 
+可选字段兼容多种命名（缺失时不输出对应配置）：
+- 输出上限：model_constraints.max_output_tokens / max_completion_tokens / max_tokens，
+  或 top_provider.max_completion_tokens
+- 价格：pricing.input / pricing.output / pricing.cached_input 按 pricing.unit 个 token 计价
+  （默认每百万 token）；pricing.prompt / pricing.completion / pricing.input_cache_read 按每 token 计价
+- 性能：performance / stats 中的 throughput / tokens_per_second、latency / ttft_ms
+
 文件名转换规则：
 - 模型 ID 可能包含特殊字符（如 /、:、空格等）
 - 转换规则：将特殊字符替换为连字符 (-)
@@ -45,13 +66,24 @@
 - 如果输入模态包含 image，额外添加 "vision"
 
 文件管理策略：
+- 所有配置先在内存中渲染，再用内容哈希（SHA-256）与磁盘上的文件比较，只写入真正变化的文件
 - 新增：创建新的 YAML 文件
-- 更新：覆盖现有 YAML 文件（保持最新数据）
+- 更新：仅当解析后的配置内容发生变化时才算作更新（仅格式差异只重写文件，不计入变更）
 - 删除：移除不在 API 列表中的模型文件（全量更新）
+- 手工维护的模型（STATIC_MODEL_FILENAMES，如 qiniu-auto 自动路由虚拟模型）不会被删除，
+  并始终排在 _position.yaml 最前面
 - _position.yaml：按模型创建时间倒序排列（新模型在前）
   如果 API 提供 created_at 字段，按该字段排序
   否则保持 API 返回的原始顺序
 
+增量获取与版本号：
+- 请求市场 API 时携带上次响应的 ETag / Last-Modified（If-None-Match / If-Modified-Since），
+  缓存在 scripts/.market_models_cache.json 中，API 返回 304 时直接结束，不改动任何文件
+- 只有新增、删除、配置内容变化或模型顺序变化时才递增插件版本号，并以退出码 0 结束；
+  仅格式差异不计入变更，退出码为 1，工作流据此决定是否提交和发布
+- --dry-run：只输出将要发生的变更（unified diff），不写文件、不递增版本号
+- --force：忽略缓存的 ETag / Last-Modified，强制重新获取并渲染
+
 CI 环境行为：
 - 检测环境变量 CI=true 判断是否在 CI 环境中运行
 - 如果模型缺少 context_length 字段，记录错误
@@ -62,11 +94,16 @@ CI 环境行为：
 import sys
 import os
 import argparse
+import copy
+import difflib
+import hashlib
+import json
 import re
 import yaml
 import requests
+from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 # 七牛云市场 API 端点
 MARKET_API_URL = "https://openai.sufy.com/v1/market/models?overseas=true"
@@ -79,10 +116,26 @@ MODELS_DIR = AI_MODELS_DIR / "models" / "llm"
 MANIFEST_FILE = AI_MODELS_DIR / "manifest.yaml"
 POSITION_FILENAME = "_position.yaml"
 POSITION_FILE = MODELS_DIR / POSITION_FILENAME
+MARKET_CACHE_FILE = SCRIPT_DIR / ".market_models_cache.json"
 AI_MODELS_PLUGIN_NAME = "ai-models-provider"
+# 手工维护、不来自市场 API 的模型文件
+STATIC_MODEL_FILENAMES = ["qiniu-auto"]
 VISION_MODALITIES = {"image"}
 DEFAULT_CONTEXT_LENGTH = 65_536
 DEFAULT_FEATURES = ["tool-call", "stream-tool-call"]
+DEFAULT_MAX_TOKENS = 4096
+DEFAULT_CURRENCY = "USD"
+# YAML 中的价格统一按每百万 token 计
+PRICE_UNIT_TOKENS = 1_000_000
+MAX_OUTPUT_TOKENS_KEYS = ("max_output_tokens", "max_completion_tokens", "max_tokens")
+THROUGHPUT_KEYS = ("throughput", "tokens_per_second")
+LATENCY_KEYS = ("latency", "ttft_ms")
+# 按模型 ID 关键字匹配的上游提示词缓存方式
+PROMPT_CACHE_RULES = (
+    ("claude", "explicit"),
+    ("deepseek", "implicit"),
+    ("qwen", "implicit"),
+)
 PARAMETER_RULE_TEMPLATES = [
     {
         "name": "temperature",
@@ -98,6 +151,24 @@ PARAMETER_RULE_TEMPLATES = [
     },
 ]
 
+# 思考模型额外提供的推理内容输出方式参数
+REASONING_MODEL_PATTERN = re.compile(r"thinking|(?<!non-)reasoning|(^|[-/])r1($|-)")
+REASONING_MODE_RULE = {
+    "name": "reasoning_mode",
+    "label": {
+        "zh_Hans": "推理内容输出方式",
+        "en_US": "Reasoning Mode",
+    },
+    "type": "string",
+    "help": {
+        "zh_Hans": "stream 逐条输出推理内容；collapse 在回答开始时合并为一段输出；drop 丢弃推理内容；summarize_length 只输出推理内容长度",
+        "en_US": "stream: emit reasoning as it arrives; collapse: emit it as one block when the answer starts; drop: discard it; summarize_length: emit only its length",
+    },
+    "required": False,
+    "default": "stream",
+    "options": ["stream", "collapse", "drop", "summarize_length"],
+}
+
 ModelInfo = Dict[str, Any]
 
 # CI 环境检测
@@ -125,6 +196,16 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         default=AI_MODELS_PLUGIN_NAME,
         help=f"生成 release tag 时使用的插件名，默认: {AI_MODELS_PLUGIN_NAME}",
     )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="只输出将要发生的变更（diff），不写入文件，也不递增版本号。",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="忽略缓存的 ETag / Last-Modified，强制重新获取模型列表。",
+    )
     return parser.parse_args(argv)
 
 
@@ -249,6 +330,168 @@ def get_model_context_size(model_info: ModelInfo) -> int:
     return DEFAULT_CONTEXT_LENGTH
 
 
+def first_positive_number(data: Dict[str, Any], keys: tuple) -> Optional[float]:
+    """按顺序取第一个有效的正数字段。"""
+    for key in keys:
+        try:
+            value = float(data.get(key))
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            return value
+    return None
+
+
+def format_decimal(value: Decimal) -> str:
+    """将价格格式化为不带指数、不带多余 0 的字符串。"""
+    text = format(value.normalize(), "f")
+    return text if text != "-0" else "0"
+
+
+def get_model_max_output_tokens(model_info: ModelInfo) -> Optional[int]:
+    """
+    获取模型单次请求的最大输出 token 数
+    
+    Args:
+        model_info: 模型信息字典
+    
+    Returns:
+        最大输出 token 数，API 未提供时返回 None
+    """
+    model_constraints = model_info.get("model_constraints", {}) or {}
+    top_provider = model_info.get("top_provider", {}) or {}
+    value = first_positive_number(model_constraints, MAX_OUTPUT_TOKENS_KEYS) or first_positive_number(
+        top_provider, ("max_completion_tokens",)
+    )
+    return int(value) if value else None
+
+
+def get_model_prices(model_info: ModelInfo) -> Dict[str, Decimal]:
+    """
+    获取模型的各项价格，统一换算为每百万 token 价格
+    
+    Args:
+        model_info: 模型信息字典
+    
+    Returns:
+        只包含 API 提供的价格，键为 input / output / cached_input
+    """
+    pricing = model_info.get("pricing", {}) or {}
+
+    def to_decimal(value: Any) -> Optional[Decimal]:
+        try:
+            price = Decimal(str(value))
+        except (InvalidOperation, ValueError):
+            return None
+        return price if price.is_finite() and price >= 0 else None
+
+    if "input" in pricing:
+        keys = {"input": "input", "output": "output", "cached_input": "cached_input"}
+        unit_tokens = to_decimal(pricing.get("unit")) or Decimal(PRICE_UNIT_TOKENS)
+    else:
+        keys = {"input": "prompt", "output": "completion", "cached_input": "input_cache_read"}
+        unit_tokens = Decimal(1)
+
+    if not unit_tokens:
+        return {}
+
+    scale = Decimal(PRICE_UNIT_TOKENS) / unit_tokens
+    prices = {}
+    for name, key in keys.items():
+        price = to_decimal(pricing.get(key))
+        if price is not None:
+            prices[name] = price * scale
+    return prices
+
+
+def get_model_pricing(model_info: ModelInfo) -> Optional[Dict[str, str]]:
+    """
+    获取模型价格，统一换算为每百万 token 价格
+    
+    Args:
+        model_info: 模型信息字典
+    
+    Returns:
+        Dify pricing 配置，API 未提供输入价格时返回 None
+    """
+    prices = get_model_prices(model_info)
+    if "input" not in prices:
+        return None
+
+    config = {"input": format_decimal(prices["input"])}
+    if "output" in prices:
+        config["output"] = format_decimal(prices["output"])
+    config["unit"] = format_decimal(Decimal(1) / Decimal(PRICE_UNIT_TOKENS))
+    config["currency"] = str((model_info.get("pricing") or {}).get("currency") or DEFAULT_CURRENCY)
+    return config
+
+
+def get_model_performance(model_info: ModelInfo) -> Dict[str, float]:
+    """
+    获取模型吞吐量（tokens/s）和首 token 延迟（ms）
+    
+    Args:
+        model_info: 模型信息字典
+    
+    Returns:
+        只包含 API 提供的字段
+    """
+    performance = model_info.get("performance") or model_info.get("stats") or {}
+    result = {}
+    throughput = first_positive_number(performance, THROUGHPUT_KEYS)
+    if throughput:
+        result["throughput"] = round(throughput, 2)
+    latency = first_positive_number(performance, LATENCY_KEYS)
+    if latency:
+        result["latency"] = round(latency, 2)
+    return result
+
+
+def get_prompt_cache_mode(model_id: str) -> Optional[str]:
+    """
+    获取模型的上游提示词缓存方式
+    
+    Args:
+        model_id: 模型 ID
+    
+    Returns:
+        explicit（需要标记缓存断点）、implicit（自动缓存）或 None（不支持）
+    """
+    lowered = model_id.lower()
+    for keyword, mode in PROMPT_CACHE_RULES:
+        if keyword in lowered:
+            return mode
+    return None
+
+
+def is_reasoning_model(model_id: str) -> bool:
+    """是否为会返回推理内容的思考模型。"""
+    return bool(REASONING_MODEL_PATTERN.search(model_id.lower()))
+
+
+def get_parameter_rules(model_info: ModelInfo) -> List[Dict[str, Any]]:
+    """
+    生成参数规则，API 提供输出上限时写入 max_tokens 的 max / default
+    
+    Args:
+        model_info: 模型信息字典
+    
+    Returns:
+        参数规则列表
+    """
+    rules = [template.copy() for template in PARAMETER_RULE_TEMPLATES]
+    max_output_tokens = get_model_max_output_tokens(model_info)
+    if max_output_tokens:
+        for rule in rules:
+            if rule["name"] == "max_tokens":
+                rule["default"] = min(DEFAULT_MAX_TOKENS, max_output_tokens)
+                rule["min"] = 1
+                rule["max"] = max_output_tokens
+    if is_reasoning_model(model_info.get("id", "")):
+        rules.append(copy.deepcopy(REASONING_MODE_RULE))
+    return rules
+
+
 def generate_model_yaml(model_info: ModelInfo) -> Dict[str, Any]:
     """
     生成模型的 YAML 配置
@@ -275,30 +518,93 @@ def generate_model_yaml(model_info: ModelInfo) -> Dict[str, Any]:
             "mode": "chat",
             "context_size": get_model_context_size(model_info),
         },
-        "parameter_rules": [template.copy() for template in PARAMETER_RULE_TEMPLATES],
+        "parameter_rules": get_parameter_rules(model_info),
     }
+
+    pricing = get_model_pricing(model_info)
+    if pricing:
+        config["pricing"] = pricing
+
+    # 插件自用的扩展信息，放在 extra 下，Dify 会忽略未知的顶层字段
+    extra = get_model_performance(model_info)
+    # Dify 的 pricing 没有缓存命中价格，插件按 extra 中的价格计算缓存命中部分的费用
+    cached_input_price = get_model_prices(model_info).get("cached_input") if pricing else None
+    if cached_input_price is not None:
+        extra["cached_input_price"] = format_decimal(cached_input_price)
+    prompt_cache = get_prompt_cache_mode(model_id)
+    if prompt_cache:
+        extra["prompt_cache"] = prompt_cache
+    if extra:
+        config["extra"] = extra
     
     return config
 
 
-def fetch_models_from_api() -> List[ModelInfo]:
+def load_market_cache() -> Dict[str, str]:
+    """读取上次请求市场 API 时保存的 ETag / Last-Modified。"""
+    try:
+        with open(MARKET_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f) or {}
+    except (OSError, ValueError):
+        return {}
+
+    # API 地址变化时缓存失效
+    if cache.get("url") != MARKET_API_URL:
+        return {}
+    return cache
+
+
+def save_market_cache(validators: Dict[str, str]) -> None:
+    """保存市场 API 响应的 ETag / Last-Modified，供下次条件请求使用。"""
+    if not validators:
+        return
+
+    with open(MARKET_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"url": MARKET_API_URL, **validators}, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def fetch_models_from_api(cache: Optional[Dict[str, str]] = None) -> Tuple[Optional[List[ModelInfo]], Dict[str, str]]:
     """
     从七牛云市场 API 获取模型列表
     
+    Args:
+        cache: 上次响应的 ETag / Last-Modified（可选），用于条件请求
+    
     Returns:
-        符合条件的模型列表
+        (符合条件的模型列表, 本次响应的 ETag / Last-Modified)
+        API 返回 304（自上次获取后没有变化）时模型列表为 None
     """
+    cache = cache or {}
+    headers = {}
+    if cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+    if cache.get("last_modified"):
+        headers["If-Modified-Since"] = cache["last_modified"]
+
     try:
         print(f"正在从市场 API 获取模型列表: {MARKET_API_URL}")
-        response = requests.get(MARKET_API_URL, timeout=30)
+        response = requests.get(MARKET_API_URL, headers=headers, timeout=30)
+        if response.status_code == 304:
+            print("  市场 API 返回 304，模型列表自上次获取后没有变化")
+            return None, cache
+
         response.raise_for_status()
+        validators = {
+            key: value
+            for key, value in (
+                ("etag", response.headers.get("ETag")),
+                ("last_modified", response.headers.get("Last-Modified")),
+            )
+            if value
+        }
         
         data = response.json()
         
         # 检查响应状态
         if not data.get("status"):
             print(f"✗ API 返回失败状态: {data}")
-            return []
+            return [], {}
         
         raw_models = data.get("data", [])
         print(f"  从 API 获取到 {len(raw_models)} 个原始模型")
@@ -337,16 +643,16 @@ def fetch_models_from_api() -> List[ModelInfo]:
         print(f"  跳过 {skipped_count['no_openai']} 个不支持 OpenAI 协议的模型")
         print(f"  跳过 {skipped_count['not_llm']} 个非文本 LLM 模型")
         
-        return filtered_models
+        return filtered_models, validators
     
     except requests.RequestException as e:
         print(f"✗ 网络请求失败: {e}")
-        return []
+        return [], {}
     except Exception as e:
         print(f"✗ 处理 API 响应失败: {e}")
         import traceback
         traceback.print_exc()
-        return []
+        return [], {}
 
 
 def sanitize_filename(model_id: str) -> str:
@@ -381,12 +687,69 @@ def get_existing_model_files() -> Dict[str, Path]:
         if file.name != POSITION_FILENAME
     }
 
-def update_model_files(models: List[ModelInfo]) -> tuple[List[str], List[str], List[str]]:
+def render_yaml(data: Any) -> str:
+    """将配置渲染为 YAML 文本，格式与历史生成的文件保持一致。"""
+    return yaml.dump(data, allow_unicode=True, sort_keys=False, default_flow_style=False)
+
+
+def content_hash(content: str) -> str:
+    """计算文件内容的 SHA-256。"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def read_text(file_path: Path) -> Optional[str]:
+    """读取文件内容，文件不存在时返回 None。"""
+    if not file_path.exists():
+        return None
+    return file_path.read_text(encoding="utf-8")
+
+
+def print_diff(file_path: Path, old: Optional[str], new: Optional[str]) -> None:
+    """以 unified diff 格式输出文件变更（用于 --dry-run）。"""
+    relative = file_path.relative_to(PROJECT_ROOT)
+    diff = difflib.unified_diff(
+        (old or "").splitlines(keepends=True),
+        (new or "").splitlines(keepends=True),
+        fromfile=f"a/{relative}" if old is not None else "/dev/null",
+        tofile=f"b/{relative}" if new is not None else "/dev/null",
+    )
+    sys.stdout.writelines(diff)
+
+
+def write_if_changed(file_path: Path, content: str, dry_run: bool = False) -> bool:
+    """
+    内容哈希与磁盘上的文件不同时才写入
+    
+    Args:
+        file_path: 文件路径
+        content: 新的文件内容
+        dry_run: 为 True 时只输出 diff，不写入
+    
+    Returns:
+        文件内容是否发生变化
+    """
+    existing = read_text(file_path)
+    if existing is not None and content_hash(existing) == content_hash(content):
+        return False
+
+    if dry_run:
+        print_diff(file_path, existing, content)
+    else:
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+    return True
+
+
+def update_model_files(models: List[ModelInfo], dry_run: bool = False) -> tuple[List[str], List[str], List[str]]:
     """
     更新模型配置文件
     
+    每个配置先在内存中渲染，与磁盘上的文件内容哈希一致时跳过；
+    只有解析后的配置内容变化才计入更新，仅格式差异只重写文件
+    
     Args:
         models: 模型信息列表
+        dry_run: 为 True 时只输出 diff，不修改文件
     
     Returns:
         (新增的模型 ID 列表, 更新的模型 ID 列表, 删除的模型文件名列表)
@@ -396,6 +759,7 @@ def update_model_files(models: List[ModelInfo]) -> tuple[List[str], List[str], L
     added: List[str] = []
     updated: List[str] = []
     removed: List[str] = []
+    unchanged = 0
     
     # 新增或更新模型
     for model_info in models:
@@ -406,30 +770,38 @@ def update_model_files(models: List[ModelInfo]) -> tuple[List[str], List[str], L
         new_model_filenames.add(filename)
         
         config = generate_model_yaml(model_info)
-        
-        if filename not in existing_models:
+        existing = read_text(file_path) if filename in existing_models else None
+
+        if not write_if_changed(file_path, render_yaml(config), dry_run):
+            unchanged += 1
+            continue
+
+        if existing is None:
             print(f"  + 新增: {model_id}")
             if model_name != model_id:
                 print(f"         {model_name}")
             added.append(model_id)
-        else:
+        elif yaml.safe_load(existing) != config:
             print(f"  ↻ 更新: {model_id}")
             updated.append(model_id)
-        
-        with open(file_path, "w", encoding="utf-8") as f:
-            yaml.dump(config, f, allow_unicode=True, sort_keys=False, default_flow_style=False)
+        else:
+            print(f"  ≈ 格式化: {model_id}")
     
     # 删除不在新列表中的模型（全量更新）
     for filename, file_path in existing_models.items():
-        if filename not in new_model_filenames:
+        if filename not in new_model_filenames and filename not in STATIC_MODEL_FILENAMES:
             print(f"  - 删除: {filename}")
-            file_path.unlink()
+            if dry_run:
+                print_diff(file_path, read_text(file_path), None)
+            else:
+                file_path.unlink()
             removed.append(filename)
     
+    print(f"  = 未变化: {unchanged} 个")
     return added, updated, removed
 
 
-def update_position_file(models: List[ModelInfo]):
+def update_position_file(models: List[ModelInfo], dry_run: bool = False) -> bool:
     """
     更新 _position.yaml 文件
     
@@ -440,6 +812,10 @@ def update_position_file(models: List[ModelInfo]):
     
     Args:
         models: 模型信息列表
+        dry_run: 为 True 时只输出 diff，不修改文件
+    
+    Returns:
+        模型顺序是否发生变化
     """
     # 尝试按创建时间排序
     # 检查是否有 created_at 或类似的时间字段
@@ -456,27 +832,45 @@ def update_position_file(models: List[ModelInfo]):
         # 使用 API 返回的原始顺序（假设 API 已按时间排序，或保持原顺序）
         sorted_models = models
     
-    # 转换为文件名列表
-    ordered_models = [sanitize_filename(m["id"]) for m in sorted_models]
-    
-    # 写入文件
-    with open(POSITION_FILE, "w", encoding="utf-8") as f:
-        yaml.dump(ordered_models, f, allow_unicode=True, default_flow_style=False)
+    # 转换为文件名列表，手工维护的模型排在最前面
+    ordered_models = [filename for filename in STATIC_MODEL_FILENAMES if (MODELS_DIR / f"{filename}.yaml").exists()]
+    ordered_models += [
+        filename for filename in (sanitize_filename(m["id"]) for m in sorted_models) if filename not in ordered_models
+    ]
     
+    existing = read_text(POSITION_FILE)
+    if not write_if_changed(POSITION_FILE, yaml.dump(ordered_models, allow_unicode=True, default_flow_style=False), dry_run):
+        print(f"✓ _position.yaml 未变化，共 {len(ordered_models)} 个模型")
+        return False
+
     print(f"✓ 已更新 _position.yaml，共 {len(ordered_models)} 个模型")
+    return existing is None or yaml.safe_load(existing) != ordered_models
+
+
+def has_semantic_changes(added: List[str], updated: List[str], removed: List[str], position_changed: bool) -> bool:
+    """是否存在需要发布新版本的实际变更。"""
+    return bool(added or updated or removed or position_changed)
 
 
-def summarize_changes(added: List[str], updated: List[str], removed: List[str], total: int) -> None:
+def summarize_changes(
+    added: List[str],
+    updated: List[str],
+    removed: List[str],
+    total: int,
+    position_changed: bool = False,
+    dry_run: bool = False,
+) -> None:
     print()
     print("=" * 70)
-    print("更新完成！")
+    print("预览完成（--dry-run，未写入任何文件）" if dry_run else "更新完成！")
     print(f"  新增模型: {len(added)} 个")
     print(f"  更新模型: {len(updated)} 个")
     print(f"  删除模型: {len(removed)} 个")
+    print(f"  模型顺序: {'有变化' if position_changed else '无变化'}")
     print(f"  总计模型: {total} 个")
     print("=" * 70)
 
-    if added or updated or removed:
+    if has_semantic_changes(added, updated, removed, position_changed) and not dry_run:
         print()
         print("检测到模型变更，自动递增插件版本号...")
         bump_patch_version()
@@ -497,8 +891,8 @@ def enforce_ci_requirements() -> None:
         sys.exit(1)
 
 
-def exit_with_change_status(added: List[str], updated: List[str], removed: List[str]) -> None:
-    if added or updated or removed:
+def exit_with_change_status(added: List[str], updated: List[str], removed: List[str], position_changed: bool = False) -> None:
+    if has_semantic_changes(added, updated, removed, position_changed):
         sys.exit(0)
     print()
     print("提示：没有检测到模型变更")
@@ -520,7 +914,12 @@ def main(argv: Optional[List[str]] = None):
     print()
     
     # 从 API 获取模型列表
-    models = fetch_models_from_api()
+    models, validators = fetch_models_from_api(None if args.force else load_market_cache())
+
+    if models is None:
+        print()
+        print("提示：没有检测到模型变更（使用 --force 可强制重新生成）")
+        sys.exit(1)
     
     if not models:
         print()
@@ -529,21 +928,24 @@ def main(argv: Optional[List[str]] = None):
         sys.exit(1)
     
     print()
-    print("开始更新模型配置文件...")
+    print("开始预览模型配置变更..." if args.dry_run else "开始更新模型配置文件...")
     print("-" * 70)
     
     # 更新模型文件
-    added, updated, removed = update_model_files(models)
+    added, updated, removed = update_model_files(models, dry_run=args.dry_run)
     
     print("-" * 70)
     print()
     
     # 更新 position 文件
-    update_position_file(models)
-    summarize_changes(added, updated, removed, len(models))
+    position_changed = update_position_file(models, dry_run=args.dry_run)
+    summarize_changes(added, updated, removed, len(models), position_changed, dry_run=args.dry_run)
     enforce_ci_requirements()
-    exit_with_change_status(added, updated, removed)
 
+    # 文件全部写入后再保存 ETag / Last-Modified，避免中途失败后被 304 跳过
+    if not args.dry_run:
+        save_market_cache(validators)
+    exit_with_change_status(added, updated, removed, position_changed)
 
 if __name__ == "__main__":
     main()
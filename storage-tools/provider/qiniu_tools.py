@@ -3,7 +3,8 @@ from typing import Any
 
 from dify_plugin import ToolProvider
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
-from qiniu import Auth, BucketManager
+
+from utils.qiniu_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -27,21 +28,14 @@ class QiniuProvider(ToolProvider):
             ToolProviderCredentialValidationError: 认证验证失败
         """
         try:
-            access_key = credentials.get("qiniu_access_key")
-            secret_key = credentials.get("qiniu_secret_key")
-            
-            if not access_key or not secret_key:
-                raise ToolProviderCredentialValidationError("七牛云 Access Key 和 Secret Key 不能为空")
-            
-            # 创建认证对象
-            auth = Auth(access_key, secret_key)
-            bucket_manager = BucketManager(auth)
+            # 获取客户端（认证信息为空时抛出异常），验证通过后工具调用复用同一个客户端
+            client = get_client(credentials)
             
             # 尝试获取空间列表来验证认证信息
             # 这里只是验证认证是否有效，不需要具体的空间名
             try:
                 # 调用接口验证认证信息
-                ret, info = bucket_manager.buckets()
+                ret, info = client.list_buckets()
                 
                 if info.status_code == 200:
                     logger.info("七牛云认证验证成功")
@@ -0,0 +1,71 @@
+"""
+测试公共配置
+
+测试从插件目录运行（python -m pytest tests），插件代码按 utils.xxx / tools.xxx 导入。
+七牛云服务由 scripts/benchmark/mock_storage_server.py 在独立进程中模拟
+"""
+
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+import pytest
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+BENCHMARK_DIR = PLUGIN_DIR.parent / "scripts" / "benchmark"
+
+for path in (PLUGIN_DIR, BENCHMARK_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import qiniu  # noqa: E402
+from dify_plugin.entities.tool import ToolInvokeMessage, ToolRuntime  # noqa: E402
+from common import MockServerProcess, start_mock_server  # noqa: E402
+from mock_storage_server import DEFAULT_ACCESS_KEY, DEFAULT_SECRET_KEY  # noqa: E402
+
+from utils import qiniu_client  # noqa: E402
+
+CREDENTIALS = {"qiniu_access_key": DEFAULT_ACCESS_KEY, "qiniu_secret_key": DEFAULT_SECRET_KEY}
+BUCKET = "bench"
+SEED_OBJECTS = 30
+
+
+@contextmanager
+def mock_storage(args: List[str]) -> Iterator[MockServerProcess]:
+    """
+    启动模拟存储服务，并让 qiniu SDK 和客户端缓存指向它
+
+    客户端按认证信息缓存了区域域名，切换模拟服务时清空
+    """
+    with start_mock_server("mock_storage_server.py", args) as srv:
+        qiniu.config.set_default(default_uc_host=srv.url)
+        qiniu_client._clients.clear()
+        try:
+            yield srv
+        finally:
+            qiniu_client._clients.clear()
+
+
+def invoke_tool(
+    tool_class: type, parameters: dict, credentials: Optional[dict] = None, session: Any = None
+) -> List[ToolInvokeMessage]:
+    """按 Dify 的方式创建工具并调用，返回全部输出消息；需要反向调用模型的工具传入替身 session"""
+    runtime = ToolRuntime(credentials=dict(credentials or CREDENTIALS), user_id=None, session_id=None)
+    return list(tool_class(runtime=runtime, session=session).invoke(parameters))
+
+
+def json_result(messages: List[ToolInvokeMessage]) -> dict:
+    """工具输出的最后一个 JSON 结果"""
+    return [m.message.json_object for m in messages if m.type == ToolInvokeMessage.MessageType.JSON][-1]
+
+
+def text_results(messages: List[ToolInvokeMessage]) -> List[str]:
+    """工具输出的文本消息"""
+    return [m.message.text for m in messages if m.type == ToolInvokeMessage.MessageType.TEXT]
+
+
+@pytest.fixture(scope="module")
+def storage_server() -> Iterator[MockServerProcess]:
+    with mock_storage(["--buckets", f"{BUCKET},media", "--seed-objects", str(SEED_OBJECTS), "--seed", "1"]) as srv:
+        yield srv
@@ -0,0 +1,115 @@
+import threading
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from dify_plugin.entities.model.llm import LLMResult, LLMUsage
+from dify_plugin.entities.model.message import AssistantPromptMessage
+
+from mock_storage_server import download_domain
+from tests.conftest import BUCKET, CREDENTIALS, invoke_tool, json_result, text_results
+from tools.batch_llm_files import QiniuBatchLLMFilesTool, RateLimiter
+from utils.qiniu_client import get_client
+
+MODEL = {"provider": "qiniu", "model": "test-model", "model_type": "llm", "mode": "chat", "completion_params": {}}
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+
+
+class FakeLLM:
+    """记录调用并返回输入内容长度的模型替身，统计同时进行的调用数"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, model_config, prompt_messages, stream):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.calls.append((model_config, prompt_messages, stream))
+        try:
+            time.sleep(self.delay)
+            text = prompt_messages[1].content
+            usage = LLMUsage.empty_usage()
+            usage.prompt_tokens, usage.completion_tokens, usage.total_tokens = len(text), 1, len(text) + 1
+            usage.total_price, usage.currency = Decimal("0.001"), "RMB"
+            return LLMResult(model=model_config.model, message=AssistantPromptMessage(content=f"len={len(text)}"), usage=usage)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture(scope="module")
+def domain(storage_server):
+    client = get_client(CREDENTIALS)
+    for key, data in (("batch/a.txt", b"aaaa"), ("batch/b.txt", "文本" * 10), ("batch/image.png", PNG)):
+        data = data.encode() if isinstance(data, str) else data
+        client.upload_data(BUCKET, key, data, client.auth.upload_token(BUCKET, key))
+    return download_domain(storage_server.url, BUCKET)
+
+
+def run_batch(domain, llm, **parameters):
+    """返回 (各文件结果, 汇总结果, 文本消息)"""
+    parameters = {"model": MODEL, "instruction": "Summarize", "domain": domain, **parameters}
+    messages = invoke_tool(QiniuBatchLLMFilesTool, parameters, session=SimpleNamespace(model=SimpleNamespace(llm=llm)))
+    results = [m.message.json_object for m in messages if m.type == m.MessageType.JSON]
+    return results[:-1], json_result(messages), text_results(messages)
+
+
+def test_results_are_in_input_order_with_usage(domain):
+    llm = FakeLLM()
+    # 重复的 key 会被去掉，加上不影响下载的查询参数来重复处理同一个文件
+    keys = ["batch/b.txt", "batch/a.txt"] * 4
+    results, summary, texts = run_batch(domain, llm, keys=",".join(f"{key}?{i}" for i, key in enumerate(keys)))
+    assert [result["index"] for result in results] == list(range(8))
+    assert [result["output"] for result in results] == ["len=20", "len=4"] * 4
+    assert summary["succeeded"] == 8 and summary["usage"]["total_tokens"] == 4 * 21 + 4 * 5
+    assert summary["usage"]["total_price"] == "0.008" and summary["usage"]["currency"] == "RMB"
+    assert texts[-1] == "已处理 8 个文件：成功 8 个，失败 0 个"
+    model_config, prompt_messages, stream = llm.calls[0]
+    assert model_config.model == "test-model" and prompt_messages[0].content == "Summarize" and stream is False
+
+
+def test_concurrency_is_bounded(domain):
+    llm = FakeLLM(delay=0.05)
+    keys = ",".join(f"batch/a.txt?{i}" for i in range(8))
+    results, summary, _ = run_batch(domain, llm, keys=keys, max_concurrency=2)
+    assert summary["succeeded"] == 8 and llm.peak == 2
+
+
+def test_failed_files_do_not_fail_the_batch(domain):
+    results, summary, _ = run_batch(domain, FakeLLM(), keys="batch/a.txt\nbatch/missing.txt\nbatch/image.png")
+    assert [result["success"] for result in results] == [True, False, False]
+    assert results[1]["error"] == "文件不存在: batch/missing.txt"
+    assert results[2]["error"] == "不是文本文件"
+    assert summary["failed"] == 2 and summary["usage"]["total_tokens"] == 5
+
+
+def test_long_files_are_truncated(domain):
+    llm = FakeLLM()
+    [result], _, _ = run_batch(domain, llm, keys="batch/b.txt", max_chars=5)
+    assert result["truncated"] and result["output"] == "len=5"
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(1200)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - started >= 0.14
+    unlimited = RateLimiter(0)
+    started = time.monotonic()
+    for _ in range(100):
+        unlimited.acquire()
+    assert time.monotonic() - started < 0.1
+
+
+def test_invalid_parameters(domain):
+    _, summary, _ = run_batch(domain, FakeLLM(), keys="batch/a.txt", max_concurrency="many")
+    assert summary["error"].startswith("执行失败")
+    messages = invoke_tool(QiniuBatchLLMFilesTool, {"model": MODEL, "instruction": "x", "domain": domain, "keys": ""})
+    assert text_results(messages) == ["文件 key 列表不能为空"]
@@ -0,0 +1,80 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from utils import compression
+from utils.compression import (
+    ENCODING_GZIP,
+    ENCODING_ZSTD,
+    READ_SIZE,
+    check_encoding,
+    compress_stream,
+    decompress_chunks,
+    supported_encodings,
+)
+
+DATA = os.urandom(64 * 1024) + b"repeated text " * 50000
+
+
+def read_all(stream, size):
+    chunks = []
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return b"".join(chunks)
+        assert len(chunk) <= size
+        chunks.append(chunk)
+
+
+def split(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("encoding", supported_encodings())
+@pytest.mark.parametrize("read_size", [1000, READ_SIZE, 3 * READ_SIZE])
+def test_round_trip(encoding, read_size):
+    compressed = read_all(compress_stream(io.BytesIO(DATA), encoding), read_size)
+    assert len(compressed) < len(DATA)
+    assert b"".join(decompress_chunks(split(compressed, 777), encoding)) == DATA
+
+
+def test_gzip_output_is_standard_gzip():
+    compressed = read_all(compress_stream(io.BytesIO(DATA), ENCODING_GZIP), 4096)
+    assert gzip.decompress(compressed) == DATA
+
+
+def test_uncompressed_chunks_pass_through():
+    chunks = [b"a", b"b"]
+    assert list(decompress_chunks(chunks, None)) == chunks
+
+
+@pytest.mark.parametrize("encoding", supported_encodings())
+def test_decompressed_chunks_are_bounded(encoding):
+    # 高压缩比的数据每次输出不超过 READ_SIZE
+    zeros = b"\0" * (8 * READ_SIZE)
+    compressed = read_all(compress_stream(io.BytesIO(zeros), encoding), READ_SIZE)
+    chunks = list(decompress_chunks([compressed], encoding))
+    assert b"".join(chunks) == zeros
+    assert max(len(chunk) for chunk in chunks) <= READ_SIZE
+
+
+def test_truncated_gzip_is_rejected():
+    compressed = read_all(compress_stream(io.BytesIO(DATA), ENCODING_GZIP), READ_SIZE)
+    with pytest.raises(ValueError, match="不完整"):
+        list(decompress_chunks([compressed[:-10]], ENCODING_GZIP))
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError, match="不支持"):
+        check_encoding("brotli")
+    with pytest.raises(ValueError):
+        compress_stream(io.BytesIO(b""), "brotli")
+
+
+def test_zstd_requires_zstandard(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    assert supported_encodings() == [ENCODING_GZIP]
+    with pytest.raises(ValueError, match="zstandard"):
+        check_encoding(ENCODING_ZSTD)
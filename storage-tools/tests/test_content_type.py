@@ -0,0 +1,89 @@
+import codecs
+
+import pytest
+
+from mock_storage_server import download_domain
+from tests.conftest import BUCKET, CREDENTIALS, invoke_tool, json_result
+from tools.file_upload import QiniuUploadTool
+from tools.get_file_content import QiniuGetContentTool
+from utils.content_type import decode_text, detect_charset, is_text_content, parse_content_type
+from utils.qiniu_client import get_client
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+
+
+def test_parse_content_type():
+    assert parse_content_type("Text/Plain; Charset=\"GBK\"") == ("text/plain", "GBK")
+    assert parse_content_type(None) == ("", None)
+
+
+@pytest.mark.parametrize(
+    "content_type, data, expected",
+    [
+        ("text/csv", b"\0", True),
+        ("application/vnd.api+json", b"", True),
+        ("image/png", b"plain", False),
+        ("application/x-custom; charset=utf-8", b"", True),
+        ("application/octet-stream", PNG, False),
+        (None, b"plain text", True),
+        (None, b"abc\0def", False),
+        (None, codecs.BOM_UTF16_LE + "hi".encode("utf-16-le"), True),
+    ],
+)
+def test_is_text_content(content_type, data, expected):
+    assert is_text_content(content_type, data) is expected
+
+
+def test_decode_prefers_declared_charset_then_bom_then_utf8():
+    assert decode_text("中文".encode("gbk"), "text/plain; charset=gbk") == ("中文", "gbk")
+    assert decode_text(codecs.BOM_UTF8 + "中文".encode(), "text/plain") == ("中文", "utf-8-sig")
+    assert decode_text("中文".encode(), "text/plain; charset=unknown-charset") == ("中文", "utf-8")
+
+
+def test_undeclared_non_utf8_text_is_detected():
+    text, charset = decode_text("这是一段用于检测字符集的中文文本。".encode("gb18030") * 20)
+    assert text.startswith("这是一段") and charset != "utf-8"
+
+
+def test_detect_charset_accepts_sample_cut_inside_character():
+    sample = "中文".encode()[:-1]
+    assert detect_charset(sample) == "utf-8"
+
+
+@pytest.fixture
+def domain(storage_server):
+    return download_domain(storage_server.url, BUCKET)
+
+
+def get_content(domain, key):
+    return invoke_tool(QiniuGetContentTool, {"file_key": key, "domain": domain})
+
+
+def test_get_file_content_sniffs_untyped_text(domain):
+    client = get_client(CREDENTIALS)
+    token = client.auth.upload_token(BUCKET, "content/notes")
+    client.upload_data(BUCKET, "content/notes", "中文内容".encode(), token)
+
+    result = json_result(get_content(domain, "content/notes"))
+    assert result["is_text"] and result["charset"] == "utf-8" and result["content"] == "中文内容"
+
+
+def test_get_file_content_returns_binary_as_blob_only(domain):
+    client = get_client(CREDENTIALS)
+    token = client.auth.upload_token(BUCKET, "content/image.bin")
+    client.upload_data(BUCKET, "content/image.bin", PNG, token)
+
+    messages = get_content(domain, "content/image.bin")
+    result = json_result(messages)
+    assert not result["is_text"] and result["content"] is None
+    [blob] = [m.message.blob for m in messages if m.type == m.MessageType.BLOB]
+    assert blob == PNG
+
+
+def test_get_file_content_decompresses_uploaded_file(domain):
+    text = "压缩的文本 " * 500
+    invoke_tool(QiniuUploadTool, {"bucket": BUCKET, "content": text, "filename": "content/z.txt", "compress": "zstd"})
+
+    result = json_result(get_content(domain, "content/z.txt"))
+    assert result["content_encoding"] == "zstd"
+    assert result["content"] == text and result["file_size"] == len(text.encode())
@@ -0,0 +1,66 @@
+import pytest
+
+from tests.conftest import BUCKET, invoke_tool, json_result
+from tools.fetch_to_bucket import QiniuFetchTool
+
+
+@pytest.fixture
+def source(storage_server):
+    return f"{storage_server.url}/public/{BUCKET}/docs/000003.txt"
+
+
+def fetch(**parameters):
+    return json_result(invoke_tool(QiniuFetchTool, {"bucket": BUCKET, "wait_seconds": 5, **parameters}))
+
+
+def test_sync_fetch_saves_file(source):
+    result = fetch(url=source, prefix="fetched", domain="https://cdn.example.com")
+    assert result["status"] == "success"
+    assert result["file_key"] == "fetched/000003.txt" and result["size"] == 1024
+    assert result["file_url"] == "https://cdn.example.com/fetched/000003.txt"
+
+
+def test_sync_fetch_keeps_existing_file_without_overwrite(source):
+    fetch(url=source, filename="sync-once.txt")
+    result = fetch(url=source, filename="sync-once.txt")
+    assert result["status"] == "failed" and "已存在" in result["error"]
+    assert fetch(url=source, filename="sync-once.txt", overwrite=True)["status"] == "success"
+
+
+def test_async_fetch_waits_for_new_file(source):
+    result = fetch(url=source, filename="async.txt", mode="async")
+    assert result["status"] == "success" and result["job_id"]
+    assert result["size"] == 1024
+
+
+def test_async_fetch_without_overwrite_rejects_existing_file(source):
+    fetch(url=source, filename="async-once.txt", mode="async")
+    result = fetch(url=source, filename="async-once.txt", mode="async")
+    assert result["status"] == "failed" and result["job_id"] is None
+
+
+def test_async_overwrite_reports_rewritten_file(source):
+    fetch(url=source, filename="async-overwrite.txt")
+    result = fetch(url=source, filename="async-overwrite.txt", mode="async", overwrite=True)
+    assert result["status"] == "success"
+
+
+def test_async_job_without_new_file_is_terminal_failure(storage_server):
+    missing = f"{storage_server.url}/public/{BUCKET}/missing.txt"
+    result = fetch(url=missing, filename="never.txt", mode="async")
+    assert result["status"] == "failed" and result["job_id"]
+    assert "没有写入新的文件" in result["error"]
+
+
+def test_async_job_can_be_resumed_by_id(source):
+    running = fetch(url=source, filename="resume.txt", mode="async", wait_seconds=0)
+    assert running["status"] in ("running", "success")
+    result = fetch(url=source, filename="resume.txt", job_id=running["job_id"])
+    assert result["status"] == "success" and result["job_id"] == running["job_id"]
+
+
+def test_existing_file_with_same_put_time_and_hash_is_not_new():
+    stat = {"putTime": 1, "hash": "a"}
+    assert QiniuFetchTool._is_new(stat, None)
+    assert not QiniuFetchTool._is_new(stat, dict(stat))
+    assert QiniuFetchTool._is_new(stat, {"putTime": 0, "hash": "a"})
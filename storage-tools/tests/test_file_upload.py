@@ -0,0 +1,72 @@
+import gzip
+
+import pytest
+from dify_plugin.file.entities import FileType
+from dify_plugin.file.file import File
+
+from mock_storage_server import download_domain, qetag
+from tests.conftest import BUCKET, CREDENTIALS, invoke_tool, json_result, text_results
+from tools.file_upload import QiniuUploadTool
+from utils.compression import ENCODING_METADATA
+from utils.qiniu_client import get_client
+
+
+@pytest.fixture
+def client(storage_server):
+    return get_client(CREDENTIALS)
+
+
+def upload(**parameters):
+    return invoke_tool(QiniuUploadTool, {"bucket": BUCKET, **parameters})
+
+
+def download(client, storage_server, key):
+    return client.get(client.private_download_url(f"{download_domain(storage_server.url, BUCKET)}/{key}"))
+
+
+def test_text_content_is_uploaded_as_utf8(client):
+    result = json_result(upload(content="你好", filename="hello.txt", prefix="upload", domain="cdn.example.com"))
+    assert result["file_key"] == "upload/hello.txt"
+    assert result["file_url"] == "https://cdn.example.com/upload/hello.txt"
+    assert result["retry"]["retries"] == 0
+
+    stat, _ = client.stat(BUCKET, "upload/hello.txt")
+    assert stat["hash"] == qetag("你好".encode()) and stat["mimeType"] == "text/plain"
+
+
+def test_bytes_content_is_uploaded_unchanged(client):
+    data = bytes(range(256))
+    json_result(upload(content=data, filename="upload/raw.bin"))
+    assert client.stat(BUCKET, "upload/raw.bin")[0]["hash"] == qetag(data)
+
+
+def test_dify_file_is_streamed_from_its_url(client, storage_server):
+    file = File(url=f"{storage_server.url}/public/{BUCKET}/docs/000004.txt", filename="copy.txt", type=FileType.DOCUMENT)
+    result = json_result(upload(file=file, prefix="upload"))
+    assert result["file_key"] == "upload/copy.txt"
+
+    source = client.stat(BUCKET, "docs/000004.txt")[0]
+    assert client.stat(BUCKET, "upload/copy.txt")[0]["hash"] == source["hash"]
+
+
+def test_existing_file_is_kept_without_overwrite():
+    upload(content="first", filename="upload/once.txt")
+    result = json_result(upload(content="second", filename="upload/once.txt"))
+    assert result["file_key"] is None and "已存在" in result["error"]
+    assert json_result(upload(content="second", filename="upload/once.txt", overwrite=True))["error"] is None
+
+
+def test_gzip_upload_records_encoding_metadata(client, storage_server):
+    text = "compress me " * 1000
+    json_result(upload(content=text, filename="upload/compressed.txt", compress="gzip"))
+
+    response = download(client, storage_server, "upload/compressed.txt")
+    assert response.headers[ENCODING_METADATA] == "gzip"
+    assert len(response.content) < len(text)
+    assert gzip.decompress(response.content).decode() == text
+
+
+def test_missing_parameters_are_reported():
+    assert text_results(upload(filename="a.txt")) == ["上传内容不能为空"]
+    assert text_results(upload(content="x")) == ["文件名不能为空"]
+    assert "不支持的压缩方式" in text_results(upload(content="x", filename="a.txt", compress="brotli"))[0]
@@ -0,0 +1,63 @@
+import pytest
+
+from mock_storage_server import download_domain
+from tests.conftest import BUCKET, invoke_tool, text_results
+from tools.file_upload import QiniuUploadTool
+from tools.get_file_chunks import QiniuGetFileChunksTool
+
+TEXT = "\n\n".join(f"第 {i} 段。" + "word " * 30 for i in range(40))
+
+
+@pytest.fixture(scope="module")
+def domain(storage_server):
+    for filename, compress in (("chunks/plain.txt", "none"), ("chunks/gzip.txt", "gzip")):
+        invoke_tool(QiniuUploadTool, {"bucket": BUCKET, "content": TEXT, "filename": filename, "compress": compress})
+    return download_domain(storage_server.url, BUCKET)
+
+
+def get_chunks(domain, key, **parameters):
+    """返回 (分块列表, 汇总结果, 文本消息)"""
+    messages = invoke_tool(
+        QiniuGetFileChunksTool, {"file_key": key, "domain": domain, "chunk_size": 200, "chunk_overlap": 0, **parameters}
+    )
+    results = [m.message.json_object for m in messages if m.type == m.MessageType.JSON]
+    return results[:-1], results[-1] if results else None, text_results(messages)
+
+
+def operations(summary):
+    return [attempt["operation"] for attempt in summary["retry"]["attempts"]]
+
+
+@pytest.mark.parametrize("key", ["chunks/plain.txt", "chunks/gzip.txt"])
+def test_whole_file_is_read_with_one_get(domain, key):
+    chunks, summary, _ = get_chunks(domain, key)
+    assert summary["done"] and summary["chunk_count"] == len(chunks)
+    assert operations(summary) == ["get"]
+    assert chunks[0]["content"].startswith("第 0 段")
+    assert set(chunks[0]) == {"chunk_index", "content", "characters", "estimated_tokens"}
+
+
+@pytest.mark.parametrize("key, encoding", [("chunks/plain.txt", None), ("chunks/gzip.txt", "gzip")])
+def test_byte_range_uses_one_head_and_one_get(domain, key, encoding):
+    start = len("\n\n".join(f"第 {i} 段。" + "word " * 30 for i in range(10)).encode()) + 2
+    chunks, summary, _ = get_chunks(domain, key, start_offset=start)
+    assert operations(summary) == ["head", "get"]
+    assert summary["content_encoding"] == encoding
+    assert chunks[0]["content"].startswith("第 10 段")
+
+
+def test_max_chunks_continues_from_next_offset(domain):
+    collected, offset = [], 0
+    while True:
+        chunks, summary, _ = get_chunks(domain, "chunks/plain.txt", max_chunks=3, start_offset=offset)
+        collected += [chunk["content"] for chunk in chunks]
+        if summary["done"]:
+            break
+        offset = summary["next_offset"]
+    whole, _, _ = get_chunks(domain, "chunks/plain.txt")
+    assert collected == [chunk["content"] for chunk in whole]
+
+
+def test_offset_past_end_is_reported(domain):
+    _, summary, texts = get_chunks(domain, "chunks/plain.txt", start_offset=10**8)
+    assert summary is None and texts == ["获取失败：起始位置超出文件大小"]
@@ -0,0 +1,62 @@
+import requests
+from qiniu import Auth, BucketManager, put_data
+
+from mock_storage_server import download_domain, qetag
+from tests.conftest import BUCKET, CREDENTIALS, SEED_OBJECTS, mock_storage
+
+AUTH = Auth(CREDENTIALS["qiniu_access_key"], CREDENTIALS["qiniu_secret_key"])
+
+
+def test_sdk_upload_stat_and_delete(storage_server):
+    data = b"hello mock storage"
+    ret, info = put_data(AUTH.upload_token(BUCKET, "sdk/hello.txt"), "sdk/hello.txt", data)
+    assert info.status_code == 200 and ret["hash"] == qetag(data)
+
+    manager = BucketManager(AUTH)
+    ret, info = manager.stat(BUCKET, "sdk/hello.txt")
+    assert ret["fsize"] == len(data) and ret["hash"] == qetag(data)
+
+    _, info = manager.delete(BUCKET, "sdk/hello.txt")
+    assert info.status_code == 200
+    _, info = manager.stat(BUCKET, "sdk/hello.txt")
+    assert info.status_code == 612
+
+
+def test_insert_only_token_rejects_existing_key(storage_server):
+    token = AUTH.upload_token(BUCKET, "sdk/once.txt", policy={"insertOnly": 1})
+    _, info = put_data(token, "sdk/once.txt", b"first")
+    assert info.status_code == 200
+    _, info = put_data(token, "sdk/once.txt", b"second")
+    assert info.status_code == 614
+
+
+def test_list_pages_through_seed_objects(storage_server):
+    manager = BucketManager(AUTH)
+    keys, marker = [], None
+    while True:
+        ret, eof, info = manager.list(BUCKET, prefix="docs/", marker=marker, limit=7)
+        assert info.status_code == 200
+        keys += [item["key"] for item in ret["items"]]
+        if eof:
+            break
+        marker = ret["marker"]
+    assert keys == [f"docs/{i:06d}.txt" for i in range(SEED_OBJECTS)]
+
+
+def test_missing_bucket_returns_631(storage_server):
+    _, _, info = BucketManager(AUTH).list("missing", limit=1)
+    assert info.status_code == 631
+
+
+def test_private_download_checks_signature(storage_server):
+    base_url = f"{download_domain(storage_server.url, BUCKET)}/docs/000000.txt"
+    response = requests.get(AUTH.private_download_url(base_url, expires=60), timeout=5)
+    assert response.status_code == 200 and len(response.content) == 1024
+
+    assert requests.get(f"{base_url}?e=9999999999&token=mock-access-key:bad", timeout=5).status_code == 401
+
+
+def test_error_rate_injects_503():
+    with mock_storage(["--error-rate", "1"]) as srv:
+        response = requests.get(f"{download_domain(srv.url, BUCKET)}/docs/000000.txt", timeout=5)
+    assert response.status_code == 503
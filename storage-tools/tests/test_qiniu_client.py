@@ -0,0 +1,160 @@
+import io
+import time
+from urllib.parse import quote
+
+import pytest
+from dify_plugin.errors.tool import ToolProviderCredentialValidationError
+from qiniu import http
+from qiniu.http.region import ServiceName
+
+from mock_storage_server import download_domain, qetag
+from tests.conftest import BUCKET, CREDENTIALS, SEED_OBJECTS, mock_storage
+from utils import qiniu_client
+from utils.qiniu_client import UPLOAD_PART_SIZE, get_client, get_session, iter_parts, read_part
+from utils.retry import RetryPolicy, RetryStats
+
+
+class SlowStream(io.BytesIO):
+    """每次最多返回 1000 字节的流"""
+
+    def read(self, size=-1):
+        return super().read(min(size, 1000) if size and size > 0 else 1000)
+
+
+@pytest.fixture
+def client(storage_server):
+    return get_client(CREDENTIALS)
+
+
+def test_read_part_fills_short_reads():
+    stream = SlowStream(b"x" * 2500)
+    assert read_part(stream, 2048) == b"x" * 2048
+    assert read_part(stream, 2048) == b"x" * 452
+    assert read_part(stream, 2048) == b""
+    assert [len(part) for part in iter_parts(SlowStream(b"y" * 5000), 2000)] == [2000, 2000, 1000]
+
+
+def test_session_is_shared_with_sdk():
+    assert get_session() is http.qn_http_client.session
+    assert get_session().get_adapter("https://example.com")._pool_maxsize == qiniu_client.POOL_MAXSIZE
+
+
+def test_clients_are_cached_per_credentials(storage_server):
+    client = get_client(CREDENTIALS)
+    assert get_client(dict(CREDENTIALS)) is client
+    assert get_client({**CREDENTIALS, "qiniu_secret_key": "other"}) is not client
+    with pytest.raises(ToolProviderCredentialValidationError):
+        get_client({"qiniu_access_key": "ak"})
+
+
+def test_region_hosts_point_at_mock_server(client, storage_server):
+    assert client._hosts(BUCKET, ServiceName.UP) == [storage_server.url]
+    assert client.get_region(BUCKET) is client.get_region(BUCKET)
+
+
+def test_check_bucket(client):
+    client.check_bucket(BUCKET)
+    assert BUCKET in client._checked_buckets
+    with pytest.raises(ToolProviderCredentialValidationError, match="不存在"):
+        client.check_bucket("missing")
+
+
+def test_check_bucket_rejects_wrong_access_key(storage_server):
+    client = get_client({"qiniu_access_key": "wrong", "qiniu_secret_key": "wrong"})
+    with pytest.raises(ToolProviderCredentialValidationError, match="认证失败"):
+        client.check_bucket(BUCKET)
+
+
+def test_list_buckets_and_files(client):
+    buckets, info = client.list_buckets()
+    assert buckets == [BUCKET, "media"]
+
+    ret, eof, info = client.list_files(BUCKET, prefix="docs/", limit=SEED_OBJECTS)
+    assert len(ret["items"]) == SEED_OBJECTS and eof
+    ret, eof, info = client.list_files(BUCKET, prefix="docs/", limit=10)
+    assert len(ret["items"]) == 10 and not eof
+
+
+def test_upload_data_stat_and_insert_only(client):
+    token = client.auth.upload_token(BUCKET, "client/data.txt", policy={"insertOnly": 1})
+    ret, info = client.upload_data(BUCKET, "client/data.txt", b"data", token, "text/plain", {"x-qn-meta-a": "1"})
+    assert ret["hash"] == qetag(b"data")
+
+    stat, info = client.stat(BUCKET, "client/data.txt")
+    assert stat["fsize"] == 4 and stat["mimeType"] == "text/plain"
+
+    _, info = client.upload_data(BUCKET, "client/data.txt", b"data", token)
+    assert info.status_code == qiniu_client.STATUS_FILE_EXISTS
+
+    _, info = client.stat(BUCKET, "client/missing.txt")
+    assert info.status_code == qiniu_client.STATUS_NO_SUCH_ENTRY
+
+
+def test_upload_stream_uses_multipart_for_large_content(client):
+    data = bytes(range(256)) * (UPLOAD_PART_SIZE // 256) + b"tail"
+    stats = RetryStats()
+    token = client.auth.upload_token(BUCKET, "client/large.bin")
+    ret, info = client.upload_stream(BUCKET, "client/large.bin", SlowStream(data), token, stats=stats)
+    assert ret["hash"] == qetag(data)
+    # 初始化、两个分片、合并
+    assert len(stats.attempts) == 4
+
+    # 不超过一个分片时表单上传，一次请求
+    stats = RetryStats()
+    token = client.auth.upload_token(BUCKET, "client/small.bin")
+    ret, info = client.upload_stream(BUCKET, "client/small.bin", io.BytesIO(b"small"), token, stats=stats)
+    assert ret["hash"] == qetag(b"small")
+    assert [attempt.operation for attempt in stats.attempts] == ["upload"]
+
+
+def test_sync_and_async_fetch(client, storage_server):
+    source = f"{storage_server.url}/public/{BUCKET}/docs/000001.txt"
+    ret, info = client.fetch(BUCKET, source, "client/fetched.txt")
+    assert ret["fsize"] == 1024
+
+    ret, info = client.async_fetch(BUCKET, source, "client/async.txt")
+    job_id = ret["id"]
+    for _ in range(50):
+        status, info = client.get_fetch_status(BUCKET, job_id)
+        if status["wait"] == -1:
+            break
+        time.sleep(0.02)
+    assert status["wait"] == -1
+    assert client.stat(BUCKET, "client/async.txt")[0]["fsize"] == 1024
+
+
+def test_private_download_urls_match_sdk_signature(client, storage_server):
+    domain = download_domain(storage_server.url, BUCKET)
+    urls, deadline = client.private_download_urls(domain, ["docs/000002.txt", "docs/中文 key.txt"], expires=60)
+    assert urls[0] == client.auth.private_download_url(f"{domain}/docs/000002.txt", expires=60)
+    assert f"e={deadline}" in urls[1] and "%E4%B8%AD%E6%96%87%20key.txt" in urls[1]
+
+    response = client.get(urls[0])
+    assert response.status_code == 200 and len(response.content) == 1024
+    assert client.get(client.private_download_url(f"{domain}/docs/000002.txt")).status_code == 200
+
+
+def test_private_download_urls_equal_sdk_urls_for_encoded_keys(client, monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 1700000000.5)
+    keys = ["docs/a.txt", "docs/中文 key.txt", "docs/a+b?c#d.txt"]
+    urls, deadline = client.private_download_urls("https://cdn.example.com/", keys, expires=60)
+    assert deadline == 1700000060
+    # SDK 不编码 key，传入编码后的链接时结果与批量生成的一致
+    assert urls == [client.auth.private_download_url(f"https://cdn.example.com/{quote(key)}", expires=60) for key in keys]
+    assert urls[0] == client.auth.private_download_url("https://cdn.example.com/docs/a.txt", expires=60)
+
+
+def test_retries_are_recorded_on_server_errors():
+    with mock_storage(["--error-rate", "1"]) as srv:
+        client = get_client(CREDENTIALS)
+        client.retry_policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+
+        stats = RetryStats()
+        response = client.get(f"{download_domain(srv.url, BUCKET)}/docs/000000.txt", stats)
+        assert response.status_code == 503
+        assert stats.retries == 2 and [attempt.status_code for attempt in stats.attempts] == [503] * 3
+
+        stats = RetryStats()
+        buckets, info = client.list_buckets(stats)
+        assert buckets is None and info.status_code == 503
+        assert stats.to_dict()["requests"] == 1 and stats.retries == 2
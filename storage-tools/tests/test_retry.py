@@ -0,0 +1,101 @@
+import pytest
+import requests
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, ReadTimeoutError
+
+from tests.conftest import BUCKET, CREDENTIALS, mock_storage
+from utils import retry
+from utils.qiniu_client import get_client
+from utils.retry import MAX_RECORDED_ATTEMPTS, RetryPolicy, RetryStats, is_retryable, retry_attempts
+
+FAST = RetryPolicy(max_attempts=3, base_delay=0)
+
+
+def connect_error():
+    reason = ConnectTimeoutError(None, "connect timed out")
+    return requests.exceptions.ConnectionError(MaxRetryError(None, "/", reason))
+
+
+@pytest.mark.parametrize(
+    "status_code, idempotent, expected",
+    [
+        (200, True, False),
+        (429, True, True),
+        (503, True, True),
+        (579, True, False),
+        (631, True, False),
+        (503, False, False),
+    ],
+)
+def test_status_codes(status_code, idempotent, expected):
+    assert is_retryable(status_code, idempotent=idempotent) is expected
+
+
+def test_exceptions():
+    read_timeout = requests.exceptions.ReadTimeout(ReadTimeoutError(None, "/", "read timed out"))
+    assert is_retryable(-1, read_timeout)
+    assert not is_retryable(-1, read_timeout, idempotent=False)
+    # 请求未发出时非幂等请求也可以重试
+    assert is_retryable(-1, connect_error(), idempotent=False)
+    assert is_retryable(-1, requests.exceptions.ConnectTimeout(), idempotent=False)
+    assert not is_retryable(-1, ValueError("bad"))
+
+
+def test_backoff_is_capped_full_jitter(monkeypatch):
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: high)
+    policy = RetryPolicy(base_delay=0.2, max_delay=1.0)
+    assert [policy.backoff(n) for n in range(1, 5)] == [0.2, 0.4, 0.8, 1.0]
+
+
+def test_attempts_stop_after_success():
+    stats = RetryStats()
+    statuses = iter([503, 429, 200])
+    for attempt in retry_attempts("op", stats, FAST):
+        attempt.finish(f"host{attempt.number}", next(statuses))
+    assert [attempt.host for attempt in stats.attempts] == ["host0", "host1", "host2"]
+    assert stats.to_dict()["requests"] == 1 and stats.retries == 2
+
+
+def test_attempts_stop_at_limit():
+    stats = RetryStats()
+    count = 0
+    for attempt in retry_attempts("op", stats, FAST):
+        count += 1
+        attempt.finish("host", 503)
+    assert count == 3 and stats.retries == 2
+    assert stats.attempts[-1].retry
+
+
+def test_attempt_without_finish_is_not_retried():
+    assert len(list(retry_attempts("op", None, FAST))) == 1
+
+
+def test_recorded_attempts_are_bounded():
+    stats = RetryStats()
+    for _ in range(MAX_RECORDED_ATTEMPTS + 5):
+        for attempt in retry_attempts("op", stats, FAST):
+            attempt.finish("host", 200)
+    result = stats.to_dict()
+    assert result["requests"] == MAX_RECORDED_ATTEMPTS + 5
+    assert len(result["attempts"]) == MAX_RECORDED_ATTEMPTS
+
+
+def test_client_recovers_from_intermittent_errors():
+    with mock_storage(["--error-rate", "0.3", "--seed", "7", "--seed-objects", "5"]):
+        client = get_client(CREDENTIALS)
+        client.retry_policy = RetryPolicy(max_attempts=5, base_delay=0.001)
+        stats = RetryStats()
+        for _ in range(10):
+            ret, eof, info = client.list_files(BUCKET, limit=5, stats=stats)
+            assert info.status_code == 200 and len(ret["items"]) == 5
+    assert stats.retries > 0
+    assert stats.to_dict()["requests"] == 10
+
+
+def test_merge_combines_attempts_and_retries():
+    merged, other = RetryStats(), RetryStats()
+    for stats, statuses in ((merged, [200]), (other, [503, 200])):
+        status = iter(statuses)
+        for attempt in retry_attempts("op", stats, FAST):
+            attempt.finish("host", next(status))
+    merged.merge(other)
+    assert merged.to_dict()["requests"] == 2 and merged.retries == 1
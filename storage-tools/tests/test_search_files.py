@@ -0,0 +1,79 @@
+import pytest
+
+from tests.conftest import BUCKET, SEED_OBJECTS, invoke_tool, json_result, text_results
+from tools.search_files import MATCH_GLOB, MATCH_PREFIX, MATCH_SUBSTRING, QiniuSearchFilesTool, build_matcher
+
+
+def search(**parameters):
+    """返回 (匹配列表, 汇总结果, 文本消息)"""
+    messages = invoke_tool(QiniuSearchFilesTool, parameters)
+    results = [m.message.json_object for m in messages if m.type == m.MessageType.JSON]
+    return results[:-1], json_result(messages), text_results(messages)
+
+
+@pytest.mark.parametrize(
+    "pattern, match_mode, prefix, key, expected",
+    [
+        ("docs/", MATCH_PREFIX, "docs/", "docs/a.txt", True),
+        ("docs/*.pdf", MATCH_GLOB, "docs/", "docs/a.pdf", True),
+        ("docs/*.pdf", MATCH_GLOB, "docs/", "docs/a.txt", False),
+        ("a?c", MATCH_GLOB, "a", "abc", True),
+        ("report", MATCH_SUBSTRING, "", "2024/report.pdf", True),
+    ],
+)
+def test_build_matcher(pattern, match_mode, prefix, key, expected):
+    list_prefix, match = build_matcher(pattern, match_mode)
+    assert list_prefix == prefix and match(key) is expected
+
+
+def test_build_matcher_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        build_matcher("x", "regex")
+
+
+def test_glob_lists_only_fixed_prefix(storage_server):
+    matches, result, _ = search(pattern="docs/00001*.txt", buckets=BUCKET, max_results=100)
+    assert sorted(match["key"] for match in matches) == [f"docs/{i:06d}.txt" for i in range(10, 20)]
+    assert result["prefix"] == "docs/00001" and not result["truncated"]
+    assert result["buckets"][0]["scanned"] == 10 and result["buckets"][0]["done"]
+
+
+def test_max_results_stops_search(storage_server):
+    matches, result, texts = search(pattern="docs/", match_mode=MATCH_PREFIX, buckets=BUCKET, max_results=3)
+    assert len(matches) == result["count"] == 3
+    assert result["truncated"] and "达到数量上限" in texts[-1]
+
+
+def test_substring_scan_is_bounded_per_bucket(storage_server):
+    matches, result, texts = search(pattern="0", match_mode=MATCH_SUBSTRING, buckets=BUCKET, max_scanned=5)
+    [bucket] = result["buckets"]
+    assert bucket["scanned"] == 5 and bucket["scan_limited"] and not bucket["done"]
+    assert len(matches) == 5 and result["truncated"]
+    assert "扫描上限" in texts[-1]
+    assert [attempt["operation"] for attempt in result["retry"]["attempts"]] == ["list"]
+
+
+def test_all_buckets_are_searched_and_stats_merged(storage_server):
+    matches, result, _ = search(pattern=".txt", match_mode=MATCH_SUBSTRING, max_results=1000)
+    assert len(matches) == SEED_OBJECTS and not result["truncated"]
+    assert {bucket["bucket"] for bucket in result["buckets"]} == {BUCKET, "media"}
+    # 一次列举存储空间，每个存储空间一次列举文件
+    assert result["retry"]["requests"] == 3 and result["retry"]["retries"] == 0
+
+
+def test_missing_bucket_is_reported_per_bucket(storage_server):
+    matches, result, _ = search(pattern="docs/000000.txt", buckets=f"{BUCKET},missing")
+    assert [match["key"] for match in matches] == ["docs/000000.txt"]
+    errors = {bucket["bucket"]: bucket["error"] for bucket in result["buckets"]}
+    assert errors[BUCKET] is None and "不存在" in errors["missing"]
+    assert result["error"] is None
+
+
+def test_empty_pattern_is_rejected(storage_server):
+    assert text_results(invoke_tool(QiniuSearchFilesTool, {"pattern": " "})) == ["搜索模式不能为空"]
+
+
+@pytest.mark.parametrize("parameters", [{"max_results": "many"}, {"max_scanned": "all"}])
+def test_invalid_numbers_return_error_result(parameters):
+    matches, result, _ = search(pattern="docs/*", **parameters)
+    assert matches == [] and result["error"].startswith("执行失败") and result["buckets"] == []
@@ -0,0 +1,60 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from tests.conftest import BUCKET, SEED_OBJECTS, invoke_tool, json_result, text_results
+from tools.sign_urls import QiniuSignUrlsTool, parse_keys
+
+
+def sign(**parameters):
+    messages = invoke_tool(QiniuSignUrlsTool, {"domain": "cdn.example.com", **parameters})
+    return json_result(messages), text_results(messages)
+
+
+@pytest.mark.parametrize(
+    "keys, expected",
+    [
+        ("a, b,,a", ["a", "b"]),
+        ("a,b\nc", ["a,b", "c"]),
+        (" \n ", []),
+    ],
+)
+def test_parse_keys(keys, expected):
+    assert parse_keys(keys) == expected
+
+
+def test_given_keys_are_signed_without_requests():
+    result, _ = sign(keys="docs/a.txt\ndocs/b c.txt", expire_time=60)
+    assert [item["key"] for item in result["urls"]] == ["docs/a.txt", "docs/b c.txt"]
+    url = urlparse(result["urls"][1]["url"])
+    assert url.scheme == "https" and url.netloc == "cdn.example.com"
+    assert parse_qs(url.query)["e"] == [str(result["deadline"])]
+    assert result["retry"]["requests"] == 0
+
+
+def test_prefix_listing_pages_with_next_marker(storage_server):
+    keys, marker = [], None
+    while True:
+        result, _ = sign(bucket=BUCKET, prefix="docs/", max_keys=12, marker=marker)
+        keys += [item["key"] for item in result["urls"]]
+        marker = result["next_marker"]
+        if not marker:
+            break
+    assert keys == [f"docs/{i:06d}.txt" for i in range(SEED_OBJECTS)]
+
+
+def test_missing_bucket_is_not_an_auth_error(storage_server):
+    result, texts = sign(bucket="missing")
+    assert result["error"] == "执行失败：存储空间 'missing' 不存在"
+    assert not texts[0].startswith("认证错误")
+
+
+@pytest.mark.parametrize("parameters", [{"max_keys": "many"}, {"expire_time": "soon"}])
+def test_invalid_numbers_return_error_result(parameters):
+    result, _ = sign(keys="a", **parameters)
+    assert result["error"].startswith("执行失败") and result["urls"] == []
+
+
+def test_expire_time_must_be_positive():
+    messages = invoke_tool(QiniuSignUrlsTool, {"domain": "cdn.example.com", "keys": "a", "expire_time": -1})
+    assert text_results(messages) == ["链接有效期必须大于 0"]
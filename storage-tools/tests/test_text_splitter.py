@@ -0,0 +1,58 @@
+import pytest
+
+from utils.text_splitter import UNIT_TOKENS, TextSplitter, estimate_tokens
+
+TEXT = "\n\n".join(f"Paragraph {i}. " + "word " * 40 for i in range(20))
+
+
+def split(text, splitter, piece=37):
+    chunks = []
+    for i in range(0, len(text), piece):
+        chunks += splitter.feed(text[i : i + piece])
+    return chunks + list(splitter.finish())
+
+
+def test_chunks_respect_size_and_cover_text():
+    chunks = split(TEXT, TextSplitter(300, 0))
+    assert all(len(chunk.text) <= 300 for chunk in chunks)
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert all(TEXT[chunk.start : chunk.end] == chunk.text for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks).replace(" ", "").replace("\n", "") == TEXT.replace(" ", "").replace("\n", "")
+
+
+def test_split_prefers_paragraph_boundaries():
+    chunks = split(TEXT, TextSplitter(500, 0))
+    assert all(chunk.text.startswith("Paragraph") for chunk in chunks)
+
+
+def test_adjacent_chunks_overlap():
+    chunks = split(TEXT, TextSplitter(200, 50))
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start < previous.end
+        assert previous.end - chunk.start <= 50
+
+
+def test_feed_size_does_not_change_result():
+    expected = [chunk.text for chunk in split(TEXT, TextSplitter(250, 40), piece=len(TEXT))]
+    assert [chunk.text for chunk in split(TEXT, TextSplitter(250, 40), piece=1)] == expected
+
+
+def test_token_unit_counts_cjk_as_one_token():
+    text = "中文" * 300
+    chunks = split(text, TextSplitter(100, 0, UNIT_TOKENS))
+    assert all(len(chunk.text) <= 100 for chunk in chunks)
+    assert chunks[0].estimated_tokens == 100
+    assert estimate_tokens("abcd中") == 2
+
+
+def test_buffer_holds_at_most_one_chunk_plus_input():
+    splitter = TextSplitter(100, 10)
+    for _ in splitter.feed("x" * 1000):
+        assert len(splitter.buffer) <= 1000
+    assert len(splitter.buffer) <= 100
+
+
+@pytest.mark.parametrize("args", [(0, 0), (10, 0, "lines")])
+def test_invalid_arguments(args):
+    with pytest.raises(ValueError):
+        TextSplitter(*args)
@@ -0,0 +1,83 @@
+import io
+import json
+import logging
+
+import pytest
+
+from mock_storage_server import download_domain
+from tests.conftest import BUCKET, invoke_tool, json_result
+from tools.file_upload import QiniuUploadTool
+from tools.get_file_content import QiniuGetContentTool
+from tools.list_bucket_files import QiniuListFilesTool
+from utils.retry import RetryStats, retry_attempts
+from utils.timing import Timings
+
+
+def test_phases_accumulate_in_first_seen_order():
+    timings = Timings("tool")
+    for name in ("b", "a", "b"):
+        with timings.phase(name):
+            pass
+    assert list(timings.to_dict()["phases"]) == ["b", "a"]
+
+
+def test_phase_is_recorded_when_it_raises():
+    timings = Timings("tool")
+    try:
+        with timings.phase("failing"):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert "failing" in timings.to_dict()["phases"]
+
+
+def test_bytes_are_counted_from_chunks_and_streams():
+    timings = Timings("tool")
+    assert list(timings.count_chunks([b"ab", b"c"], "downloaded")) == [b"ab", b"c"]
+    reader = timings.count_stream(io.BytesIO(b"12345"), "uploaded")
+    assert reader.read(2) + reader.read() == b"12345"
+    assert timings.to_dict()["bytes"] == {"downloaded": 3, "uploaded": 5}
+
+
+def test_api_calls_come_from_retry_stats():
+    stats = RetryStats()
+    for operation in ("list", "list", "stat"):
+        for attempt in retry_attempts(operation, stats):
+            attempt.finish("host", 200)
+    assert Timings("tool", stats).to_dict()["api_calls"] == {"list": 2, "stat": 1}
+
+
+def test_finish_logs_one_json_line(caplog):
+    timings = Timings("tool")
+    with caplog.at_level(logging.INFO, logger="utils.timing"):
+        result = timings.finish({"error": "boom"}, bucket="b")
+    assert "timings" not in result
+    [record] = [json.loads(r.getMessage()) for r in caplog.records]
+    assert record["event"] == "tool_timings" and record["tool"] == "tool"
+    assert record["bucket"] == "b" and record["error"] == "boom"
+    assert timings.finish({}, include=True)["timings"]["total_ms"] >= 0
+
+
+def test_tool_returns_timings_when_requested(storage_server):
+    result = json_result(invoke_tool(QiniuListFilesTool, {"bucket": BUCKET, "limit": 5, "include_timings": True}))
+    timings = result["timings"]
+    assert {"credentials", "region", "check_bucket", "list"} <= set(timings["phases"])
+    assert timings["api_calls"]["list"] >= 1
+    assert "timings" not in json_result(invoke_tool(QiniuListFilesTool, {"bucket": BUCKET, "limit": 5}))
+
+
+@pytest.mark.parametrize(
+    "tool, parameters, error",
+    [
+        (QiniuGetContentTool, {"file_key": "docs/000000.txt"}, None),
+        (QiniuGetContentTool, {"file_key": "docs/missing.txt"}, "文件不存在: docs/missing.txt"),
+        (QiniuUploadTool, {"content": "x", "filename": "timing.txt", "bucket": BUCKET}, None),
+        (QiniuUploadTool, {"content": "x", "filename": "timing.txt", "bucket": "missing"}, "存储空间 'missing' 不存在"),
+    ],
+)
+def test_each_invocation_logs_timings_once(storage_server, caplog, tool, parameters, error):
+    parameters = {"domain": download_domain(storage_server.url, BUCKET), **parameters}
+    with caplog.at_level(logging.INFO, logger="utils.timing"):
+        invoke_tool(tool, parameters)
+    [record] = [json.loads(r.getMessage()) for r in caplog.records if r.name == "utils.timing"]
+    assert record["error"] is None if error is None else error in record["error"]
@@ -0,0 +1,307 @@
+import logging
+import threading
+import time
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Optional
+
+import requests
+from dify_plugin import Tool
+from dify_plugin.entities.model.llm import LLMModelConfig, LLMResult
+from dify_plugin.entities.model.message import SystemPromptMessage, TextPromptMessageContent, UserPromptMessage
+from dify_plugin.entities.tool import ToolInvokeMessage
+from dify_plugin.errors.tool import ToolProviderCredentialValidationError
+
+from tools.sign_urls import parse_keys
+from utils.compression import ENCODING_METADATA, decompress_chunks
+from utils.content_type import decode_text, is_text_content
+from utils.qiniu_client import QiniuClient, get_client
+from utils.retry import RetryStats
+
+logger = logging.getLogger(__name__)
+
+# 一次最多处理的文件数
+MAX_FILES = 1000
+# 默认和最大并发数
+DEFAULT_MAX_CONCURRENCY = 4
+MAX_CONCURRENCY_LIMIT = 16
+# 每个文件默认发送给模型的最大字符数
+DEFAULT_MAX_CHARS = 20000
+# 文件大小限制（解压后）
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+# 每次读取的大小
+CHUNK_SIZE = 64 * 1024
+# 下载链接有效期（秒），只在本次调用中使用
+URL_EXPIRE_TIME = 3600
+
+
+class RateLimiter:
+    """
+    请求速率限制器，所有工作线程共享
+
+    按固定间隔发放请求名额，rate 为每分钟允许发起的请求数，为 0 时不限速
+    """
+
+    def __init__(self, rate: int = 0):
+        self._interval = 60.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """等待到下一个请求名额"""
+        if not self._interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self._interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _text_of(result: LLMResult) -> str:
+    """模型回复中的文本内容"""
+    content = result.message.content
+    if isinstance(content, str):
+        return content
+    return "".join(item.data for item in content or [] if isinstance(item, TextPromptMessageContent))
+
+
+class QiniuBatchLLMFilesTool(Tool):
+    """
+    七牛云批量文件大模型处理工具
+
+    对一批文件逐个读取文本内容，连同指令发给选定的大模型，用于离线的批量标注、摘要等任务。
+    各文件在有界的线程池中并发处理，模型请求共享一个速率限制器；结果按输入顺序输出，
+    每个文件单独返回用量或错误，单个文件失败不影响其他文件
+    """
+
+    def _read_text(self, client: QiniuClient, url: str, stats: RetryStats) -> str:
+        """
+        下载并解码文本文件，上传时压缩的文件边下载边解压
+
+        Args:
+            client: 七牛云客户端
+            url: 私有下载链接
+            stats: 请求尝试记录
+
+        Returns:
+            文件文本内容
+
+        Raises:
+            requests.exceptions.HTTPError: 下载失败
+            ValueError: 文件过大或不是文本文件
+        """
+        response = client.get(url, stats, stream=True)
+        with response:
+            response.raise_for_status()
+            encoding = response.headers.get(ENCODING_METADATA) or None
+            content_type = response.headers.get("content-type")
+            chunks = []
+            size = 0
+            for chunk in decompress_chunks(response.iter_content(CHUNK_SIZE), encoding):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise ValueError("文件过大，解压后超过 10MB 限制")
+                chunks.append(chunk)
+
+        body = b"".join(chunks)
+        if not is_text_content(content_type, body):
+            raise ValueError("不是文本文件")
+        text, _ = decode_text(body, content_type)
+        return text
+
+    def _process_file(
+        self,
+        index: int,
+        key: str,
+        client: QiniuClient,
+        domain: str,
+        model_config: LLMModelConfig,
+        instruction: str,
+        max_chars: int,
+        limiter: RateLimiter,
+        stats: RetryStats,
+    ) -> dict:
+        """
+        读取一个文件并调用大模型
+
+        Args:
+            index: 文件在输入中的序号
+            key: 文件 key
+            client: 七牛云客户端
+            domain: 访问域名
+            model_config: 模型配置
+            instruction: 发给模型的指令（系统提示词）
+            max_chars: 发送给模型的最大字符数，超出部分截断
+            limiter: 共享的速率限制器
+            stats: 本文件的请求尝试记录，每个线程单独一份
+
+        Returns:
+            单个文件的处理结果
+        """
+        result = {
+            "index": index,
+            "key": key,
+            "success": False,
+            "output": None,
+            "truncated": False,
+            "usage": None,
+            "error": None,
+        }
+        try:
+            url = client.private_download_url(f"{domain}/{key}", expires=URL_EXPIRE_TIME)
+            text = self._read_text(client, url, stats)
+            if len(text) > max_chars:
+                text = text[:max_chars]
+                result["truncated"] = True
+
+            limiter.acquire()
+            llm_result = self.session.model.llm.invoke(
+                model_config=model_config,
+                prompt_messages=[SystemPromptMessage(content=instruction), UserPromptMessage(content=text)],
+                stream=False,
+            )
+            usage = llm_result.usage
+            result.update({
+                "success": True,
+                "output": _text_of(llm_result),
+                "usage": {
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "total_tokens": usage.total_tokens,
+                    "total_price": str(usage.total_price),
+                    "currency": usage.currency,
+                },
+            })
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code
+            result["error"] = f"文件不存在: {key}" if status_code == 404 else f"下载失败: HTTP {status_code}"
+        except Exception as e:
+            logger.warning(f"处理文件 '{key}' 失败: {str(e)}")
+            result["error"] = str(e)
+        return result
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        批量用大模型处理文件
+
+        Args:
+            tool_parameters: 工具参数
+                - model: 模型选择器的值（提供商、模型和参数）
+                - instruction: 发给模型的指令，每个文件的内容作为用户消息
+                - domain: 七牛云绑定的域名
+                - keys: 文件 key 列表，每行一个或逗号分隔，最多 1000 个
+                - max_concurrency: 同时处理的文件数，默认 4，最大 16
+                - requests_per_minute: 每分钟最多发起的模型请求数，默认 0 不限速
+                - max_chars: 每个文件发送给模型的最大字符数，默认 20000
+
+        Returns:
+            Generator[ToolInvokeMessage, None, None]: 按输入顺序每个文件一条 JSON 消息，最后是汇总消息
+        """
+        model = tool_parameters.get("model")
+        instruction = (tool_parameters.get("instruction") or "").strip()
+        domain = (tool_parameters.get("domain") or "").strip()
+        keys = parse_keys(tool_parameters.get("keys") or "")
+
+        # 参数验证
+        if not model:
+            yield self.create_text_message("请选择模型")
+            return
+
+        if not instruction:
+            yield self.create_text_message("指令不能为空")
+            return
+
+        if not domain:
+            yield self.create_text_message("域名不能为空")
+            return
+
+        if not keys:
+            yield self.create_text_message("文件 key 列表不能为空")
+            return
+
+        if len(keys) > MAX_FILES:
+            yield self.create_text_message(f"一次最多处理 {MAX_FILES} 个文件")
+            return
+
+        # 确保域名格式正确
+        if not domain.startswith(('http://', 'https://')):
+            domain = f"https://{domain}"
+
+        stats = RetryStats()
+        try:
+            model_config = LLMModelConfig(**model) if isinstance(model, dict) else model
+            max_concurrency = int(tool_parameters.get("max_concurrency") or DEFAULT_MAX_CONCURRENCY)
+            max_concurrency = max(1, min(max_concurrency, MAX_CONCURRENCY_LIMIT, len(keys)))
+            requests_per_minute = max(0, int(tool_parameters.get("requests_per_minute") or 0))
+            max_chars = max(1, int(tool_parameters.get("max_chars") or DEFAULT_MAX_CHARS))
+
+            client = get_client(self.runtime.credentials)
+            limiter = RateLimiter(requests_per_minute)
+            # 每个文件单独记录请求尝试，结束后按输入顺序合并，避免多线程同时修改
+            file_stats = [RetryStats() for _ in keys]
+            results: list[dict] = []
+            executor = ThreadPoolExecutor(max_workers=max_concurrency)
+            try:
+                futures = [
+                    executor.submit(
+                        self._process_file, index, key, client, domain, model_config, instruction, max_chars,
+                        limiter, file_stats[index],
+                    )
+                    for index, key in enumerate(keys)
+                ]
+                # 按输入顺序输出，前面的文件完成后立即输出，不等待整批结束
+                for future in futures:
+                    result = future.result()
+                    results.append(result)
+                    yield self.create_json_message(result)
+            finally:
+                # 调用方停止读取时取消未开始的文件
+                executor.shutdown(wait=True, cancel_futures=True)
+                for item_stats in file_stats:
+                    stats.merge(item_stats)
+
+            succeeded = [result for result in results if result["success"]]
+            total_price = sum((Decimal(result["usage"]["total_price"]) for result in succeeded), Decimal("0"))
+            usage = {
+                "prompt_tokens": sum(result["usage"]["prompt_tokens"] for result in succeeded),
+                "completion_tokens": sum(result["usage"]["completion_tokens"] for result in succeeded),
+                "total_tokens": sum(result["usage"]["total_tokens"] for result in succeeded),
+                "total_price": str(total_price),
+                "currency": succeeded[0]["usage"]["currency"] if succeeded else None,
+            }
+            failed = len(results) - len(succeeded)
+
+            yield self.create_text_message(f"已处理 {len(results)} 个文件：成功 {len(succeeded)} 个，失败 {failed} 个")
+            yield self.create_json_message({
+                "count": len(results),
+                "succeeded": len(succeeded),
+                "failed": failed,
+                "usage": usage,
+                "error": None,
+                "retry": stats.to_dict(),
+            })
+
+        except ToolProviderCredentialValidationError as e:
+            yield self.create_text_message(f"认证错误：{str(e)}")
+            yield self.create_json_message(self._error_result(f"认证错误：{str(e)}", stats))
+
+        except Exception as e:
+            logger.exception("七牛云批量文件大模型处理工具执行失败")
+            yield self.create_text_message(f"系统错误：{str(e)}")
+            yield self.create_json_message(self._error_result(f"执行失败：{str(e)}", stats))
+
+    def _error_result(self, error: str, stats: RetryStats) -> dict:
+        """处理失败时的汇总结果"""
+        return {
+            "count": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "usage": None,
+            "error": error,
+            "retry": stats.to_dict(),
+        }
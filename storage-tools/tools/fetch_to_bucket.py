@@ -0,0 +1,273 @@
+import logging
+import time
+from collections.abc import Generator
+from typing import Any, Optional
+from urllib.parse import unquote, urlsplit
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+from dify_plugin.errors.tool import ToolProviderCredentialValidationError
+
+from utils.qiniu_client import QiniuClient, get_client
+from utils.retry import RetryStats
+
+logger = logging.getLogger(__name__)
+
+# 异步抓取默认等待时间（秒）
+DEFAULT_WAIT_SECONDS = 30
+# 异步抓取最长等待时间（秒）
+MAX_WAIT_SECONDS = 600
+# 查询任务状态的间隔（秒）：初始值和上限
+POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 5.0
+# 七牛云状态码：文件不存在、文件已存在
+STATUS_NO_SUCH_ENTRY = 612
+STATUS_FILE_EXISTS = 614
+
+
+class QiniuFetchTool(Tool):
+    """
+    七牛云远程抓取工具
+
+    由七牛云服务端下载远程文件并保存到存储空间，文件内容不经过插件：
+    - 同步抓取：一次请求完成，适合小文件
+    - 异步抓取：创建抓取任务并轮询状态，适合大文件；超过等待时间时返回任务 ID，可稍后继续查询
+    """
+
+    def _apply_prefix(self, filename: str, prefix: str = None) -> str:
+        """应用前缀到文件名"""
+        if not prefix:
+            return filename
+
+        # 确保前缀格式正确
+        prefix = prefix.strip()
+        if prefix and not prefix.endswith('/'):
+            prefix += '/'
+
+        return f"{prefix}{filename}"
+
+    def _filename_from_url(self, url: str) -> str:
+        """从远程地址的路径中取文件名"""
+        return unquote(urlsplit(url).path.rsplit('/', 1)[-1])
+
+    def _stat(self, client: QiniuClient, bucket: str, key: str, stats: RetryStats) -> Optional[dict]:
+        """查询文件信息，文件不存在时返回 None"""
+        ret, info = client.stat(bucket, key, stats)
+        if info.status_code == 200:
+            return ret
+        if info.status_code == STATUS_NO_SUCH_ENTRY:
+            return None
+        raise Exception(f"查询文件信息失败: HTTP {info.status_code} - {info.error}")
+
+    def _fetch(
+        self, client: QiniuClient, url: str, bucket: str, key: str, overwrite: bool, stats: RetryStats
+    ) -> dict:
+        """
+        同步抓取
+
+        同步抓取接口总是覆盖同名文件，未设置覆盖时先查询文件是否存在。查询和抓取之间其他请求写入的同名文件
+        会被覆盖，需要严格不覆盖时使用异步抓取
+        """
+        if not overwrite and self._stat(client, bucket, key, stats) is not None:
+            return {"status": "failed", "error": "文件已存在且未设置覆盖选项"}
+
+        ret, info = client.fetch(bucket, url, key, stats)
+        if info.status_code != 200 or not ret:
+            return {"status": "failed", "error": f"抓取失败: HTTP {info.status_code} - {info.error}"}
+
+        return {
+            "status": "success",
+            "key": ret.get("key", key),
+            "size": ret.get("fsize"),
+            "hash": ret.get("hash"),
+            "mime_type": ret.get("mimeType"),
+        }
+
+    @staticmethod
+    def _is_new(stat: dict, previous: Optional[dict]) -> bool:
+        """文件是否在任务创建后写入：任务创建前不存在，或上传时间、hash 发生变化"""
+        if previous is None:
+            return True
+        return (stat.get("putTime"), stat.get("hash")) != (previous.get("putTime"), previous.get("hash"))
+
+    def _wait_job(
+        self,
+        client: QiniuClient,
+        bucket: str,
+        key: str,
+        job_id: str,
+        wait_seconds: float,
+        stats: RetryStats,
+        previous: Optional[dict] = None,
+    ) -> dict:
+        """
+        轮询异步抓取任务，直到任务被处理或超过等待时间
+
+        任务被处理后，文件的上传时间或 hash 与任务创建前不同才算抓取成功；否则任务已结束但没有写入
+        文件（例如源地址无法访问，或文件已存在且未设置覆盖），返回失败。继续查询已有任务（job_id）时
+        不知道任务创建前的文件信息，文件存在即视为成功
+
+        Args:
+            client: 七牛云客户端
+            bucket: 存储空间名称
+            key: 保存的文件 key
+            job_id: 任务 ID
+            wait_seconds: 最长等待时间（秒）
+            stats: 请求尝试记录
+            previous: 任务创建前的文件信息（可选），文件不存在时为 None
+
+        Returns:
+            抓取结果，任务未完成时 status 为 running
+        """
+        deadline = time.monotonic() + wait_seconds
+        interval = POLL_INTERVAL
+        while True:
+            ret, info = client.get_fetch_status(bucket, job_id, stats)
+            if info.status_code != 200 or ret is None:
+                return {"status": "failed", "job_id": job_id, "error": f"查询抓取任务失败: HTTP {info.status_code} - {info.error}"}
+
+            # wait 为 -1 表示任务已被处理，以文件是否更新判断抓取结果
+            if ret.get("wait") == -1:
+                stat = self._stat(client, bucket, key, stats)
+                if stat is None or not self._is_new(stat, previous):
+                    return {"status": "failed", "job_id": job_id, "error": "抓取任务已结束，但没有写入新的文件"}
+                return {
+                    "status": "success",
+                    "job_id": job_id,
+                    "key": key,
+                    "size": stat.get("fsize"),
+                    "hash": stat.get("hash"),
+                    "mime_type": stat.get("mimeType"),
+                }
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"status": "running", "job_id": job_id, "key": key}
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+    def _async_fetch(
+        self,
+        client: QiniuClient,
+        url: str,
+        bucket: str,
+        key: str,
+        overwrite: bool,
+        wait_seconds: float,
+        stats: RetryStats,
+    ) -> dict:
+        """
+        异步抓取：记录任务创建前的文件信息，创建任务并等待完成
+
+        未设置覆盖时任务带 ignore_same_key，由服务端跳过已存在的文件，不受查询和创建任务之间的并发写入影响
+        """
+        previous = self._stat(client, bucket, key, stats)
+        if previous is not None and not overwrite:
+            return {"status": "failed", "error": "文件已存在且未设置覆盖选项"}
+
+        ret, info = client.async_fetch(bucket, url, key, ignore_same_key=not overwrite, stats=stats)
+        if info.status_code != 200 or not ret or not ret.get("id"):
+            error = "文件已存在且未设置覆盖选项" if info.status_code == STATUS_FILE_EXISTS else f"创建抓取任务失败: HTTP {info.status_code} - {info.error}"
+            return {"status": "failed", "error": error}
+
+        return self._wait_job(client, bucket, key, ret["id"], wait_seconds, stats, previous)
+
+    def _generate_access_url(self, key: str, domain: str = None) -> str:
+        """生成访问链接"""
+        domain = domain.rstrip('/')
+        if not domain.startswith(('http://', 'https://')):
+            domain = f"https://{domain}"
+        return f"{domain}/{key}"
+
+    def _result(self, fetch_result: dict, domain: str = None, stats: RetryStats = None) -> dict:
+        """生成 JSON 输出"""
+        key = fetch_result.get("key") if fetch_result["status"] == "success" else None
+        return {
+            "file_key": key,
+            "file_url": self._generate_access_url(key, domain) if key and domain else None,
+            "size": fetch_result.get("size"),
+            "hash": fetch_result.get("hash"),
+            "mime_type": fetch_result.get("mime_type"),
+            "job_id": fetch_result.get("job_id"),
+            "status": fetch_result["status"],
+            "error": fetch_result.get("error"),
+            "retry": stats.to_dict() if stats is not None else None,
+        }
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        """
+        执行七牛云远程抓取操作
+
+        Args:
+            tool_parameters: 工具参数，包含 url, bucket, filename(可选), prefix(可选), mode(可选),
+                wait_seconds(可选), job_id(可选), domain(可选), overwrite(可选)
+
+        Yields:
+            ToolInvokeMessage: 工具执行结果消息
+        """
+        stats = RetryStats()
+        try:
+            # 获取参数
+            url = (tool_parameters.get("url") or "").strip()
+            filename = tool_parameters.get("filename") or ""
+            prefix = tool_parameters.get("prefix", "")
+            bucket = tool_parameters.get("bucket", "")
+            mode = tool_parameters.get("mode") or "sync"
+            job_id = tool_parameters.get("job_id") or ""
+            domain = tool_parameters.get("domain", "")
+            overwrite = tool_parameters.get("overwrite", False)
+            wait_seconds = tool_parameters.get("wait_seconds")
+            wait_seconds = DEFAULT_WAIT_SECONDS if wait_seconds is None else wait_seconds
+            wait_seconds = max(0.0, min(float(wait_seconds), MAX_WAIT_SECONDS))
+
+            # 验证必需参数
+            if not bucket:
+                yield self.create_text_message("存储空间名称不能为空")
+                return
+
+            if not job_id and not url.startswith(('http://', 'https://')):
+                yield self.create_text_message("远程文件地址必须以 http:// 或 https:// 开头")
+                return
+
+            # 未指定文件名时使用远程地址中的文件名
+            filename = filename or self._filename_from_url(url)
+            if not filename:
+                yield self.create_text_message("文件名不能为空")
+                return
+
+            # 应用前缀到文件名
+            final_filename = self._apply_prefix(filename, prefix)
+
+            # 验证存储空间访问权限
+            client = get_client(self.runtime.credentials)
+            client.check_bucket(bucket, stats)
+
+            # 执行抓取
+            if job_id:
+                fetch_result = self._wait_job(client, bucket, final_filename, job_id, wait_seconds, stats)
+            elif mode == "async":
+                fetch_result = self._async_fetch(
+                    client, url, bucket, final_filename, overwrite, wait_seconds, stats
+                )
+            else:
+                fetch_result = self._fetch(client, url, bucket, final_filename, overwrite, stats)
+
+            if fetch_result["status"] == "success":
+                yield self.create_text_message(f"文件抓取成功：{fetch_result['key']}")
+            elif fetch_result["status"] == "running":
+                yield self.create_text_message(f"抓取任务进行中：{fetch_result['job_id']}，可使用任务 ID 继续查询")
+            else:
+                yield self.create_text_message(f"文件抓取失败：{fetch_result['error']}")
+
+            yield self.create_json_message(self._result(fetch_result, domain, stats))
+
+        except ToolProviderCredentialValidationError as e:
+            # 认证错误
+            yield self.create_text_message(f"认证错误：{str(e)}")
+            yield self.create_json_message(self._result({"status": "failed", "error": f"认证错误：{str(e)}"}, stats=stats))
+        except Exception as e:
+            logger.exception("七牛云远程抓取工具执行失败")
+
+            # 其他错误
+            yield self.create_text_message(f"系统错误：{str(e)}")
+            yield self.create_json_message(self._result({"status": "failed", "error": f"执行失败：{str(e)}"}, stats=stats))
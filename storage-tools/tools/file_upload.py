@@ -1,12 +1,19 @@
+import io
 import json
 import logging
+import mimetypes
 from collections.abc import Generator
-from typing import Any
+from typing import Any, BinaryIO, Optional
 
-from qiniu import Auth, put_data, BucketManager
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
+from dify_plugin.file.file import File
+
+from utils.compression import ENCODING_METADATA, check_encoding, compress_stream
+from utils.qiniu_client import get_client
+from utils.retry import RetryStats
+from utils.timing import Timings
 
 logger = logging.getLogger(__name__)
 
@@ -16,40 +23,11 @@ class QiniuUploadTool(Tool):
     七牛云上传工具
     
     支持上传内容到指定的七牛云存储空间，并返回访问链接
-    """
-
-    def _get_auth(self) -> Auth:
-        """获取七牛云认证对象"""
-        access_key = self.runtime.credentials.get("qiniu_access_key")
-        secret_key = self.runtime.credentials.get("qiniu_secret_key")
-        
-        if not access_key or not secret_key:
-            raise ToolProviderCredentialValidationError("七牛云 Access Key 和 Secret Key 不能为空")
-        
-        return Auth(access_key, secret_key)
 
-    def _validate_bucket_access(self, bucket_name: str) -> bool:
-        """验证存储空间访问权限"""
-        try:
-            auth = self._get_auth()
-            bucket_manager = BucketManager(auth)
-            
-            # 尝试获取空间列表来验证认证信息
-            ret, eof, info = bucket_manager.list(bucket_name, limit=1)
-            
-            if info.status_code == 200:
-                return True
-            elif info.status_code == 401:
-                raise ToolProviderCredentialValidationError("七牛云认证失败，请检查 Access Key 和 Secret Key")
-            elif info.status_code == 631:
-                raise ToolProviderCredentialValidationError(f"存储空间 '{bucket_name}' 不存在")
-            else:
-                raise ToolProviderCredentialValidationError(f"验证存储空间失败: {info.error}")
-                
-        except Exception as e:
-            if isinstance(e, ToolProviderCredentialValidationError):
-                raise
-            raise ToolProviderCredentialValidationError(f"验证存储空间时发生错误: {str(e)}")
+    上传的内容可以是文本、字节或 Dify 文件；文件从文件地址流式读取后直接上传，
+    不经过文本编码，也不会完整读入内存。可选在上传时压缩（gzip / zstd），
+    压缩方式记录在对象元数据中，获取文件内容时自动解压
+    """
 
     def _apply_prefix(self, filename: str, prefix: str = None) -> str:
         """应用前缀到文件名"""
@@ -63,25 +41,54 @@ class QiniuUploadTool(Tool):
         
         return f"{prefix}{filename}"
 
-    def _upload_to_qiniu(self, content: str, filename: str, bucket: str, overwrite: bool = False) -> dict:
-        """上传内容到七牛云"""
+    def _detect_mime_type(self, filename: str, *candidates: Optional[str]) -> Optional[str]:
+        """按给定顺序取第一个有效的文件类型，都没有时按文件名推断"""
+        for mime_type in candidates:
+            if mime_type and mime_type != "application/octet-stream":
+                return mime_type.split(";")[0].strip()
+        return mimetypes.guess_type(filename)[0]
+
+    def _upload_to_qiniu(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        bucket: str,
+        overwrite: bool = False,
+        mime_type: Optional[str] = None,
+        compress: Optional[str] = None,
+        timings: Optional[Timings] = None,
+    ) -> dict:
+        """上传流中的内容到七牛云，compress 不为空时边读边压缩，请求失败时按重试策略重试"""
+        timings = timings if timings is not None else Timings("file_upload", RetryStats())
         try:
-            auth = self._get_auth()
+            client = get_client(self.runtime.credentials)
+            auth = client.auth
             
             # 根据覆盖设置生成上传凭证
-            if overwrite:
-                # 允许覆盖同名文件
-                token = auth.upload_token(bucket, filename)
-            else:
-                # 不允许覆盖，如果文件存在会返回错误
-                policy = {
-                    'scope': f'{bucket}:{filename}',
-                    'insertOnly': 1  # 仅当文件不存在时才允许上传
-                }
-                token = auth.upload_token(bucket, filename, policy=policy)
+            with timings.phase("token"):
+                if overwrite:
+                    # 允许覆盖同名文件
+                    token = auth.upload_token(bucket, filename)
+                else:
+                    # 不允许覆盖，如果文件存在会返回错误
+                    policy = {
+                        'scope': f'{bucket}:{filename}',
+                        'insertOnly': 1  # 仅当文件不存在时才允许上传
+                    }
+                    token = auth.upload_token(bucket, filename, policy=policy)
             
-            # 上传内容
-            ret, info = put_data(token, filename, content.encode('utf-8'))
+            # 压缩内容，压缩方式记录在元数据中，文件类型保持原始类型
+            stream = timings.count_stream(stream, "source")
+            metadata = None
+            if compress:
+                stream = timings.count_stream(compress_stream(stream, compress), "compressed")
+                metadata = {ENCODING_METADATA: compress}
+
+            # 上传内容（使用缓存的上传域名和共享连接池，大文件分片上传）
+            with timings.phase("transfer"):
+                ret, info = client.upload_stream(
+                    bucket, filename, stream, token, mime_type, metadata, timings.stats
+                )
             
             if info.status_code == 200:
                 return {
@@ -125,25 +132,36 @@ class QiniuUploadTool(Tool):
         执行七牛云上传操作
         
         Args:
-            tool_parameters: 工具参数，包含 content, filename, bucket, domain(可选), overwrite(可选), prefix(可选)
+            tool_parameters: 工具参数，包含 content 或 file, filename, bucket, domain(可选), overwrite(可选), prefix(可选),
+                compress(可选), include_timings(可选)
             
         Yields:
             ToolInvokeMessage: 工具执行结果消息
         """
+        stats = RetryStats()
+        timings = Timings("file_upload", stats)
+        include_timings = bool(tool_parameters.get("include_timings", False))
         try:
             # 获取参数
             content = tool_parameters.get("content", "")
+            file = tool_parameters.get("file")
             filename = tool_parameters.get("filename", "")
             prefix = tool_parameters.get("prefix", "")
             bucket = tool_parameters.get("bucket", "")
             domain = tool_parameters.get("domain", "")
             overwrite = tool_parameters.get("overwrite", False)
+            compress = tool_parameters.get("compress") or ""
+            compress = "" if compress == "none" else compress
             
             # 验证必需参数
-            if not content:
+            if not content and not isinstance(file, File):
                 yield self.create_text_message("上传内容不能为空")
                 return
-                
+
+            # 上传文件时默认使用原文件名
+            if not filename and isinstance(file, File):
+                filename = file.filename or ""
+
             if not filename:
                 yield self.create_text_message("文件名不能为空")
                 return
@@ -155,19 +173,54 @@ class QiniuUploadTool(Tool):
             # 应用前缀到文件名
             final_filename = self._apply_prefix(filename, prefix)
 
+            # 验证压缩方式
+            if compress:
+                try:
+                    check_encoding(compress)
+                except ValueError as e:
+                    yield self.create_text_message(str(e))
+                    return
+
+            with timings.phase("credentials"):
+                client = get_client(self.runtime.credentials)
+
+            # 查询存储空间所在区域（结果缓存）
+            with timings.phase("region"):
+                client.get_region(bucket)
+
             # 验证存储空间访问权限
-            self._validate_bucket_access(bucket)
+            with timings.phase("check_bucket"):
+                client.check_bucket(bucket, stats)
             
             # 执行上传
-            upload_result = self._upload_to_qiniu(content, final_filename, bucket, overwrite)
+            if isinstance(file, File):
+                # 从文件地址流式读取，不经过文本编码
+                with timings.phase("source"):
+                    response = client.get(file.url, stats, stream=True)
+                with response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    mime_type = self._detect_mime_type(
+                        final_filename, file.mime_type, response.headers.get("Content-Type")
+                    )
+                    upload_result = self._upload_to_qiniu(
+                        response.raw, final_filename, bucket, overwrite, mime_type, compress, timings
+                    )
+            else:
+                data = content if isinstance(content, bytes) else content.encode('utf-8')
+                mime_type = self._detect_mime_type(final_filename)
+                upload_result = self._upload_to_qiniu(
+                    io.BytesIO(data), final_filename, bucket, overwrite, mime_type, compress, timings
+                )
             
             if upload_result["success"]:
                 # 生成访问链接
-                access_url = self._generate_access_url(
-                    upload_result["key"], 
-                    bucket, 
-                    domain if domain else None
-                )
+                with timings.phase("url"):
+                    access_url = self._generate_access_url(
+                        upload_result["key"], 
+                        bucket, 
+                        domain if domain else None
+                    )
                 
                 # 创建简化的成功消息
                 markdown_content = f"文件上传成功：{final_filename}"
@@ -178,10 +231,9 @@ class QiniuUploadTool(Tool):
                 result = {
                     "file_key": upload_result["key"],  # 文件在存储桶中的路径
                     "file_url": access_url if domain else None,  # 如果配置了域名则返回完整URL，否则为None
-                    "error": None  # 成功时错误为None
+                    "error": None,  # 成功时错误为None
+                    "retry": stats.to_dict()  # 请求次数、重试次数和每次尝试的耗时
                 }
-                
-                yield self.create_json_message(result)
             else:
                 # 创建简化的失败消息
                 markdown_content = f"文件上传失败：{upload_result['error']}"
@@ -192,9 +244,9 @@ class QiniuUploadTool(Tool):
                 result = {
                     "file_key": None,
                     "file_url": None,
-                    "error": upload_result['error']
+                    "error": upload_result['error'],
+                    "retry": stats.to_dict()
                 }
-                yield self.create_json_message(result)
                 
         except ToolProviderCredentialValidationError as e:
             # 创建认证错误的简化消息
@@ -206,9 +258,9 @@ class QiniuUploadTool(Tool):
             result = {
                 "file_key": None,
                 "file_url": None,
-                "error": f"认证错误：{str(e)}"
+                "error": f"认证错误：{str(e)}",
+                "retry": stats.to_dict()
             }
-            yield self.create_json_message(result)
         except Exception as e:
             logger.exception("七牛云上传工具执行失败")
             
@@ -221,6 +273,8 @@ class QiniuUploadTool(Tool):
             result = {
                 "file_key": None,
                 "file_url": None,
-                "error": f"执行失败：{str(e)}"
+                "error": f"执行失败：{str(e)}",
+                "retry": stats.to_dict()
             }
-            yield self.create_json_message(result)
+
+        yield self.create_json_message(timings.finish(result, include_timings, bucket=tool_parameters.get("bucket")))
@@ -0,0 +1,270 @@
+import codecs
+import itertools
+import logging
+from collections.abc import Generator, Iterable, Iterator
+from typing import Any, Optional
+
+import requests
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+from dify_plugin.errors.tool import ToolProviderCredentialValidationError
+
+from utils.compression import ENCODING_METADATA, decompress_chunks
+from utils.content_type import DETECT_SIZE, detect_charset, is_text_content
+from utils.qiniu_client import get_client
+from utils.retry import RetryStats
+from utils.text_splitter import UNIT_CHARACTERS, UNIT_TOKENS, TextChunk, TextSplitter
+
+logger = logging.getLogger(__name__)
+
+# 每次读取的大小
+CHUNK_READ_SIZE = 64 * 1024
+# 默认分块大小和重叠大小
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_OVERLAP = 100
+
+
+def limit_bytes(blocks: Iterable[bytes], skip: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+    """
+    跳过开头的 skip 字节，最多输出 length 字节
+
+    Args:
+        blocks: 数据块
+        skip: 跳过的字节数
+        length: 输出的最大字节数，为空表示不限制
+
+    Yields:
+        数据块
+    """
+    for block in blocks:
+        if skip:
+            if len(block) <= skip:
+                skip -= len(block)
+                continue
+            block, skip = block[skip:], 0
+        if length is not None:
+            if len(block) >= length:
+                if length:
+                    yield block[:length]
+                return
+            length -= len(block)
+        yield block
+
+
+def encoded_length(text: str, charset: str) -> int:
+    """文本按字符集编码后的字节数（不含 BOM）"""
+    if charset == "utf-8-sig":
+        charset = "utf-8"
+    data = text.encode(charset, errors="replace")
+    if charset == "utf-16" and data[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+        return len(data) - 2
+    return len(data)
+
+
+class QiniuGetFileChunksTool(Tool):
+    """
+    七牛云文件分块工具
+
+    流式读取文本文件，边读边切分为按字符数或 token 数限制的分块，并按生成顺序逐个输出，
+    内存中只保留当前分块。支持按字节范围读取，超大文件可以分多次处理：
+    设置最大分块数后，结果中的 next_offset 是下一次调用的起始位置
+    """
+
+    def _open(
+        self, url: str, start: int, end: Optional[int], stats: RetryStats
+    ) -> tuple[requests.Response, Optional[str], Iterator[bytes]]:
+        """
+        请求文件内容，返回 (响应, 压缩方式, 从 start 开始的内容)
+
+        未压缩的文件使用 Range 请求；压缩的文件需要从头解压，跳过 start 之前的内容。
+        读取整个文件时只发一次 GET，按字节范围读取时先用一次 HEAD 确认是否压缩
+        """
+        client = get_client(self.runtime.credentials)
+        headers = {}
+        if start or end is not None:
+            with client.head(url, stats) as head:
+                head.raise_for_status()
+                compressed = bool(head.headers.get(ENCODING_METADATA))
+            if not compressed:
+                headers["Range"] = f"bytes={start}-{end - 1 if end is not None else ''}"
+
+        response = client.get(url, stats, stream=True, headers=headers)
+        response.raise_for_status()
+        content_encoding = response.headers.get(ENCODING_METADATA) or None
+
+        # 服务端返回了部分内容时不需要再跳过
+        partial = response.status_code == 206
+        length = end - start if end is not None else None
+        blocks = decompress_chunks(response.iter_content(CHUNK_READ_SIZE), content_encoding)
+        return response, content_encoding, limit_bytes(blocks, 0 if partial else start, None if partial else length)
+
+    def _split(
+        self, blocks: Iterable[bytes], decoder: codecs.IncrementalDecoder, splitter: TextSplitter, progress: dict
+    ) -> Iterator[TextChunk]:
+        """
+        边解码边分块
+
+        Args:
+            blocks: 文件内容
+            decoder: 增量解码器
+            splitter: 分块器
+            progress: 读取进度，offset 为已读取内容结束的字节位置，eof 表示已读到结尾
+
+        Yields:
+            TextChunk: 分块
+        """
+        for block in blocks:
+            progress["offset"] += len(block)
+            yield from splitter.feed(decoder.decode(block))
+        progress["eof"] = True
+        yield from splitter.feed(decoder.decode(b"", final=True))
+        yield from splitter.finish()
+
+    def _invoke(
+        self, tool_parameters: dict[str, Any]
+    ) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        读取七牛云文件并分块
+
+        Args:
+            tool_parameters: 工具参数
+                - file_key: 文件的 key（路径）
+                - domain: 七牛云绑定的域名
+                - expire_time: 链接有效期（秒），默认 3600 秒
+                - chunk_size: 分块大小，默认 1000
+                - chunk_unit: 分块大小单位，characters 或 tokens，默认 characters
+                - chunk_overlap: 相邻分块的重叠大小，默认 100
+                - start_offset: 起始字节位置，默认 0
+                - end_offset: 结束字节位置（不含），默认读到文件末尾
+                - max_chunks: 最多输出的分块数，0 表示不限制
+
+        Returns:
+            Generator[ToolInvokeMessage, None, None]: 每个分块一条 JSON 消息，最后是汇总消息
+        """
+        file_key = tool_parameters.get("file_key", "").strip()
+        domain = tool_parameters.get("domain", "").strip()
+        expire_time = tool_parameters.get("expire_time", 3600)
+        chunk_unit = tool_parameters.get("chunk_unit") or UNIT_CHARACTERS
+        chunk_size = int(tool_parameters.get("chunk_size") or DEFAULT_CHUNK_SIZE)
+        chunk_overlap = tool_parameters.get("chunk_overlap")
+        chunk_overlap = int(DEFAULT_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap)
+        start_offset = int(tool_parameters.get("start_offset") or 0)
+        end_offset = tool_parameters.get("end_offset")
+        end_offset = int(end_offset) if end_offset else None
+        max_chunks = int(tool_parameters.get("max_chunks") or 0)
+
+        # 参数验证
+        if not file_key:
+            yield self.create_text_message("文件 key 不能为空")
+            return
+
+        if not domain:
+            yield self.create_text_message("域名不能为空")
+            return
+
+        if start_offset < 0 or (end_offset is not None and end_offset <= start_offset):
+            yield self.create_text_message("字节范围无效：结束位置需要大于起始位置")
+            return
+
+        try:
+            splitter = TextSplitter(chunk_size, chunk_overlap, chunk_unit if chunk_unit == UNIT_TOKENS else UNIT_CHARACTERS)
+        except ValueError as e:
+            yield self.create_text_message(str(e))
+            return
+
+        # 确保域名格式正确
+        if not domain.startswith(('http://', 'https://')):
+            domain = f"https://{domain}"
+
+        try:
+            # 生成私有下载链接
+            client = get_client(self.runtime.credentials)
+            private_url = client.private_download_url(f"{domain}/{file_key}", expires=expire_time)
+
+            stats = RetryStats()
+            response, content_encoding, blocks = self._open(private_url, start_offset, end_offset, stats)
+            with response:
+                # 读取开头的采样，判断是否为文本和字符集
+                sample = b""
+                for block in blocks:
+                    sample += block
+                    if len(sample) >= DETECT_SIZE:
+                        break
+
+                content_type = response.headers.get("content-type")
+                if sample and not is_text_content(content_type, sample):
+                    yield self.create_text_message(f"文件不是文本文件，无法分块：{file_key}")
+                    return
+                charset = detect_charset(sample, content_type)
+
+                # 从文件中间开始时跳过不完整的 UTF-8 字符
+                offset = start_offset
+                if start_offset and charset.startswith("utf-8"):
+                    leading = len(sample) - len(sample.lstrip(bytes(range(0x80, 0xC0))))
+                    sample, offset = sample[leading:], offset + leading
+
+                decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+                progress = {"offset": offset, "eof": False}
+                chunk_count = 0
+                next_offset = None
+                for chunk in self._split(itertools.chain((sample,), blocks), decoder, splitter, progress):
+                    yield self.create_json_message({
+                        "chunk_index": chunk.index,
+                        "content": chunk.text,
+                        "characters": len(chunk.text),
+                        "estimated_tokens": chunk.estimated_tokens,
+                    })
+                    chunk_count += 1
+                    if max_chunks and chunk_count >= max_chunks:
+                        break
+
+                if not (progress["eof"] and not splitter.pending):
+                    # 下一次从未输出的内容（含重叠部分）开始
+                    pending_bytes = len(decoder.getstate()[0]) + encoded_length(splitter.buffer, charset)
+                    next_offset = progress["offset"] - pending_bytes
+
+            done = next_offset is None
+            if done:
+                markdown_content = f"文件分块完成：{file_key}，共 {chunk_count} 个分块"
+            else:
+                markdown_content = f"已输出 {chunk_count} 个分块：{file_key}，下次从字节位置 {next_offset} 继续"
+            yield self.create_text_message(markdown_content)
+
+            # 汇总结果
+            yield self.create_json_message({
+                "file_key": file_key,
+                "chunk_count": chunk_count,
+                "chunk_unit": splitter.unit,
+                "charset": charset,
+                "content_encoding": content_encoding,
+                "done": done,
+                "next_offset": next_offset,
+                "error": None,
+                "retry": stats.to_dict(),
+            })
+
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                error_msg = f"文件不存在: {file_key}"
+            elif e.response.status_code == 403:
+                error_msg = "访问被拒绝，请检查文件权限或域名配置"
+            elif e.response.status_code == 416:
+                error_msg = "起始位置超出文件大小"
+            else:
+                error_msg = f"HTTP 错误: {e.response.status_code}"
+
+            logger.error(error_msg)
+            yield self.create_text_message(f"获取失败：{error_msg}")
+
+        except requests.exceptions.RequestException as e:
+            error_msg = f"网络请求失败: {str(e)}"
+            logger.error(error_msg)
+            yield self.create_text_message(f"网络错误：{error_msg}")
+
+        except ToolProviderCredentialValidationError as e:
+            yield self.create_text_message(f"认证错误：{str(e)}")
+
+        except Exception as e:
+            error_msg = f"文件分块失败: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            yield self.create_text_message(f"系统错误：{error_msg}")
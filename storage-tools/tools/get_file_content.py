@@ -2,32 +2,59 @@ import json
 import logging
 import requests
 from collections.abc import Generator
-from typing import Any
+from typing import Any, Optional
 
-from qiniu import Auth
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.compression import ENCODING_METADATA, decompress_chunks
+from utils.content_type import decode_text, is_text_content
+from utils.qiniu_client import get_client
+from utils.retry import RetryStats
+from utils.timing import Timings
+
 logger = logging.getLogger(__name__)
 
+# 文件大小限制（解压后）
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+# 每次读取的大小
+CHUNK_SIZE = 64 * 1024
+
 
 class QiniuGetContentTool(Tool):
     """
     七牛云获取文件内容工具
     
     通过文件 key 和域名获取签名 URL 并读取文件内容
+
+    上传时压缩的文件（元数据 x-qn-meta-content-encoding）边下载边解压，超过大小限制时立即停止读取。
+    按 Content-Type 和文件头区分文本和二进制：文本按字符集解码一次，二进制不解码，只返回文件
     """
 
-    def _get_auth(self) -> Auth:
-        """获取七牛云认证对象"""
-        access_key = self.runtime.credentials.get("qiniu_access_key")
-        secret_key = self.runtime.credentials.get("qiniu_secret_key")
-        
-        if not access_key or not secret_key:
-            raise ToolProviderCredentialValidationError("七牛云 Access Key 和 Secret Key 不能为空")
-        
-        return Auth(access_key, secret_key)
+    def _read_body(
+        self, response: requests.Response, encoding: Optional[str], timings: Timings
+    ) -> Optional[bytes]:
+        """
+        流式读取响应内容，按压缩方式解压
+
+        Args:
+            response: 流式响应
+            encoding: 压缩方式，为空表示未压缩
+            timings: 计时，记录下载的字节数
+
+        Returns:
+            文件内容，解压后超过大小限制时返回 None
+        """
+        chunks = []
+        size = 0
+        raw_chunks = timings.count_chunks(response.iter_content(CHUNK_SIZE), "downloaded")
+        for chunk in decompress_chunks(raw_chunks, encoding):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
 
     def _invoke(
         self, tool_parameters: dict[str, Any]
@@ -40,6 +67,7 @@ class QiniuGetContentTool(Tool):
                 - file_key: 文件的 key（路径）
                 - domain: 七牛云绑定的域名
                 - expire_time: 链接有效期（秒），默认 3600 秒
+                - include_timings: 是否在结果中返回各阶段耗时，默认 False
                 
         Returns:
             Generator[ToolInvokeMessage, None, None]: 工具调用消息生成器
@@ -47,6 +75,9 @@ class QiniuGetContentTool(Tool):
         file_key = tool_parameters.get("file_key", "").strip()
         domain = tool_parameters.get("domain", "").strip()
         expire_time = tool_parameters.get("expire_time", 3600)
+        include_timings = bool(tool_parameters.get("include_timings", False))
+        stats = RetryStats()
+        timings = Timings("get_file_content", stats)
         
         # 参数验证
         if not file_key:
@@ -60,33 +91,70 @@ class QiniuGetContentTool(Tool):
         # 确保域名格式正确
         if not domain.startswith(('http://', 'https://')):
             domain = f"https://{domain}"
-            
+
+        result = yield from self._get_content(file_key, domain, expire_time, stats, timings)
+        timings.finish(result, include_timings, file_key=file_key)
+        if result.get("success"):
+            # 返回 JSON 格式的详细结果
+            yield self.create_json_message(result)
+
+    def _get_content(
+        self, file_key: str, domain: str, expire_time: int, stats: RetryStats, timings: Timings
+    ) -> Generator[ToolInvokeMessage, None, dict]:
+        """
+        下载并解析文件内容，输出文本和文件消息
+
+        Args:
+            file_key: 文件的 key（路径）
+            domain: 包含协议的下载域名
+            expire_time: 链接有效期（秒）
+            stats: 请求尝试记录
+            timings: 计时
+
+        Returns:
+            成功时为详细结果，失败时为只包含 error 的字典
+        """
         try:
-            # 获取认证对象
-            auth = self._get_auth()
+            # 获取客户端
+            with timings.phase("credentials"):
+                client = get_client(self.runtime.credentials)
             
             # 生成私有下载链接
-            base_url = f"{domain}/{file_key}"
-            private_url = auth.private_download_url(base_url, expires=expire_time)
+            with timings.phase("sign_url"):
+                base_url = f"{domain}/{file_key}"
+                private_url = client.private_download_url(base_url, expires=expire_time)
             
             yield self.create_text_message("正在获取文件内容...")
             
-            # 请求文件内容
-            response = requests.get(private_url, timeout=30)
-            response.raise_for_status()
-            
-            # 获取文件内容
-            content = response.text
-            content_type = response.headers.get('content-type', 'text/plain')
-            file_size = len(response.content)
-            
-            # 检查文件大小（限制在 10MB 以内）
-            max_size = 10 * 1024 * 1024  # 10MB
-            if file_size > max_size:
-                yield self.create_text_message(
-                    f"文件过大（{file_size/1024/1024:.2f}MB），超过 10MB 限制"
-                )
-                return
+            # 请求文件内容（流式读取，压缩的文件边读边解压，临时错误时重试）
+            with timings.phase("download"):
+                response = client.get(private_url, stats, stream=True)
+            with response:
+                response.raise_for_status()
+                content_encoding = response.headers.get(ENCODING_METADATA) or None
+                raw_content_type = response.headers.get('content-type')
+
+                # 检查文件大小（限制在 10MB 以内）
+                content_length = int(response.headers.get('content-length') or 0)
+                if not content_encoding and content_length > MAX_FILE_SIZE:
+                    error_msg = f"文件过大（{content_length/1024/1024:.2f}MB），超过 10MB 限制"
+                    yield self.create_text_message(error_msg)
+                    return {"error": error_msg}
+
+                with timings.phase("download"):
+                    body = self._read_body(response, content_encoding, timings)
+                if body is None:
+                    error_msg = "文件过大，解压后超过 10MB 限制"
+                    yield self.create_text_message(error_msg)
+                    return {"error": error_msg}
+
+            # 获取文件内容：文本按字符集解码，二进制不解码
+            with timings.phase("decode"):
+                is_text = is_text_content(raw_content_type, body)
+                content, charset = decode_text(body, raw_content_type) if is_text else (None, None)
+            timings.add_bytes("content", len(body))
+            content_type = raw_content_type or ('text/plain' if is_text else 'application/octet-stream')
+            file_size = len(body)
             
             # 返回结果
             result = {
@@ -94,13 +162,19 @@ class QiniuGetContentTool(Tool):
                 "file_key": file_key,
                 "domain": domain,
                 "content_type": content_type,
+                "content_encoding": content_encoding,
                 "file_size": file_size,
+                "is_text": is_text,
+                "charset": charset,
                 "content": content,
-                "signed_url": private_url
+                "signed_url": private_url,
+                "retry": stats.to_dict()
             }
             
             # 创建简化的文本结果
             markdown_content = f"文件内容获取成功：{file_key}（{file_size/1024:.2f} KB）"
+            if not is_text:
+                markdown_content += "，二进制文件，内容以文件形式返回"
             
             yield self.create_text_message(markdown_content)
             
@@ -112,10 +186,9 @@ class QiniuGetContentTool(Tool):
                 "content_type": content_type,
                 "domain": domain
             }
-            yield self.create_blob_message(response.content, meta=blob_meta)
+            yield self.create_blob_message(body, meta=blob_meta)
             
-            # 返回 JSON 格式的详细结果
-            yield self.create_json_message(result)
+            return result
             
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
@@ -133,6 +206,7 @@ class QiniuGetContentTool(Tool):
             
             logger.error(error_msg)
             yield self.create_text_message(markdown_content)
+            return {"error": error_msg}
             
         except requests.exceptions.RequestException as e:
             error_msg = f"网络请求失败: {str(e)}"
@@ -142,6 +216,7 @@ class QiniuGetContentTool(Tool):
             
             logger.error(error_msg)
             yield self.create_text_message(markdown_content)
+            return {"error": error_msg}
             
         except Exception as e:
             error_msg = f"获取文件内容失败: {str(e)}"
@@ -151,3 +226,4 @@ class QiniuGetContentTool(Tool):
             
             logger.error(error_msg, exc_info=True)
             yield self.create_text_message(markdown_content)
+            return {"error": error_msg}
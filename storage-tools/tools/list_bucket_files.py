@@ -3,11 +3,14 @@ import logging
 from collections.abc import Generator
 from typing import Any
 
-from qiniu import Auth, BucketManager
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.qiniu_client import get_client
+from utils.retry import RetryStats
+from utils.timing import Timings
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,51 +21,20 @@ class QiniuListFilesTool(Tool):
     根据前缀列出指定存储空间中的文件
     """
 
-    def _get_auth(self) -> Auth:
-        """获取七牛云认证对象"""
-        access_key = self.runtime.credentials.get("qiniu_access_key")
-        secret_key = self.runtime.credentials.get("qiniu_secret_key")
-        
-        if not access_key or not secret_key:
-            raise ToolProviderCredentialValidationError("七牛云 Access Key 和 Secret Key 不能为空")
-        
-        return Auth(access_key, secret_key)
-
-    def _validate_bucket_access(self, bucket_name: str) -> bool:
-        """验证存储空间访问权限"""
-        try:
-            auth = self._get_auth()
-            bucket_manager = BucketManager(auth)
-            
-            # 尝试获取空间列表来验证认证信息
-            ret, eof, info = bucket_manager.list(bucket_name, limit=1)
-            
-            if info.status_code == 200:
-                return True
-            elif info.status_code == 401:
-                raise ToolProviderCredentialValidationError("七牛云认证失败，请检查 Access Key 和 Secret Key")
-            elif info.status_code == 631:
-                raise ToolProviderCredentialValidationError(f"存储空间 '{bucket_name}' 不存在")
-            else:
-                raise ToolProviderCredentialValidationError(f"验证存储空间失败: {info.error}")
-                
-        except Exception as e:
-            if isinstance(e, ToolProviderCredentialValidationError):
-                raise
-            raise ToolProviderCredentialValidationError(f"验证存储空间时发生错误: {str(e)}")
-
-    def _list_files(self, bucket: str, prefix: str = None, limit: int = 100, marker: str = None) -> dict:
+    def _list_files(
+        self, bucket: str, prefix: str = None, limit: int = 100, marker: str = None, stats: RetryStats = None
+    ) -> dict:
         """列出文件"""
         try:
-            auth = self._get_auth()
-            bucket_manager = BucketManager(auth)
+            client = get_client(self.runtime.credentials)
             
-            # 获取文件列表
-            ret, eof, info = bucket_manager.list(
+            # 获取文件列表（同一个 marker 的请求可以安全重试）
+            ret, eof, info = client.list_files(
                 bucket, 
                 prefix=prefix, 
                 marker=marker, 
-                limit=limit
+                limit=limit,
+                stats=stats
             )
             
             if info.status_code == 200:
@@ -146,11 +118,15 @@ class QiniuListFilesTool(Tool):
         执行获取文件列表操作
         
         Args:
-            tool_parameters: 工具参数，包含 bucket, prefix(可选), limit(可选), marker(可选), domain(可选)
+            tool_parameters: 工具参数，包含 bucket, prefix(可选), limit(可选), marker(可选), domain(可选),
+                include_timings(可选)
             
         Yields:
             ToolInvokeMessage: 工具执行结果消息
         """
+        stats = RetryStats()
+        timings = Timings("list_bucket_files", stats)
+        include_timings = bool(tool_parameters.get("include_timings", False))
         try:
             # 获取参数
             bucket = tool_parameters.get("bucket", "")
@@ -173,26 +149,36 @@ class QiniuListFilesTool(Tool):
             # 限制 limit 范围
             limit = max(1, min(limit, 1000))  # 限制在 1-1000 之间
 
+            with timings.phase("credentials"):
+                client = get_client(self.runtime.credentials)
+
+            # 查询存储空间所在区域（结果缓存）
+            with timings.phase("region"):
+                client.get_region(bucket)
+
             # 验证存储空间访问权限
-            self._validate_bucket_access(bucket)
+            with timings.phase("check_bucket"):
+                client.check_bucket(bucket, stats)
             
             # 执行文件列表获取
-            list_result = self._list_files(bucket, prefix, limit, marker)
+            with timings.phase("list"):
+                list_result = self._list_files(bucket, prefix, limit, marker, stats)
             
             if list_result["success"]:
                 # 为文件添加访问链接
                 files_with_urls = []
-                for file_info in list_result["files"]:
-                    file_with_url = file_info.copy()
-                    if domain:
-                        file_with_url["url"] = self._generate_access_url(
-                            file_info["key"], 
-                            bucket, 
-                            domain
-                        )
-                    else:
-                        file_with_url["url"] = None
-                    files_with_urls.append(file_with_url)
+                with timings.phase("url"):
+                    for file_info in list_result["files"]:
+                        file_with_url = file_info.copy()
+                        if domain:
+                            file_with_url["url"] = self._generate_access_url(
+                                file_info["key"], 
+                                bucket, 
+                                domain
+                            )
+                        else:
+                            file_with_url["url"] = None
+                        files_with_urls.append(file_with_url)
                 
                 # 创建简化的成功消息
                 markdown_content = f"文件列表获取成功，共 {list_result['count']} 个文件"
@@ -207,10 +193,9 @@ class QiniuListFilesTool(Tool):
                     "next_marker": list_result["marker"] if not list_result["eof"] else None,
                     "bucket": bucket,
                     "prefix": prefix,
-                    "error": None
+                    "error": None,
+                    "retry": stats.to_dict()
                 }
-                
-                yield self.create_json_message(result)
             else:
                 # 创建简化的失败消息
                 markdown_content = f"文件列表获取失败：{list_result['error']}"
@@ -225,9 +210,9 @@ class QiniuListFilesTool(Tool):
                     "next_marker": None,
                     "bucket": bucket,
                     "prefix": prefix,
-                    "error": list_result['error']
+                    "error": list_result['error'],
+                    "retry": stats.to_dict()
                 }
-                yield self.create_json_message(result)
                 
         except ToolProviderCredentialValidationError as e:
             # 创建认证错误的简化消息
@@ -243,9 +228,9 @@ class QiniuListFilesTool(Tool):
                 "next_marker": None,
                 "bucket": bucket if 'bucket' in locals() else "",
                 "prefix": prefix if 'prefix' in locals() else "",
-                "error": f"认证错误：{str(e)}"
+                "error": f"认证错误：{str(e)}",
+                "retry": stats.to_dict()
             }
-            yield self.create_json_message(result)
         except Exception as e:
             logger.exception("七牛云文件列表工具执行失败")
             
@@ -262,6 +247,8 @@ class QiniuListFilesTool(Tool):
                 "next_marker": None,
                 "bucket": bucket if 'bucket' in locals() else "",
                 "prefix": prefix if 'prefix' in locals() else "",
-                "error": f"执行失败：{str(e)}"
+                "error": f"执行失败：{str(e)}",
+                "retry": stats.to_dict()
             }
-            yield self.create_json_message(result)
+
+        yield self.create_json_message(timings.finish(result, include_timings, bucket=tool_parameters.get("bucket")))
@@ -3,11 +3,14 @@ import logging
 from collections.abc import Generator
 from typing import Any
 
-from qiniu import Auth, BucketManager
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.qiniu_client import get_client
+from utils.retry import RetryStats
+from utils.timing import Timings
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,24 +21,15 @@ class QiniuListBucketsTool(Tool):
     获取当前账户下的所有存储空间列表
     """
 
-    def _get_auth(self) -> Auth:
-        """获取七牛云认证对象"""
-        access_key = self.runtime.credentials.get("qiniu_access_key")
-        secret_key = self.runtime.credentials.get("qiniu_secret_key")
-        
-        if not access_key or not secret_key:
-            raise ToolProviderCredentialValidationError("七牛云 Access Key 和 Secret Key 不能为空")
-        
-        return Auth(access_key, secret_key)
-
-    def _list_buckets(self) -> dict:
+    def _list_buckets(self, timings: Timings) -> dict:
         """获取存储空间列表"""
         try:
-            auth = self._get_auth()
-            bucket_manager = BucketManager(auth)
+            with timings.phase("credentials"):
+                client = get_client(self.runtime.credentials)
             
             # 获取存储空间列表
-            ret, info = bucket_manager.buckets()
+            with timings.phase("list_buckets"):
+                ret, info = client.list_buckets(timings.stats)
             
             if info.status_code == 200:
                 return {
@@ -64,14 +58,17 @@ class QiniuListBucketsTool(Tool):
         执行获取存储空间列表操作
         
         Args:
-            tool_parameters: 工具参数（此工具无需额外参数）
+            tool_parameters: 工具参数，include_timings(可选)
             
         Yields:
             ToolInvokeMessage: 工具执行结果消息
         """
+        stats = RetryStats()
+        timings = Timings("list_buckets", stats)
+        include_timings = bool(tool_parameters.get("include_timings", False))
         try:
             # 获取存储空间列表
-            list_result = self._list_buckets()
+            list_result = self._list_buckets(timings)
             
             if list_result["success"]:
                 # 创建简化的成功消息
@@ -83,10 +80,9 @@ class QiniuListBucketsTool(Tool):
                 result = {
                     "buckets": list_result["buckets"],
                     "count": list_result["count"],
-                    "error": None
+                    "error": None,
+                    "retry": stats.to_dict()
                 }
-                
-                yield self.create_json_message(result)
             else:
                 # 创建简化的失败消息
                 markdown_content = f"存储桶列表获取失败：{list_result['error']}"
@@ -97,9 +93,9 @@ class QiniuListBucketsTool(Tool):
                 result = {
                     "buckets": [],
                     "count": 0,
-                    "error": list_result['error']
+                    "error": list_result['error'],
+                    "retry": stats.to_dict()
                 }
-                yield self.create_json_message(result)
                 
         except ToolProviderCredentialValidationError as e:
             # 创建认证错误的简化消息
@@ -111,9 +107,9 @@ class QiniuListBucketsTool(Tool):
             result = {
                 "buckets": [],
                 "count": 0,
-                "error": f"认证错误：{str(e)}"
+                "error": f"认证错误：{str(e)}",
+                "retry": stats.to_dict()
             }
-            yield self.create_json_message(result)
         except Exception as e:
             logger.exception("七牛云存储空间列表工具执行失败")
             
@@ -126,6 +122,8 @@ class QiniuListBucketsTool(Tool):
             result = {
                 "buckets": [],
                 "count": 0,
-                "error": f"执行失败：{str(e)}"
+                "error": f"执行失败：{str(e)}",
+                "retry": stats.to_dict()
             }
-            yield self.create_json_message(result)
+
+        yield self.create_json_message(timings.finish(result, include_timings))
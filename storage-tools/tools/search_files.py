@@ -0,0 +1,302 @@
+import fnmatch
+import logging
+import queue
+import threading
+from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+from dify_plugin.errors.tool import ToolProviderCredentialValidationError
+
+from utils.qiniu_client import STATUS_NO_SUCH_BUCKET, QiniuClient, get_client
+from utils.retry import RetryStats
+
+logger = logging.getLogger(__name__)
+
+# 匹配方式
+MATCH_PREFIX = "prefix"
+MATCH_GLOB = "glob"
+MATCH_SUBSTRING = "substring"
+# glob 中的通配符
+GLOB_SPECIAL_CHARS = "*?["
+# 同时搜索的存储空间数
+MAX_CONCURRENT_BUCKETS = 8
+# 列举的单页数量（接口上限）
+LIST_PAGE_SIZE = 1000
+# 默认和最多返回的匹配数
+DEFAULT_MAX_RESULTS = 20
+MAX_RESULTS_LIMIT = 1000
+# 每个存储空间默认和最多列举的文件数，子串匹配无法下推前缀，需要限制扫描量
+DEFAULT_MAX_SCANNED = 100000
+MAX_SCANNED_LIMIT = 1000000
+
+
+def build_matcher(pattern: str, match_mode: str) -> tuple[str, Callable[[str], bool]]:
+    """
+    把 key 模式转换为列举前缀和匹配函数
+
+    列举前缀下推到服务端，只列举可能匹配的文件：
+    - prefix：模式本身
+    - glob：第一个通配符之前的部分，例如 "docs/*.pdf" 的前缀为 "docs/"
+    - substring：无法下推，列举整个存储空间
+
+    Args:
+        pattern: key 模式
+        match_mode: 匹配方式，prefix、glob 或 substring
+
+    Returns:
+        (列举前缀, 匹配函数)
+
+    Raises:
+        ValueError: 匹配方式无效
+    """
+    if match_mode == MATCH_PREFIX:
+        return pattern, lambda key: key.startswith(pattern)
+    if match_mode == MATCH_GLOB:
+        positions = [pattern.find(char) for char in GLOB_SPECIAL_CHARS if char in pattern]
+        prefix = pattern[:min(positions)] if positions else pattern
+        return prefix, lambda key: fnmatch.fnmatchcase(key, pattern)
+    if match_mode == MATCH_SUBSTRING:
+        return "", lambda key: pattern in key
+    raise ValueError(f"不支持的匹配方式: {match_mode}")
+
+
+class QiniuSearchFilesTool(Tool):
+    """
+    七牛云文件搜索工具
+
+    在全部或指定的存储空间中按 key 模式搜索文件：各存储空间并发分页列举，前缀下推到服务端，
+    找到匹配的文件立即输出，达到要求的数量或扫描上限后停止列举
+    """
+
+    def _search_bucket(
+        self,
+        client: QiniuClient,
+        bucket: str,
+        prefix: str,
+        match: Callable[[str], bool],
+        matches: queue.Queue,
+        stop: threading.Event,
+        max_scanned: int,
+        stats: RetryStats,
+    ) -> None:
+        """
+        分页列举一个存储空间，把匹配的文件和最后的汇总放入队列
+
+        Args:
+            client: 七牛云客户端
+            bucket: 存储空间名称
+            prefix: 列举前缀
+            match: 匹配函数
+            matches: 输出队列，元素为 ("match", 文件信息) 或最后的 ("done", 存储空间汇总)
+            stop: 停止信号，已找到足够的匹配时设置
+            max_scanned: 最多列举的文件数，达到后停止列举并标记 scan_limited
+            stats: 本存储空间的请求尝试记录，每个线程单独一份
+        """
+        summary = {
+            "bucket": bucket, "scanned": 0, "matched": 0, "done": False, "scan_limited": False, "error": None
+        }
+        try:
+            marker = None
+            while not stop.is_set():
+                if summary["scanned"] >= max_scanned:
+                    summary["scan_limited"] = True
+                    return
+                limit = min(LIST_PAGE_SIZE, max_scanned - summary["scanned"])
+                ret, eof, info = client.list_files(
+                    bucket, prefix=prefix or None, marker=marker, limit=limit, stats=stats
+                )
+                if info.status_code == 401:
+                    summary["error"] = "七牛云认证失败，请检查 Access Key 和 Secret Key"
+                    return
+                if info.status_code == STATUS_NO_SUCH_BUCKET:
+                    summary["error"] = f"存储空间 '{bucket}' 不存在"
+                    return
+                if info.status_code != 200 or not isinstance(ret, dict):
+                    summary["error"] = f"获取文件列表失败: HTTP {info.status_code} - {info.error}"
+                    return
+
+                for item in ret.get("items", []):
+                    summary["scanned"] += 1
+                    key = item.get("key", "")
+                    if match(key):
+                        summary["matched"] += 1
+                        matches.put(("match", {
+                            "bucket": bucket,
+                            "key": key,
+                            "size": item.get("fsize", 0),
+                            "hash": item.get("hash", ""),
+                            "put_time": item.get("putTime", 0),
+                            "mime_type": item.get("mimeType", ""),
+                        }))
+
+                marker = ret.get("marker")
+                if eof or not marker:
+                    summary["done"] = True
+                    return
+
+        except Exception as e:
+            logger.warning(f"搜索存储空间 '{bucket}' 失败: {str(e)}")
+            summary["error"] = f"搜索时发生错误: {str(e)}"
+        finally:
+            matches.put(("done", summary))
+
+    def _resolve_buckets(self, client: QiniuClient, buckets: str, stats: RetryStats) -> list[str]:
+        """
+        要搜索的存储空间：参数中逗号分隔的名称，为空时为账户下的全部存储空间
+
+        Raises:
+            ToolProviderCredentialValidationError: 认证失败
+            RuntimeError: 获取存储空间列表失败
+        """
+        names = [name.strip() for name in buckets.split(",") if name.strip()]
+        if names:
+            return list(dict.fromkeys(names))
+
+        ret, info = client.list_buckets(stats)
+        if info.status_code == 401:
+            raise ToolProviderCredentialValidationError("七牛云认证失败，请检查 Access Key 和 Secret Key")
+        if info.status_code != 200:
+            raise RuntimeError(f"获取存储空间列表失败: HTTP {info.status_code} - {info.error}")
+        return ret or []
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        搜索文件
+
+        Args:
+            tool_parameters: 工具参数
+                - pattern: key 模式
+                - match_mode: 匹配方式，prefix、glob 或 substring，默认 glob
+                - buckets: 逗号分隔的存储空间名称（可选），为空时搜索全部存储空间
+                - max_results: 最多返回的匹配数，默认 20
+                - max_scanned: 每个存储空间最多列举的文件数，默认 100000
+
+        Returns:
+            Generator[ToolInvokeMessage, None, None]: 每个匹配一条 JSON 消息，最后是汇总消息
+        """
+        pattern = (tool_parameters.get("pattern") or "").strip()
+        match_mode = tool_parameters.get("match_mode") or MATCH_GLOB
+        buckets = tool_parameters.get("buckets") or ""
+
+        if not pattern:
+            yield self.create_text_message("搜索模式不能为空")
+            return
+
+        try:
+            prefix, match = build_matcher(pattern, match_mode)
+        except ValueError as e:
+            yield self.create_text_message(str(e))
+            return
+
+        stats = RetryStats()
+        bucket_names: list[str] = []
+        count = 0
+        try:
+            # 数值参数无效时按执行失败返回汇总结果
+            max_results = int(tool_parameters.get("max_results") or DEFAULT_MAX_RESULTS)
+            max_results = max(1, min(max_results, MAX_RESULTS_LIMIT))
+            max_scanned = int(tool_parameters.get("max_scanned") or DEFAULT_MAX_SCANNED)
+            max_scanned = max(1, min(max_scanned, MAX_SCANNED_LIMIT))
+
+            client = get_client(self.runtime.credentials)
+            bucket_names = self._resolve_buckets(client, buckets, stats)
+
+            matches: queue.Queue = queue.Queue()
+            stop = threading.Event()
+            summaries: dict[str, dict] = {}
+            # 每个存储空间单独记录请求尝试，结束后按存储空间顺序合并，避免多线程同时修改
+            bucket_stats = {bucket: RetryStats() for bucket in bucket_names}
+            executor = ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENT_BUCKETS, len(bucket_names))))
+            try:
+                for bucket in bucket_names:
+                    executor.submit(
+                        self._search_bucket, client, bucket, prefix, match, matches, stop, max_scanned,
+                        bucket_stats[bucket],
+                    )
+
+                # 按找到的顺序输出，达到数量后通知其他存储空间停止列举
+                while len(summaries) < len(bucket_names) and count < max_results:
+                    kind, payload = matches.get()
+                    if kind == "done":
+                        summaries[payload["bucket"]] = payload
+                        continue
+                    count += 1
+                    yield self.create_json_message(payload)
+            finally:
+                stop.set()
+                # 未开始的存储空间直接取消，不再发出请求
+                executor.shutdown(wait=True, cancel_futures=True)
+                for bucket in bucket_names:
+                    stats.merge(bucket_stats[bucket])
+
+            # 停止后各存储空间的汇总仍在队列中
+            while not matches.empty():
+                kind, payload = matches.get()
+                if kind == "done":
+                    summaries[payload["bucket"]] = payload
+            # 被取消的存储空间没有开始列举
+            bucket_results = [
+                summaries.get(bucket) or {
+                    "bucket": bucket, "scanned": 0, "matched": 0, "done": False, "scan_limited": False, "error": None
+                }
+                for bucket in bucket_names
+            ]
+            errors = [summary["error"] for summary in bucket_results if summary["error"]]
+            scan_limited = any(summary["scan_limited"] for summary in bucket_results)
+            # 达到扫描上限，或达到数量上限时还有未输出的匹配或未列举完的存储空间
+            truncated = scan_limited or (
+                count >= max_results
+                and (
+                    sum(summary["matched"] for summary in bucket_results) > count
+                    or not all(summary["done"] or summary["error"] for summary in bucket_results)
+                )
+            )
+            error = errors[0] if bucket_results and len(errors) == len(bucket_results) else None
+
+            if error:
+                markdown_content = f"搜索失败：{error}"
+            elif count >= max_results and truncated:
+                markdown_content = f"已找到 {count} 个匹配 '{pattern}' 的文件，达到数量上限，搜索已停止"
+            elif scan_limited:
+                markdown_content = (
+                    f"已找到 {count} 个匹配 '{pattern}' 的文件，部分存储空间达到扫描上限 {max_scanned}，结果可能不完整"
+                )
+            else:
+                markdown_content = f"搜索完成，在 {len(bucket_names)} 个存储空间中找到 {count} 个匹配 '{pattern}' 的文件"
+            yield self.create_text_message(markdown_content)
+
+            yield self.create_json_message({
+                "pattern": pattern,
+                "match_mode": match_mode,
+                "prefix": prefix or None,
+                "count": count,
+                "truncated": truncated,
+                "buckets": bucket_results,
+                "error": error,
+                "retry": stats.to_dict(),
+            })
+
+        except ToolProviderCredentialValidationError as e:
+            yield self.create_text_message(f"认证错误：{str(e)}")
+            yield self.create_json_message(self._error_result(pattern, match_mode, f"认证错误：{str(e)}", stats))
+
+        except Exception as e:
+            logger.exception("七牛云文件搜索工具执行失败")
+            yield self.create_text_message(f"系统错误：{str(e)}")
+            yield self.create_json_message(self._error_result(pattern, match_mode, f"执行失败：{str(e)}", stats))
+
+    def _error_result(self, pattern: str, match_mode: str, error: str, stats: RetryStats) -> dict:
+        """搜索失败时的汇总结果"""
+        return {
+            "pattern": pattern,
+            "match_mode": match_mode,
+            "prefix": None,
+            "count": 0,
+            "truncated": False,
+            "buckets": [],
+            "error": error,
+            "retry": stats.to_dict(),
+        }
@@ -0,0 +1,177 @@
+import logging
+from collections.abc import Generator
+from typing import Any, Optional
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+from dify_plugin.errors.tool import ToolProviderCredentialValidationError
+
+from utils.qiniu_client import STATUS_NO_SUCH_BUCKET, QiniuClient, get_client
+from utils.retry import RetryStats
+
+logger = logging.getLogger(__name__)
+
+# 列举的单页数量（接口上限）
+LIST_PAGE_SIZE = 1000
+# 按前缀列举时默认和最多签名的文件数
+DEFAULT_MAX_KEYS = 1000
+MAX_KEYS_LIMIT = 10000
+
+
+def parse_keys(keys: str) -> list[str]:
+    """
+    解析文件 key 列表：有换行时每行一个，否则按逗号分隔；去掉空白和重复的 key
+
+    Args:
+        keys: 文件 key 列表
+
+    Returns:
+        文件 key
+    """
+    separator = "\n" if "\n" in keys else ","
+    return list(dict.fromkeys(key.strip() for key in keys.split(separator) if key.strip()))
+
+
+class QiniuSignUrlsTool(Tool):
+    """
+    七牛云批量签名链接工具
+
+    为文件 key 列表或前缀下的文件批量生成私有下载链接。签名只在本地计算，
+    不下载也不检查文件；按前缀时只调用列举接口获取 key
+    """
+
+    def _list_keys(
+        self,
+        client: QiniuClient,
+        bucket: str,
+        prefix: Optional[str],
+        marker: Optional[str],
+        max_keys: int,
+        stats: RetryStats,
+    ) -> tuple[list[str], Optional[str]]:
+        """
+        分页列举前缀下的文件 key
+
+        Args:
+            client: 七牛云客户端
+            bucket: 存储空间名称
+            prefix: 文件前缀（可选）
+            marker: 上一次返回的 next_marker（可选）
+            max_keys: 最多返回的 key 数
+            stats: 请求尝试记录
+
+        Returns:
+            (文件 key 列表, 下一页的标记)，已列举完时标记为空
+
+        Raises:
+            ToolProviderCredentialValidationError: 认证失败
+            RuntimeError: 存储空间不存在或列举失败
+        """
+        keys: list[str] = []
+        while len(keys) < max_keys:
+            ret, eof, info = client.list_files(
+                bucket, prefix=prefix, marker=marker, limit=min(LIST_PAGE_SIZE, max_keys - len(keys)), stats=stats
+            )
+            if info.status_code == 401:
+                raise ToolProviderCredentialValidationError("七牛云认证失败，请检查 Access Key 和 Secret Key")
+            if info.status_code == STATUS_NO_SUCH_BUCKET:
+                raise RuntimeError(f"存储空间 '{bucket}' 不存在")
+            if info.status_code != 200 or not isinstance(ret, dict):
+                raise RuntimeError(f"获取文件列表失败: HTTP {info.status_code} - {info.error}")
+
+            keys.extend(item["key"] for item in ret.get("items", []) if isinstance(item, dict) and item.get("key"))
+            marker = ret.get("marker")
+            if eof or not marker:
+                return keys, None
+        return keys, marker
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        批量生成私有下载链接
+
+        Args:
+            tool_parameters: 工具参数
+                - domain: 七牛云绑定的域名
+                - keys: 文件 key 列表，每行一个或逗号分隔（与 bucket 二选一）
+                - bucket: 按前缀列举的存储空间名称
+                - prefix: 文件前缀（可选）
+                - marker: 上一次返回的 next_marker（可选）
+                - max_keys: 按前缀列举时最多签名的文件数，默认 1000
+                - expire_time: 链接有效期（秒），默认 3600 秒
+
+        Returns:
+            Generator[ToolInvokeMessage, None, None]: 工具执行结果消息
+        """
+        domain = (tool_parameters.get("domain") or "").strip()
+        keys_param = tool_parameters.get("keys") or ""
+        bucket = (tool_parameters.get("bucket") or "").strip()
+        prefix = tool_parameters.get("prefix") or None
+        marker = tool_parameters.get("marker") or None
+
+        # 参数验证
+        if not domain:
+            yield self.create_text_message("域名不能为空")
+            return
+
+        keys = parse_keys(keys_param)
+        if not keys and not bucket:
+            yield self.create_text_message("请提供文件 key 列表，或提供存储空间名称按前缀列举")
+            return
+
+        # 确保域名格式正确
+        if not domain.startswith(('http://', 'https://')):
+            domain = f"https://{domain}"
+
+        stats = RetryStats()
+        next_marker = None
+        try:
+            # 数值参数无效时按执行失败返回汇总结果
+            max_keys = int(tool_parameters.get("max_keys") or DEFAULT_MAX_KEYS)
+            max_keys = max(1, min(max_keys, MAX_KEYS_LIMIT))
+            expire_time = int(tool_parameters.get("expire_time") or 3600)
+            if expire_time <= 0:
+                yield self.create_text_message("链接有效期必须大于 0")
+                return
+
+            client = get_client(self.runtime.credentials)
+            if not keys:
+                keys, next_marker = self._list_keys(client, bucket, prefix, marker, max_keys, stats)
+
+            urls, deadline = client.private_download_urls(domain, keys, expire_time)
+
+            if next_marker:
+                markdown_content = f"已生成 {len(urls)} 个下载链接，还有更多文件，使用 next_marker 继续"
+            else:
+                markdown_content = f"已生成 {len(urls)} 个下载链接，有效期 {expire_time} 秒"
+            yield self.create_text_message(markdown_content)
+
+            yield self.create_json_message({
+                "urls": [{"key": key, "url": url} for key, url in zip(keys, urls)],
+                "count": len(urls),
+                "deadline": deadline,
+                "expire_time": expire_time,
+                "next_marker": next_marker,
+                "error": None,
+                "retry": stats.to_dict(),
+            })
+
+        except ToolProviderCredentialValidationError as e:
+            yield self.create_text_message(f"认证错误：{str(e)}")
+            yield self.create_json_message(self._error_result(f"认证错误：{str(e)}", stats))
+
+        except Exception as e:
+            logger.exception("七牛云批量签名链接工具执行失败")
+            yield self.create_text_message(f"系统错误：{str(e)}")
+            yield self.create_json_message(self._error_result(f"执行失败：{str(e)}", stats))
+
+    def _error_result(self, error: str, stats: RetryStats) -> dict:
+        """生成失败时的结果"""
+        return {
+            "urls": [],
+            "count": 0,
+            "deadline": None,
+            "expire_time": None,
+            "next_marker": None,
+            "error": error,
+            "retry": stats.to_dict(),
+        }
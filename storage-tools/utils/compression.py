@@ -0,0 +1,153 @@
+"""
+透明压缩
+
+上传时边读边压缩，压缩方式记录在对象的自定义元数据中（x-qn-meta-content-encoding），
+下载时按响应头中的元数据边读边解压：
+- gzip：标准库 zlib，无额外依赖
+- zstd：需要安装 zstandard，压缩和解压速度更快
+"""
+
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+except ImportError:
+    # zstandard 缺失时只支持 gzip
+    zstandard = None
+
+# 记录压缩方式的自定义元数据名称
+ENCODING_METADATA = "x-qn-meta-content-encoding"
+# 压缩方式
+ENCODING_GZIP = "gzip"
+ENCODING_ZSTD = "zstd"
+# 每次从源数据读取的大小
+READ_SIZE = 256 * 1024
+
+
+def supported_encodings() -> list[str]:
+    """当前环境可用的压缩方式"""
+    return [ENCODING_GZIP, ENCODING_ZSTD] if zstandard is not None else [ENCODING_GZIP]
+
+
+def check_encoding(encoding: str) -> None:
+    """
+    检查压缩方式是否可用
+
+    Raises:
+        ValueError: 不支持的压缩方式，或缺少 zstandard
+    """
+    if encoding == ENCODING_ZSTD and zstandard is None:
+        raise ValueError("zstd 压缩需要安装 zstandard")
+    if encoding not in (ENCODING_GZIP, ENCODING_ZSTD):
+        raise ValueError(f"不支持的压缩方式: {encoding}")
+
+
+class _GzipReader:
+    """从源数据流读取并输出 gzip 压缩数据的只读流"""
+
+    def __init__(self, source: BinaryIO, level: int = 6):
+        self._source = source
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._source.read(READ_SIZE)
+            if chunk:
+                self._buffer += self._compressor.compress(chunk)
+            else:
+                self._buffer += self._compressor.flush()
+                self._eof = True
+
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+
+class _ChunkReader:
+    """把数据块迭代器包装为只读流"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._buffer:
+            self._buffer = next(self._chunks, None)
+            if self._buffer is None:
+                self._buffer = b""
+                return b""
+        if size < 0 or size >= len(self._buffer):
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def compress_stream(source: BinaryIO, encoding: str) -> BinaryIO:
+    """
+    包装源数据流，读取时输出压缩后的数据
+
+    Args:
+        source: 源数据流
+        encoding: 压缩方式，gzip 或 zstd
+
+    Returns:
+        只读的压缩数据流
+
+    Raises:
+        ValueError: 不支持的压缩方式
+    """
+    check_encoding(encoding)
+    if encoding == ENCODING_ZSTD:
+        return zstandard.ZstdCompressor(level=3).stream_reader(source, read_size=READ_SIZE)
+    return _GzipReader(source)
+
+
+def decompress_chunks(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """
+    按块解压数据，不压缩时原样返回
+
+    Args:
+        chunks: 压缩数据块
+        encoding: 压缩方式，为空表示未压缩
+
+    Yields:
+        解压后的数据块
+
+    Raises:
+        ValueError: 不支持的压缩方式，或压缩数据不完整
+    """
+    if not encoding:
+        yield from chunks
+        return
+
+    check_encoding(encoding)
+    if encoding == ENCODING_ZSTD:
+        reader = zstandard.ZstdDecompressor().stream_reader(_ChunkReader(chunks), read_size=READ_SIZE)
+        while True:
+            data = reader.read(READ_SIZE)
+            if not data:
+                return
+            yield data
+
+    # 限制每次输出的大小，高压缩比的数据不会一次解压出大量内容
+    decompressor = zlib.decompressobj(31)
+    for chunk in chunks:
+        while chunk:
+            data = decompressor.decompress(chunk, READ_SIZE)
+            if data:
+                yield data
+            chunk = decompressor.unconsumed_tail
+    data = decompressor.flush()
+    if data:
+        yield data
+    if not decompressor.eof:
+        raise ValueError("压缩数据不完整")
@@ -0,0 +1,187 @@
+"""
+文件内容类型判断和文本解码
+
+- 按 Content-Type 判断文本 / 二进制，类型缺失或为 application/octet-stream 时按文件头（魔数）和内容采样判断
+- 文本只解码一次：优先使用声明的字符集，其次 BOM 和 UTF-8，最后才对采样内容做字符集检测
+"""
+
+import codecs
+from typing import Optional
+
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    # charset_normalizer 缺失时无法检测的文本按 latin-1 解码
+    from_bytes = None
+
+# 文本类型（text/* 之外）
+TEXT_MIME_TYPES = {
+    "application/json",
+    "application/ld+json",
+    "application/xml",
+    "application/javascript",
+    "application/ecmascript",
+    "application/x-javascript",
+    "application/x-yaml",
+    "application/yaml",
+    "application/toml",
+    "application/sql",
+    "application/graphql",
+    "application/x-sh",
+    "application/x-ndjson",
+    "application/x-www-form-urlencoded",
+}
+# 文本类型的后缀，例如 application/vnd.api+json、image/svg+xml
+TEXT_MIME_SUFFIXES = ("+json", "+xml", "+yaml")
+# 需要按内容判断的类型
+UNKNOWN_MIME_TYPES = {"", "application/octet-stream", "binary/octet-stream", "application/unknown"}
+# 常见二进制格式的文件头
+BINARY_SIGNATURES = (
+    b"\x89PNG",
+    b"\xff\xd8\xff",  # JPEG
+    b"GIF8",
+    b"%PDF",
+    b"PK\x03\x04",  # ZIP / docx / xlsx
+    b"\x1f\x8b",  # gzip
+    b"(\xb5/\xfd",  # zstd
+    b"PAR1",  # parquet
+    b"RIFF",  # wav / webp / avi
+    b"ID3",  # mp3
+    b"OggS",
+    b"fLaC",
+    b"\x00asm",  # wasm
+    b"\x7fELF",
+    b"7z\xbc\xaf",
+    b"BZh",
+    b"\xfd7zXZ",
+    b"SQLite format 3",
+    b"\xd0\xcf\x11\xe0",  # doc / xls
+    b"ORC",
+    b"Obj\x01",  # avro
+)
+# 内容采样大小
+SAMPLE_SIZE = 8 * 1024
+# 字符集检测的采样大小
+DETECT_SIZE = 64 * 1024
+
+
+def parse_content_type(content_type: Optional[str]) -> tuple[str, Optional[str]]:
+    """
+    解析 Content-Type
+
+    Args:
+        content_type: Content-Type 头，例如 "text/plain; charset=GBK"
+
+    Returns:
+        (小写的类型, 字符集)，没有声明字符集时为 None
+    """
+    mime_type, *params = (content_type or "").split(";")
+    charset = None
+    for param in params:
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "charset":
+            charset = value.strip().strip("\"'") or None
+    return mime_type.strip().lower(), charset
+
+
+def is_text_content(content_type: Optional[str], data: bytes) -> bool:
+    """
+    判断内容是否为文本
+
+    Args:
+        content_type: Content-Type 头
+        data: 内容（只读取开头的采样）
+
+    Returns:
+        是否为文本
+    """
+    mime_type, charset = parse_content_type(content_type)
+    if mime_type.startswith("text/") or mime_type in TEXT_MIME_TYPES or mime_type.endswith(TEXT_MIME_SUFFIXES):
+        return True
+    if mime_type not in UNKNOWN_MIME_TYPES:
+        # 声明了字符集的其他类型也按文本处理
+        return charset is not None
+
+    sample = data[:SAMPLE_SIZE]
+    if sample.startswith(BINARY_SIGNATURES):
+        return False
+    if sample.startswith((codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return True
+    return b"\x00" not in sample
+
+
+def _declared_charset(data: bytes, content_type: Optional[str]) -> Optional[str]:
+    """声明的字符集（需要是 Python 支持的编码）或 BOM 对应的字符集"""
+    _, charset = parse_content_type(content_type)
+    if charset:
+        try:
+            codecs.lookup(charset)
+            return charset.lower()
+        except LookupError:
+            # 未知字符集，继续自动判断
+            pass
+
+    for bom, encoding in (
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF16_BE, "utf-16"),
+    ):
+        if data.startswith(bom):
+            return encoding
+    return None
+
+
+def _detect_charset(sample: bytes) -> str:
+    """对采样内容做字符集检测"""
+    if from_bytes is not None:
+        match = from_bytes(sample[:DETECT_SIZE]).best()
+        if match is not None:
+            return match.encoding
+    return "latin-1"
+
+
+def detect_charset(sample: bytes, content_type: Optional[str] = None) -> str:
+    """
+    按内容开头的采样判断字符集，用于流式解码
+
+    Args:
+        sample: 内容开头的采样，结尾可能截断在多字节字符中间
+        content_type: Content-Type 头
+
+    Returns:
+        字符集
+    """
+    charset = _declared_charset(sample, content_type)
+    if charset:
+        return charset
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return _detect_charset(sample)
+
+
+def decode_text(data: bytes, content_type: Optional[str] = None) -> tuple[str, str]:
+    """
+    解码文本内容
+
+    依次使用：声明的字符集、BOM、UTF-8，都不适用时对采样内容做字符集检测
+
+    Args:
+        data: 内容
+        content_type: Content-Type 头
+
+    Returns:
+        (文本, 使用的字符集)
+    """
+    charset = _declared_charset(data, content_type)
+    if charset:
+        return data.decode(charset, errors="replace"), charset
+
+    try:
+        return data.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    charset = _detect_charset(data)
+    return data.decode(charset, errors="replace"), charset
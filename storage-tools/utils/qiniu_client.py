@@ -0,0 +1,681 @@
+"""
+七牛云存储客户端
+
+各工具共享的客户端层，封装 qiniu SDK 的对象：
+- 按认证信息缓存 Auth 和 BucketManager，插件进程内复用
+- 空间所在区域由 SDK 的区域缓存查询，客户端按空间复用区域提供者
+- 列举、查询、同步抓取、空间列表和表单上传调用 SDK；SDK 没有提供的异步抓取和未知大小的流式分片上传（v2）
+  使用区域的服务域名直接请求，内存占用不超过一个分片
+- SDK 和客户端直接发起的请求共用 SDK 的 HTTP 会话，连接池大小通过 SDK 全局配置设置
+- SDK 在一次调用中依次尝试区域的服务域名，客户端在外层按 utils.retry 的策略退避重试并记录每次尝试
+- 短时间缓存已验证可访问的存储空间，连续调用不再重复验证
+- 批量生成私有下载链接时共用过期时间和预先设置密钥的 HMAC，只在本地计算
+"""
+
+import hashlib
+import hmac
+import itertools
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional
+from urllib.parse import quote, urlsplit
+
+import requests
+from dify_plugin.errors.tool import ToolProviderCredentialValidationError
+from qiniu import Auth, BucketManager, QiniuMacAuth, config, http
+from qiniu.auth import QiniuMacRequestsAuth
+from qiniu.http import ResponseInfo
+from qiniu.http.endpoint import Endpoint
+from qiniu.http.region import Region, ServiceName
+from qiniu.http.regions_provider import get_default_regions_provider
+from qiniu.services.storage.uploaders import FormUploader
+from qiniu.utils import etag_stream, urlsafe_base64_encode
+from requests.adapters import HTTPAdapter
+
+from utils.retry import DEFAULT_RETRY_POLICY, RetryStats, retry_attempts
+
+logger = logging.getLogger(__name__)
+
+# 连接池大小（每个域名）
+POOL_MAXSIZE = 32
+# 缓存的认证信息数量上限
+MAX_CLIENTS = 32
+# 存储空间验证结果的缓存时间（秒）
+BUCKET_CHECK_TTL = 60
+# 客户端直接发起的请求的默认超时（秒）：连接超时, 读取超时
+DEFAULT_TIMEOUT = (5, 30)
+# 七牛云状态码：文件已存在、文件不存在、存储空间不存在
+STATUS_FILE_EXISTS = 614
+STATUS_NO_SUCH_ENTRY = 612
+STATUS_NO_SUCH_BUCKET = 631
+# 分片上传的分片大小，不超过一个分片的内容使用表单上传
+UPLOAD_PART_SIZE = 4 * 1024 * 1024
+
+_session_ready = False
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    获取插件进程内共享的 HTTP 会话，即 qiniu SDK 使用的会话
+
+    第一次调用时通过 SDK 全局配置设置连接池大小，并为 http 和 https 挂载同样大小的连接池
+
+    Returns:
+        带连接池的 requests.Session
+    """
+    global _session_ready
+    session = http.qn_http_client.session
+    with _session_lock:
+        if not _session_ready:
+            # SDK 第一次发请求时按 connection_pool 重新挂载 http 连接池，两者大小一致
+            config.set_default(connection_pool=POOL_MAXSIZE)
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session_ready = True
+    return session
+
+
+def read_part(stream: BinaryIO, size: int = UPLOAD_PART_SIZE) -> bytes:
+    """
+    从流中读取最多 size 字节，流返回的数据不足时继续读取，直到读满或流结束
+
+    Args:
+        stream: 可读的二进制流
+        size: 读取的字节数
+
+    Returns:
+        读取的内容，流结束时为空
+    """
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+def iter_parts(stream: BinaryIO, size: int = UPLOAD_PART_SIZE) -> Iterator[bytes]:
+    """按分片大小依次读取流"""
+    while True:
+        part = read_part(stream, size)
+        if not part:
+            return
+        yield part
+        # 读取下一个分片前释放当前分片
+        del part
+
+
+class QiniuClient:
+    """
+    单个认证信息对应的七牛云客户端
+    """
+
+    def __init__(self, access_key: str, secret_key: str):
+        self.access_key = access_key
+        self.auth = Auth(access_key, secret_key)
+        self.mac_auth = QiniuMacRequestsAuth(QiniuMacAuth(access_key, secret_key))
+        # 下载签名的 HMAC，每个链接复制一份后计算
+        self._download_signer = hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha1)
+        self.session = get_session()
+        self.retry_policy = DEFAULT_RETRY_POLICY
+        # 服务域名使用与区域查询服务相同的协议
+        self.scheme = urlsplit(self._query_hosts()[0]).scheme or "https"
+        self.bucket_manager = BucketManager(self.auth, preferred_scheme=self.scheme)
+        self._regions: dict[str, Iterable[Region]] = {}
+        self._checked_buckets: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _query_hosts() -> list[str]:
+        """区域查询服务地址和备用地址，遵循 qiniu SDK 的全局配置"""
+        hosts = [config.get_default("default_query_region_host")]
+        hosts += config.get_default("default_query_region_backup_hosts") or []
+        return [host if "://" in host else f"https://{host}" for host in hosts]
+
+    def get_region(self, bucket: str) -> Region:
+        """
+        获取存储空间所在区域，由 SDK 的区域缓存查询，结果按 ttl 缓存
+
+        Args:
+            bucket: 存储空间名称
+
+        Returns:
+            区域信息
+
+        Raises:
+            RuntimeError: 所有区域查询服务都不可用
+        """
+        with self._lock:
+            provider = self._regions.get(bucket)
+            if provider is None:
+                provider = get_default_regions_provider(
+                    query_endpoints_provider=[Endpoint.from_host(host) for host in self._query_hosts()],
+                    access_key=self.access_key,
+                    bucket_name=bucket,
+                    preferred_scheme=self.scheme,
+                )
+                self._regions[bucket] = provider
+        for region in provider:
+            return region
+        raise RuntimeError(f"查询存储空间 '{bucket}' 所在区域失败")
+
+    def _hosts(self, bucket: str, service: ServiceName) -> list[str]:
+        """存储空间所在区域中服务的域名（含协议）"""
+        return [endpoint.get_value(self.scheme) for endpoint in self.get_region(bucket).services[service]]
+
+    def _call(self, operation: str, call: Callable[[], tuple], stats: Optional[RetryStats] = None) -> tuple:
+        """
+        按重试策略调用 SDK 方法
+
+        SDK 在一次调用中已经依次尝试区域的各个服务域名，这里在外层退避重试并记录每次尝试
+
+        Args:
+            operation: 操作名称，记录在尝试记录中
+            call: 调用 SDK 方法的函数，返回值的最后一项为 ResponseInfo
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            最后一次调用的返回值
+        """
+        result: tuple = ()
+        for attempt in retry_attempts(operation, stats, self.retry_policy):
+            result = call()
+            info = result[-1]
+            attempt.finish(urlsplit(info.url or "").netloc, info.status_code, info.exception)
+        return result
+
+    def check_bucket(self, bucket: str, stats: Optional[RetryStats] = None) -> None:
+        """
+        验证存储空间可以访问，验证成功的结果短时间缓存
+
+        Args:
+            bucket: 存储空间名称
+            stats: 请求尝试记录（可选）
+
+        Raises:
+            ToolProviderCredentialValidationError: 认证失败或存储空间不可访问
+        """
+        with self._lock:
+            checked_at = self._checked_buckets.get(bucket)
+        if checked_at is not None and time.monotonic() - checked_at < BUCKET_CHECK_TTL:
+            return
+
+        try:
+            ret, eof, info = self.list_files(bucket, limit=1, stats=stats)
+        except Exception as e:
+            raise ToolProviderCredentialValidationError(f"验证存储空间时发生错误: {str(e)}")
+
+        if info.status_code == 200:
+            with self._lock:
+                self._checked_buckets[bucket] = time.monotonic()
+            return
+        if info.status_code == 401:
+            raise ToolProviderCredentialValidationError("七牛云认证失败，请检查 Access Key 和 Secret Key")
+        if info.status_code == STATUS_NO_SUCH_BUCKET:
+            raise ToolProviderCredentialValidationError(f"存储空间 '{bucket}' 不存在")
+        raise ToolProviderCredentialValidationError(f"验证存储空间失败: {info.error}")
+
+    def list_buckets(self, stats: Optional[RetryStats] = None) -> tuple[Optional[list], ResponseInfo]:
+        """
+        列出账户下的存储空间
+
+        Args:
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (存储空间名称列表, 响应信息)
+        """
+        return self._call("list_buckets", self.bucket_manager.buckets, stats)
+
+    def list_files(
+        self,
+        bucket: str,
+        prefix: Optional[str] = None,
+        marker: Optional[str] = None,
+        limit: Optional[int] = None,
+        delimiter: Optional[str] = None,
+        stats: Optional[RetryStats] = None,
+    ) -> tuple[Optional[dict], bool, ResponseInfo]:
+        """
+        按前缀分页列举文件，同一个 marker 的请求可以安全重试
+
+        Args:
+            bucket: 存储空间名称
+            prefix: 文件前缀（可选）
+            marker: 上一页返回的标记（可选）
+            limit: 单页数量（可选）
+            delimiter: 目录分隔符（可选）
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (响应内容, 是否已列举完, 响应信息)，与 BucketManager.list 的返回值一致
+        """
+        return self._call(
+            "list", lambda: self.bucket_manager.list(bucket, prefix, marker, limit, delimiter), stats
+        )
+
+    def stat(self, bucket: str, key: str, stats: Optional[RetryStats] = None) -> tuple[Optional[dict], ResponseInfo]:
+        """
+        查询文件信息
+
+        Args:
+            bucket: 存储空间名称
+            key: 文件 key
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (文件信息, 响应信息)，文件不存在时状态码为 612
+        """
+        return self._call("stat", lambda: self.bucket_manager.stat(bucket, key), stats)
+
+    def upload_data(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        token: str,
+        mime_type: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        stats: Optional[RetryStats] = None,
+    ) -> tuple[Optional[dict], ResponseInfo]:
+        """
+        表单上传数据到存储空间，使用缓存的区域，失败时由 SDK 切换上传域名
+
+        上传凭证设置了 insertOnly 时，重试前的请求可能已经上传成功，重试返回“文件已存在”。
+        此时比较已有文件的 hash，内容相同按上传成功处理
+
+        Args:
+            bucket: 存储空间名称
+            key: 文件 key
+            data: 文件内容
+            token: 上传凭证
+            mime_type: 文件类型（可选）
+            metadata: 自定义元数据，名称以 x-qn-meta- 开头（可选）
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (响应内容, 响应信息)，与 qiniu.put_data 的返回值一致
+        """
+        stats = stats if stats is not None else RetryStats()
+        retries = stats.retries
+        try:
+            region = self.get_region(bucket)
+        except RuntimeError as ex:
+            return None, ResponseInfo(None, ex)
+
+        uploader = FormUploader(bucket, regions=[region], preferred_scheme=self.scheme)
+        ret, info = self._call(
+            "upload",
+            lambda: uploader.upload(
+                key,
+                data=data,
+                mime_type=mime_type or "application/octet-stream",
+                metadata=metadata,
+                file_name=key.split("/")[-1] or key,
+                up_token=token,
+            ),
+            stats,
+        )
+        if info.status_code == STATUS_FILE_EXISTS and stats.retries > retries:
+            file_hash = etag_stream(io.BytesIO(data))
+            stat, stat_info = self.stat(bucket, key, stats)
+            if stat is not None and stat.get("hash") == file_hash:
+                return {"key": key, "hash": file_hash}, stat_info
+        return ret, info
+
+    def upload_stream(
+        self,
+        bucket: str,
+        key: str,
+        stream: BinaryIO,
+        token: str,
+        mime_type: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        stats: Optional[RetryStats] = None,
+    ) -> tuple[Optional[dict], ResponseInfo]:
+        """
+        上传流中的内容，边读边传，不需要预先知道内容大小
+
+        内容小于一个分片时表单上传（一次请求），否则分片上传，每次只在内存中保留当前分片
+
+        Args:
+            bucket: 存储空间名称
+            key: 文件 key
+            stream: 可读的二进制流
+            token: 上传凭证
+            mime_type: 文件类型（可选）
+            metadata: 自定义元数据，名称以 x-qn-meta- 开头（可选）
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (响应内容, 响应信息)
+        """
+        first = read_part(stream)
+        if len(first) < UPLOAD_PART_SIZE:
+            return self.upload_data(bucket, key, first, token, mime_type, metadata, stats)
+        parts = itertools.chain((first,), iter_parts(stream))
+        return self._upload_parts(bucket, key, parts, token, mime_type, metadata, stats)
+
+    def _upload_parts(
+        self,
+        bucket: str,
+        key: str,
+        parts: Iterable[bytes],
+        token: str,
+        mime_type: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        stats: Optional[RetryStats] = None,
+    ) -> tuple[Optional[dict], ResponseInfo]:
+        """
+        分片上传（v2）：初始化任务、依次上传分片、合并分片，失败时取消任务
+
+        每个请求单独重试，单个分片失败只重传该分片
+
+        Args:
+            bucket: 存储空间名称
+            key: 文件 key
+            parts: 分片内容
+            token: 上传凭证
+            mime_type: 文件类型（可选）
+            metadata: 自定义元数据，名称以 x-qn-meta- 开头（可选）
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (响应内容, 响应信息)
+        """
+        path = f"/buckets/{bucket}/objects/{urlsafe_base64_encode(key)}/uploads"
+        headers = {"Authorization": f"UpToken {token}"}
+
+        ret, info = self._request(bucket, ServiceName.UP, "POST", path, stats, headers=headers)
+        if ret is None or not ret.get("uploadId"):
+            return None, info
+        upload_path = f"{path}/{ret['uploadId']}"
+
+        uploaded = []
+        for part_number, part in enumerate(parts, start=1):
+            ret, info = self._request(
+                bucket,
+                ServiceName.UP,
+                "PUT",
+                f"{upload_path}/{part_number}",
+                stats,
+                data=part,
+                headers={**headers, "Content-Type": "application/octet-stream"},
+            )
+            if ret is None:
+                self._request(bucket, ServiceName.UP, "DELETE", upload_path, stats, headers=headers)
+                return None, info
+            uploaded.append({"etag": ret.get("etag", ""), "partNumber": part_number})
+            # 读取下一个分片前释放当前分片
+            part = None
+
+        body = {"parts": uploaded, "fname": key.split("/")[-1] or key}
+        if mime_type:
+            body["mimeType"] = mime_type
+        if metadata:
+            body["metadata"] = metadata
+        ret, info = self._request(bucket, ServiceName.UP, "POST", upload_path, stats, json=body, headers=headers)
+        if ret is None:
+            self._request(bucket, ServiceName.UP, "DELETE", upload_path, stats, headers=headers)
+        return ret, info
+
+    def _request(
+        self,
+        bucket: str,
+        service: ServiceName,
+        method: str,
+        path: str,
+        stats: Optional[RetryStats] = None,
+        idempotent: bool = True,
+        **kwargs: Any,
+    ) -> tuple[Optional[Any], ResponseInfo]:
+        """
+        向存储空间所在区域的服务直接发起请求，用于 SDK 没有提供的接口
+
+        Args:
+            bucket: 存储空间名称
+            service: 服务类型
+            method: HTTP 方法
+            path: 请求路径
+            stats: 请求尝试记录（可选）
+            idempotent: 请求是否幂等，非幂等请求只在请求未发出时重试
+            **kwargs: 传给 requests 的其他参数
+
+        Returns:
+            (响应内容, 响应信息)
+        """
+        try:
+            hosts = self._hosts(bucket, service)
+        except RuntimeError as ex:
+            return None, ResponseInfo(None, ex)
+
+        # 操作名称，例如 "POST api/sisyphus"
+        operation = f"{method} {service.value}/{path.strip('/').split('/', 1)[0]}"
+        return self._request_hosts(hosts, operation, method, path, stats, idempotent, **kwargs)
+
+    def _request_hosts(
+        self,
+        hosts: list[str],
+        operation: str,
+        method: str,
+        path: str,
+        stats: Optional[RetryStats] = None,
+        idempotent: bool = True,
+        **kwargs: Any,
+    ) -> tuple[Optional[Any], ResponseInfo]:
+        """
+        按重试策略发起请求，每次重试切换到下一个域名
+
+        Args:
+            hosts: 服务域名
+            operation: 操作名称，记录在尝试记录中
+            method: HTTP 方法
+            path: 请求路径
+            stats: 请求尝试记录（可选）
+            idempotent: 请求是否幂等
+            **kwargs: 传给 requests 的其他参数
+
+        Returns:
+            (响应内容, 响应信息)
+        """
+        if not hosts:
+            return None, ResponseInfo(None, Exception(f"没有可用的服务域名: {operation}"))
+
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        info = None
+        for attempt in retry_attempts(operation, stats, self.retry_policy):
+            host = hosts[attempt.number % len(hosts)]
+            try:
+                response = self.session.request(method, f"{host.rstrip('/')}{path}", **kwargs)
+            except requests.RequestException as ex:
+                info = ResponseInfo(None, ex)
+            else:
+                info = ResponseInfo(response)
+            attempt.finish(host, info.status_code, info.exception, idempotent)
+
+        if info.ok():
+            return info.json(), info
+        return None, info
+
+    def fetch(
+        self, bucket: str, url: str, key: str, stats: Optional[RetryStats] = None
+    ) -> tuple[Optional[dict], ResponseInfo]:
+        """
+        同步抓取远程文件到存储空间，重复抓取同一地址的结果相同，可以安全重试
+
+        Args:
+            bucket: 存储空间名称
+            url: 远程文件地址
+            key: 保存的文件 key
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (文件信息, 响应信息)，与 BucketManager.fetch 的返回值一致
+        """
+        return self._call("fetch", lambda: self.bucket_manager.fetch(url, bucket, key), stats)
+
+    def async_fetch(
+        self,
+        bucket: str,
+        url: str,
+        key: str,
+        ignore_same_key: bool = False,
+        stats: Optional[RetryStats] = None,
+    ) -> tuple[Optional[dict], ResponseInfo]:
+        """
+        创建异步抓取任务，由七牛云服务端下载远程文件并保存到存储空间（SDK 未提供该接口）
+
+        重复提交会创建多个任务，只在请求未发出时重试
+
+        Args:
+            bucket: 存储空间名称
+            url: 远程文件地址
+            key: 保存的文件 key
+            ignore_same_key: 文件已存在时是否跳过
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (响应内容，包含任务 id 和排队数 wait, 响应信息)
+        """
+        body = {"url": url, "bucket": bucket, "key": key, "ignore_same_key": ignore_same_key}
+        return self._request(
+            bucket, ServiceName.API, "POST", "/sisyphus/fetch", stats, idempotent=False, json=body, auth=self.mac_auth
+        )
+
+    def get_fetch_status(
+        self, bucket: str, job_id: str, stats: Optional[RetryStats] = None
+    ) -> tuple[Optional[dict], ResponseInfo]:
+        """
+        查询异步抓取任务状态
+
+        Args:
+            bucket: 存储空间名称
+            job_id: 任务 id
+            stats: 请求尝试记录（可选）
+
+        Returns:
+            (响应内容，wait 为 -1 表示任务已被处理, 响应信息)
+        """
+        return self._request(
+            bucket, ServiceName.API, "GET", "/sisyphus/fetch", stats, params={"id": job_id}, auth=self.mac_auth
+        )
+
+    def private_download_url(self, base_url: str, expires: int = 3600) -> str:
+        """生成私有下载链接"""
+        return self.auth.private_download_url(base_url, expires=expires)
+
+    def private_download_urls(self, domain: str, keys: Iterable[str], expires: int = 3600) -> tuple[list[str], int]:
+        """
+        批量生成私有下载链接，签名方式与 Auth.private_download_url 相同
+
+        Auth.private_download_url 直接对传入的链接签名，不做 URL 编码；这里先对 key 做 URL 编码再签名，
+        结果等于把编码后的链接传给 Auth.private_download_url，key 不含需要编码的字符时两者完全一致。
+        所有链接使用同一个过期时间，不请求服务端，也不检查文件是否存在
+
+        Args:
+            domain: 包含协议的下载域名
+            keys: 文件 key，链接中按 URL 编码（保留 /）
+            expires: 有效期（秒）
+
+        Returns:
+            (下载链接列表, 过期时间的 Unix 时间戳)
+        """
+        deadline = int(time.time()) + expires
+        domain = domain.rstrip("/")
+        urls = []
+        for key in keys:
+            url = f"{domain}/{quote(key, safe='/~')}?e={deadline}"
+            signer = self._download_signer.copy()
+            signer.update(url.encode("utf-8"))
+            urls.append(f"{url}&token={self.access_key}:{urlsafe_base64_encode(signer.digest())}")
+        return urls, deadline
+
+    def get(self, url: str, stats: Optional[RetryStats] = None, **kwargs: Any) -> requests.Response:
+        """使用共享连接池发起 GET 请求，参见 request"""
+        return self.request("GET", url, stats, **kwargs)
+
+    def head(self, url: str, stats: Optional[RetryStats] = None, **kwargs: Any) -> requests.Response:
+        """使用共享连接池发起 HEAD 请求，参见 request"""
+        return self.request("HEAD", url, stats, **kwargs)
+
+    def request(self, method: str, url: str, stats: Optional[RetryStats] = None, **kwargs: Any) -> requests.Response:
+        """
+        使用共享连接池发起请求，连接失败或临时错误时退避重试
+
+        只重试到收到响应头为止，stream=True 时读取响应内容的过程不重试
+
+        Args:
+            method: HTTP 方法，GET 或 HEAD 等幂等方法
+            url: 请求地址
+            stats: 请求尝试记录（可选）
+            **kwargs: 传给 requests 的其他参数
+
+        Returns:
+            最后一次请求的响应
+
+        Raises:
+            requests.RequestException: 所有尝试都发生请求异常
+        """
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        host = urlsplit(url).netloc
+        response: Optional[requests.Response] = None
+        error: Optional[requests.RequestException] = None
+        for attempt in retry_attempts(method.lower(), stats, self.retry_policy):
+            if response is not None:
+                # 释放需要重试的响应的连接
+                response.close()
+            try:
+                response, error = self.session.request(method, url, **kwargs), None
+            except requests.RequestException as ex:
+                response, error = None, ex
+                attempt.finish(host, -1, ex)
+            else:
+                attempt.finish(host, response.status_code)
+
+        if error is not None:
+            raise error
+        return response
+
+
+_clients: "OrderedDict[tuple[str, str], QiniuClient]" = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def get_client(credentials: dict) -> QiniuClient:
+    """
+    获取认证信息对应的客户端，按 (Access Key, Secret Key 摘要) 缓存
+
+    Args:
+        credentials: 认证信息，包含 qiniu_access_key 和 qiniu_secret_key
+
+    Returns:
+        七牛云客户端
+
+    Raises:
+        ToolProviderCredentialValidationError: 认证信息为空
+    """
+    access_key = credentials.get("qiniu_access_key")
+    secret_key = credentials.get("qiniu_secret_key")
+    if not access_key or not secret_key:
+        raise ToolProviderCredentialValidationError("七牛云 Access Key 和 Secret Key 不能为空")
+
+    cache_key = (access_key, hashlib.sha256(secret_key.encode()).hexdigest())
+    with _clients_lock:
+        client = _clients.get(cache_key)
+        if client is not None:
+            _clients.move_to_end(cache_key)
+            return client
+
+        client = QiniuClient(access_key, secret_key)
+        _clients[cache_key] = client
+        while len(_clients) > MAX_CLIENTS:
+            _clients.popitem(last=False)
+        return client
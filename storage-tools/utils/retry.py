@@ -0,0 +1,191 @@
+"""
+请求重试策略
+
+各工具共享的重试策略：
+- 指数退避加随机抖动（full jitter），避免大量请求在同一时刻重试
+- 只重试临时错误：连接失败、超时、429 和 5xx（不含七牛云明确表示不应重试的状态码，与 qiniu SDK 一致）
+- 区分幂等请求：非幂等请求（例如创建异步抓取任务）只在请求未发出（建立连接失败）时重试
+- 记录每次尝试的操作、域名、状态码和耗时，工具在 JSON 结果中返回
+"""
+
+import random
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError
+
+# 不重试的状态码，与 qiniu SDK 的 ResponseInfo.need_retry 一致
+NO_RETRY_STATUS = {501, 509, 573, 579, 608, 612, 614, 616, 618, 630, 631, 632, 640, 701}
+# 结果中保留的尝试记录数
+MAX_RECORDED_ATTEMPTS = 100
+
+
+@dataclass
+class RetryPolicy:
+    """重试策略"""
+
+    # 最多尝试次数（含第一次）
+    max_attempts: int = 3
+    # 第一次重试前的最长等待时间（秒），之后每次翻倍
+    base_delay: float = 0.2
+    # 单次等待时间上限（秒）
+    max_delay: float = 5.0
+
+    def backoff(self, retry: int) -> float:
+        """
+        第 retry 次重试前的等待时间，在 [0, base_delay * 2^(retry-1)] 中随机选择
+
+        Args:
+            retry: 重试序号，从 1 开始
+
+        Returns:
+            等待时间（秒）
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def _not_sent(exception: BaseException) -> bool:
+    """请求是否未发出：建立连接失败或连接超时"""
+    if isinstance(exception, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exception, requests.exceptions.ConnectionError) and exception.args:
+        # requests 把 urllib3 的 MaxRetryError 放在 args[0]，reason 为 NewConnectionError 等连接错误
+        return isinstance(getattr(exception.args[0], "reason", None), ConnectTimeoutError)
+    return False
+
+
+def is_retryable(status_code: int, exception: Optional[BaseException] = None, idempotent: bool = True) -> bool:
+    """
+    判断请求结果是否可以重试
+
+    Args:
+        status_code: 响应状态码，请求异常时为 -1
+        exception: 请求异常
+        idempotent: 请求是否幂等
+
+    Returns:
+        是否可以重试
+    """
+    if exception is not None:
+        if _not_sent(exception):
+            return True
+        return idempotent and isinstance(exception, requests.RequestException)
+    if not idempotent:
+        return False
+    return status_code == 429 or (status_code >= 500 and status_code not in NO_RETRY_STATUS)
+
+
+class Attempt:
+    """一次请求尝试"""
+
+    def __init__(self, operation: str, number: int):
+        self.operation = operation
+        self.number = number
+        self.host = ""
+        self.status_code = -1
+        self.error: Optional[str] = None
+        self.retry = False
+        self.elapsed_ms = 0.0
+        self._started = time.monotonic()
+
+    def finish(
+        self,
+        host: str,
+        status_code: int,
+        exception: Optional[BaseException] = None,
+        idempotent: bool = True,
+    ) -> bool:
+        """
+        记录尝试结果
+
+        Args:
+            host: 请求的域名
+            status_code: 响应状态码，请求异常时为 -1
+            exception: 请求异常
+            idempotent: 请求是否幂等
+
+        Returns:
+            是否需要重试
+        """
+        self.elapsed_ms = round((time.monotonic() - self._started) * 1000, 1)
+        self.host = host
+        self.status_code = status_code
+        self.error = str(exception) if exception is not None else None
+        self.retry = is_retryable(status_code, exception, idempotent)
+        return self.retry
+
+    def to_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "host": self.host,
+            "status_code": self.status_code,
+            "elapsed_ms": self.elapsed_ms,
+            "error": self.error,
+        }
+
+
+class RetryStats:
+    """一次工具调用中所有请求的尝试记录"""
+
+    def __init__(self):
+        self.attempts: list[Attempt] = []
+        self.retries = 0
+
+    def merge(self, other: "RetryStats") -> None:
+        """
+        合并另一份尝试记录，用于汇总各线程各自记录的请求
+
+        Args:
+            other: 要合并的尝试记录
+        """
+        self.attempts.extend(other.attempts)
+        self.retries += other.retries
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            请求数、重试次数和最近的尝试记录
+        """
+        return {
+            "requests": len(self.attempts) - self.retries,
+            "retries": self.retries,
+            "attempts": [attempt.to_dict() for attempt in self.attempts[-MAX_RECORDED_ATTEMPTS:]],
+        }
+
+
+def retry_attempts(
+    operation: str, stats: Optional[RetryStats] = None, policy: RetryPolicy = DEFAULT_RETRY_POLICY
+) -> Iterator[Attempt]:
+    """
+    按重试策略依次产生请求尝试，上一次尝试调用 finish 后不需要重试或达到次数上限时结束
+
+    用法：
+        for attempt in retry_attempts("upload", stats):
+            response = ...
+            attempt.finish(host, response.status_code)
+
+    Args:
+        operation: 操作名称
+        stats: 尝试记录（可选）
+        policy: 重试策略
+
+    Yields:
+        Attempt: 请求尝试，number 从 0 开始，可用于轮换域名
+    """
+    for number in range(policy.max_attempts):
+        if number:
+            time.sleep(policy.backoff(number))
+            if stats is not None:
+                stats.retries += 1
+        attempt = Attempt(operation, number)
+        yield attempt
+        if stats is not None:
+            stats.attempts.append(attempt)
+        if not attempt.retry:
+            return
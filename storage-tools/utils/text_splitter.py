@@ -0,0 +1,172 @@
+"""
+增量文本分块
+
+边输入边切分，内存中只保留未输出的文本（不超过一个分块加一次输入的大小）：
+- 分块大小按字符数或估算的 token 数限制
+- 优先在段落、换行、句子、空白处切分，找不到合适的位置时按大小硬切
+- 相邻分块之间保留重叠内容，重叠部分尽量从空白处开始
+"""
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+# 分块大小的单位
+UNIT_CHARACTERS = "characters"
+UNIT_TOKENS = "tokens"
+# 切分位置，按优先级排列
+SEPARATORS = ("\n\n", "\n", "。", "！", "？", ". ", "! ", "? ", "；", "; ", "，", ", ", " ")
+# 切分位置不早于分块大小的比例，避免产生过小的分块
+MIN_SPLIT_RATIO = 0.5
+
+
+def estimate_tokens(text: str) -> float:
+    """
+    估算文本的 token 数：ASCII 约 4 个字符一个 token，其他字符（中日韩文字等）约一个字符一个 token
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 token 数
+    """
+    ascii_count = sum(1 for char in text if char < "\x80")
+    return ascii_count / 4 + (len(text) - ascii_count)
+
+
+@dataclass
+class TextChunk:
+    """文本分块"""
+
+    index: int
+    text: str
+    # 分块在输入文本中的字符位置
+    start: int
+    end: int
+
+    @property
+    def estimated_tokens(self) -> int:
+        """估算的 token 数，不是模型分词器的实际结果"""
+        return round(estimate_tokens(self.text))
+
+
+class TextSplitter:
+    """
+    增量文本分块器
+
+    用法：
+        splitter = TextSplitter(1000, 100)
+        for text in texts:
+            yield from splitter.feed(text)
+        yield from splitter.finish()
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int = 0, unit: str = UNIT_CHARACTERS):
+        """
+        Args:
+            chunk_size: 分块大小
+            chunk_overlap: 重叠大小，不超过分块大小的一半
+            unit: 大小单位，characters 或 tokens
+
+        Raises:
+            ValueError: 参数无效
+        """
+        if chunk_size <= 0:
+            raise ValueError("分块大小必须大于 0")
+        if unit not in (UNIT_CHARACTERS, UNIT_TOKENS):
+            raise ValueError(f"不支持的分块单位: {unit}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = max(0, min(chunk_overlap, chunk_size // 2))
+        self.unit = unit
+        # 未输出的文本，开头可能是上一个分块的重叠部分
+        self.buffer = ""
+        self._buffer_start = 0
+        # buffer 中已输出（重叠）部分的长度
+        self._emitted = 0
+        self._index = 0
+
+    def _prefix_length(self, text: str, size: float) -> int:
+        """text 中不超过 size 的最长前缀的字符数"""
+        if self.unit == UNIT_CHARACTERS:
+            return min(len(text), int(size))
+        total = 0.0
+        for position, char in enumerate(text):
+            total += 0.25 if char < "\x80" else 1.0
+            if total > size:
+                return position
+        return len(text)
+
+    def _suffix_start(self, text: str, size: float) -> int:
+        """text 中不超过 size 的最长后缀的起始位置"""
+        if self.unit == UNIT_CHARACTERS:
+            return max(0, len(text) - int(size))
+        total = 0.0
+        for position in range(len(text) - 1, -1, -1):
+            total += 0.25 if text[position] < "\x80" else 1.0
+            if total > size:
+                return position + 1
+        return 0
+
+    def _split_position(self, limit: int) -> int:
+        """在 buffer[:limit] 中选择切分位置"""
+        minimum = self._emitted + max(1, int((limit - self._emitted) * MIN_SPLIT_RATIO))
+        for separator in SEPARATORS:
+            position = self.buffer.rfind(separator, minimum, limit)
+            if position != -1:
+                return position + len(separator)
+        return limit
+
+    def _overlap_start(self, end: int) -> int:
+        """下一个分块的起始位置：保留重叠内容，尽量从空白处开始"""
+        if self.chunk_overlap <= 0:
+            return end
+        start = self._suffix_start(self.buffer[:end], self.chunk_overlap)
+        for position in range(start, end):
+            if self.buffer[position].isspace():
+                return position + 1
+        return start
+
+    def _emit(self, end: int) -> Iterator[TextChunk]:
+        text = self.buffer[:end]
+        stripped = text.strip()
+        chunk = None
+        if stripped and end > self._emitted:
+            leading = len(text) - len(text.lstrip())
+            start = self._buffer_start + leading
+            chunk = TextChunk(self._index, stripped, start, start + len(stripped))
+            self._index += 1
+
+        # 先更新状态再输出，调用方在任意分块处停止时 buffer 都是未输出的内容
+        next_start = min(self._overlap_start(end), end)
+        self.buffer = self.buffer[next_start:]
+        self._buffer_start += next_start
+        self._emitted = end - next_start
+        if chunk is not None:
+            yield chunk
+
+    def feed(self, text: str) -> Iterator[TextChunk]:
+        """
+        输入文本，输出已经可以确定的分块
+
+        Args:
+            text: 新的文本
+
+        Yields:
+            TextChunk: 分块
+        """
+        self.buffer += text
+        while True:
+            limit = self._prefix_length(self.buffer, self.chunk_size)
+            if limit >= len(self.buffer):
+                # 剩余内容不足一个分块，等待更多输入
+                return
+            yield from self._emit(self._split_position(limit))
+
+    def finish(self) -> Iterator[TextChunk]:
+        """输入结束，输出剩余内容"""
+        if len(self.buffer) > self._emitted:
+            yield from self._emit(len(self.buffer))
+
+    @property
+    def pending(self) -> str:
+        """尚未输出的文本（不含重叠部分）"""
+        return self.buffer[self._emitted :]
@@ -0,0 +1,113 @@
+"""
+工具调用的分阶段计时
+
+记录一次工具调用中各阶段的耗时、传输的字节数和调用的接口：
+- 阶段按首次出现的顺序记录，同名阶段多次出现时累加
+- 接口调用次数取自 utils.retry 的请求尝试记录
+- 调用结束时以一行 JSON 输出结构化日志，便于日志系统聚合；工具参数 include_timings 为真时也在 JSON 结果中返回
+"""
+
+import json
+import logging
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import BinaryIO, Optional
+
+from utils.retry import RetryStats
+
+logger = logging.getLogger(__name__)
+
+
+class Timings:
+    """一次工具调用的计时"""
+
+    def __init__(self, tool: str, stats: Optional[RetryStats] = None):
+        """
+        Args:
+            tool: 工具名称
+            stats: 请求尝试记录（可选），用于统计接口调用
+        """
+        self.tool = tool
+        self.stats = stats
+        self.phases: dict[str, float] = {}
+        self.bytes: dict[str, int] = {}
+        self._started = time.monotonic()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        记录一个阶段的耗时
+
+        用法：
+            with timings.phase("check_bucket"):
+                client.check_bucket(bucket)
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.monotonic() - started) * 1000
+
+    def add_bytes(self, name: str, size: int) -> None:
+        """累加传输的字节数"""
+        self.bytes[name] = self.bytes.get(name, 0) + size
+
+    def count_chunks(self, chunks: Iterable[bytes], name: str) -> Iterator[bytes]:
+        """边输出数据块边累加字节数"""
+        for chunk in chunks:
+            self.add_bytes(name, len(chunk))
+            yield chunk
+
+    def count_stream(self, stream: BinaryIO, name: str) -> "CountingReader":
+        """包装只读流，读取时累加字节数"""
+        return CountingReader(stream, self, name)
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            总耗时、各阶段耗时（毫秒）、字节数和接口调用次数
+        """
+        api_calls: dict[str, int] = {}
+        if self.stats is not None:
+            for attempt in self.stats.attempts:
+                api_calls[attempt.operation] = api_calls.get(attempt.operation, 0) + 1
+        return {
+            "total_ms": round((time.monotonic() - self._started) * 1000, 1),
+            "phases": {name: round(elapsed, 1) for name, elapsed in self.phases.items()},
+            "bytes": dict(self.bytes),
+            "api_calls": api_calls,
+        }
+
+    def finish(self, result: dict, include: bool = False, **fields) -> dict:
+        """
+        调用结束：输出结构化日志，include 为真时在结果中加入 timings 字段
+
+        Args:
+            result: 工具的 JSON 结果，其中的 error 字段写入日志
+            include: 是否在结果中返回计时
+            **fields: 日志的附加字段，例如 bucket
+
+        Returns:
+            工具的 JSON 结果
+        """
+        timings = self.to_dict()
+        record = {"event": "tool_timings", "tool": self.tool, **fields, "error": result.get("error"), **timings}
+        logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        if include:
+            result["timings"] = timings
+        return result
+
+
+class CountingReader:
+    """读取时累加字节数的只读流"""
+
+    def __init__(self, stream: BinaryIO, timings: Timings, name: str):
+        self._stream = stream
+        self._timings = timings
+        self._name = name
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._timings.add_bytes(self._name, len(data))
+        return data